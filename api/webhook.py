@@ -4,35 +4,65 @@ Vercel Serverless Function - Webhook для Telegram бота
 import json
 import asyncio
 
+from aiogram import Bot, Dispatcher
 from aiogram.types import Update
 from http.server import BaseHTTPRequestHandler
 
 from src.config import BOT_TOKEN, DATABASE_URL
-from src.database import Database
+from src.database import Database, get_database
 from src.bot import create_bot, set_database
+from src.runtime import on_shutdown, run_sync
 
 
+# Состояние живёт между «тёплыми» вызовами одного инстанса функции
 db: Database | None = None
+bot: Bot | None = None
+dp: Dispatcher | None = None
+
+_init_lock: asyncio.Lock | None = None
+
+
+async def setup():
+    """Инициализация бота, диспетчера и БД один раз на «холодный старт»."""
+    global db, bot, dp, _init_lock
+
+    if bot is not None:
+        return
+
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+
+    async with _init_lock:
+        if bot is not None:
+            return
+
+        if DATABASE_URL and db is None:
+            # Глобальная db — только после успешной инициализации: иначе
+            # следующий вызов счёл бы БД готовой
+            database = get_database(DATABASE_URL)
+            try:
+                await database.init_tables()
+                set_database(database)
+            except Exception:
+                await database.close()
+                raise
+            on_shutdown(database.close)
+            db = database
+            print("[DEBUG] Database initialized in webhook")
+
+        bot, dp = create_bot()
+        on_shutdown(bot.session.close)
 
 
 async def process_update(update_data: dict):
     """Обработка входящего обновления через общий bot/dispatcher."""
-    global db
-
     print(f"[DEBUG] process_update, keys: {list(update_data.keys())}")
 
     if not BOT_TOKEN:
         print("[DEBUG] ERROR: BOT_TOKEN is None!")
         return
 
-    # Инициализируем базу данных один раз на «холодный старт»
-    if DATABASE_URL and db is None:
-        db = Database(DATABASE_URL)
-        await db.init_tables()
-        set_database(db)
-        print("[DEBUG] Database initialized in webhook")
-
-    bot, dp = create_bot()
+    await setup()
 
     try:
         update = Update(**update_data)
@@ -43,8 +73,6 @@ async def process_update(update_data: dict):
         print(f"[DEBUG] ERROR: {type(e).__name__}: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        await bot.session.close()
 
 
 class handler(BaseHTTPRequestHandler):
@@ -58,7 +86,7 @@ class handler(BaseHTTPRequestHandler):
             update_data = json.loads(body.decode('utf-8'))
             print(f"[DEBUG] has_message: {'message' in update_data}")
             
-            asyncio.run(process_update(update_data))
+            run_sync(process_update(update_data))
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
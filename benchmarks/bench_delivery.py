@@ -0,0 +1,187 @@
+"""
+Бенчмарк доставки дайджестов против локальной замены Bot API.
+
+Поднимает benchmarks/fake_bot_api.py в том же процессе и прогоняет
+один из путей отправки:
+    digest  — send_digest_to_admin (src/bot.py, aiogram);
+    command — обработчик /digest через Dispatcher.feed_update, база
+              подменена списком вакансий в памяти;
+    cron    — notify_admin из api/cron.py (лёгкий BotAPI).
+
+Печатает сообщения в секунду, число вызовов API на дайджест, число 429
+и потери (сообщения, которые должны были уйти, но не дошли).
+
+Примеры:
+    python benchmarks/bench_delivery.py --digests 20 --jobs 25
+    python benchmarks/bench_delivery.py --scenario cron --chat-rate 1 --chat-burst 3
+    python benchmarks/bench_delivery.py --scenario command --random-429 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# aiogram проверяет формат токена; реальный токен на локальный сервер не нужен
+os.environ.setdefault("BOT_TOKEN", "123456:bench-token")
+
+from corpus import generate_page  # noqa: E402
+from fake_bot_api import RECORDER_KEY, add_policy_args, policy_from_args, start_server  # noqa: E402
+from memory_db import MemoryDatabase  # noqa: E402
+from src.extract import extract_fields  # noqa: E402
+
+
+def build_jobs(count: int, seed: int) -> List[Dict]:
+    """Вакансии из синтетического корпуса в формате записей jobs"""
+    jobs = []
+    page = 0
+    while len(jobs) < count:
+        channel = f"bench_channel_{page}"
+        _, texts = generate_page(channel, seed=seed, last_id=5000 + page)
+        for offset, text in enumerate(texts):
+            if text and len(jobs) < count:
+                jobs.append({
+                    "id": len(jobs) + 1,
+                    "channel": channel,
+                    "message_id": 5000 + page - offset,
+                    "text": text,
+                    "keywords": ["python", "бот"],
+                    "url": f"https://t.me/{channel}/{5000 + page - offset}",
+                    **extract_fields(text),
+                })
+        page += 1
+    return jobs
+
+
+def expected_messages(scenario: str, jobs: int) -> int:
+    """Сколько сообщений путь должен отправить на один дайджест"""
+    if scenario == "digest":
+        return 1 + min(jobs, 15) + (1 if jobs > 15 else 0)
+    if scenario == "command":
+        return 1 + min(jobs, 10) + (1 if jobs > 10 else 0)
+    return 1 + min(jobs, 5)
+
+
+async def run_digest(api_base: str, jobs: List[Dict], digests: int) -> int:
+    from src.bot import create_bot, send_digest_to_admin
+
+    bot, _ = create_bot(api_base)
+    failed = 0
+    try:
+        for _ in range(digests):
+            try:
+                await send_digest_to_admin(bot, jobs)
+            except Exception as e:
+                failed += 1
+                print(f"[BENCH] digest aborted: {e}", file=sys.stderr)
+    finally:
+        await bot.session.close()
+    return failed
+
+
+async def run_command(api_base: str, jobs: List[Dict], digests: int) -> int:
+    from aiogram.types import Update
+    from src import bot as bot_module
+    from src.config import ADMIN_ID
+
+    bot, dp = bot_module.create_bot(api_base)
+    bot_module.set_database(MemoryDatabase(jobs))
+    failed = 0
+    try:
+        for n in range(digests):
+            update = Update.model_validate({
+                "update_id": n + 1,
+                "message": {
+                    "message_id": n + 1,
+                    "date": int(time.time()),
+                    "chat": {"id": ADMIN_ID, "type": "private"},
+                    "from": {"id": ADMIN_ID, "is_bot": False, "first_name": "Admin"},
+                    "text": "/digest",
+                    "entities": [{"type": "bot_command", "offset": 0, "length": 7}],
+                },
+            }, context={"bot": bot})
+            try:
+                await dp.feed_update(bot, update)
+            except Exception as e:
+                failed += 1
+                print(f"[BENCH] /digest aborted: {e}", file=sys.stderr)
+    finally:
+        await bot.session.close()
+    return failed
+
+
+async def run_cron(api_base: str, jobs: List[Dict], digests: int) -> int:
+    import aiohttp
+    import api.cron as cron
+    from src.telegram_api import BotAPI
+
+    failed = 0
+    async with aiohttp.ClientSession() as session:
+        api = BotAPI(session, cron.BOT_TOKEN or os.environ["BOT_TOKEN"], api_base=api_base)
+        for _ in range(digests):
+            try:
+                await cron.notify_admin(api, jobs, jobs, len(jobs))
+            except Exception as e:
+                failed += 1
+                print(f"[BENCH] cron notify aborted: {e}", file=sys.stderr)
+    return failed
+
+
+SCENARIOS = {"digest": run_digest, "command": run_command, "cron": run_cron}
+
+
+async def main_async(args) -> Dict:
+    runner, app, api_base = await start_server(policy_from_args(args))
+    jobs = build_jobs(args.jobs, args.seed)
+    start = time.perf_counter()
+    try:
+        failed = await SCENARIOS[args.scenario](api_base, jobs, args.digests)
+    finally:
+        elapsed = time.perf_counter() - start
+        summary = app[RECORDER_KEY].summary()
+        await runner.cleanup()
+
+    expected = expected_messages(args.scenario, args.jobs) * args.digests
+    delivered = summary["delivered"]
+    return {
+        "scenario": args.scenario,
+        "digests": args.digests,
+        "jobs_per_digest": args.jobs,
+        "wall_s": round(elapsed, 3),
+        "messages_per_s": round(delivered / elapsed, 1) if elapsed else 0.0,
+        "api_calls": summary["calls"],
+        "api_calls_per_digest": round(summary["calls"] / args.digests, 1),
+        "delivered": delivered,
+        "expected": expected,
+        "throttled_429": summary["throttled"],
+        "aborted_digests": failed,
+        "loss_pct": round(100 * (expected - delivered) / expected, 1) if expected else 0.0,
+        "by_method": summary["by_method"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="digest")
+    parser.add_argument("--digests", type=int, default=10, help="сколько дайджестов отправить")
+    parser.add_argument("--jobs", type=int, default=20, help="вакансий в дайджесте")
+    add_policy_args(parser)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:<22}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Бенчмарк маршрутизации вакансий по подпискам (src/subscriptions.py).
+
+Генерирует N подписок со случайными категориями, словами и стоп-словами
+из словаря KEYWORDS + TECH_ALIASES и маршрутизирует вакансии синтетического
+корпуса двумя способами:
+    naive — перебор подписчиков, `word in text` для каждого слова;
+    index — обратный индекс + автомат Ахо — Корасик.
+Печатает время на вакансию для каждого N: у index оно почти не зависит
+от числа подписчиков. Результаты маршрутизации сверяются.
+
+Примеры:
+    python benchmarks/bench_matcher.py
+    python benchmarks/bench_matcher.py --subscribers 1 100 10000 --jobs 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_delivery import build_jobs  # noqa: E402
+from src.config import KEYWORDS  # noqa: E402
+from src.extract import TECH_ALIASES  # noqa: E402
+from src.subscriptions import SubscriptionIndex  # noqa: E402
+
+
+def build_subscriptions(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    vocabulary = sorted({word for words in KEYWORDS.values() for word in words} | set(TECH_ALIASES))
+    # Словарь шире, чем у одного пользователя: добавляем «редкие» слова
+    vocabulary += [f"term{n}" for n in range(2000)]
+    subscriptions = []
+    for chat_id in range(1, count + 1):
+        subscriptions.append({
+            "chat_id": chat_id,
+            "categories": rng.sample(sorted(KEYWORDS), rng.randint(0, 1)),
+            "keywords": rng.sample(vocabulary, rng.randint(1, 8)),
+            "stop_words": rng.sample(vocabulary, rng.randint(0, 3)),
+        })
+    return subscriptions
+
+
+def route_naive(subscriptions: List[Dict], jobs: List[Dict]) -> Dict[int, List[Dict]]:
+    """Перебор подписчиков для каждой вакансии"""
+    routes: Dict[int, List[Dict]] = {}
+    for job in jobs:
+        text = job["text"].lower()
+        job_categories = set(job.get("keywords") or [])
+        for sub in subscriptions:
+            if not sub["categories"] and not sub["keywords"]:
+                matched = True
+            else:
+                matched = bool(job_categories & set(sub["categories"])) or any(
+                    word in text for word in sub["keywords"]
+                )
+            if matched and not any(word in text for word in sub["stop_words"]):
+                routes.setdefault(sub["chat_id"], []).append(job)
+    return routes
+
+
+def measure(subscribers: int, jobs: List[Dict], seed: int) -> Dict:
+    subscriptions = build_subscriptions(subscribers, seed)
+
+    start = time.perf_counter()
+    index = SubscriptionIndex(subscriptions)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    routes = index.route(jobs)
+    index_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = route_naive(subscriptions, jobs)
+    naive_s = time.perf_counter() - start
+
+    same = {k: [j["id"] for j in v] for k, v in routes.items()} == \
+        {k: [j["id"] for j in v] for k, v in expected.items()}
+    return {
+        "subscribers": subscribers,
+        "terms": len(index.matcher),
+        "build_ms": round(build_s * 1000, 1),
+        "index_us_per_job": round(index_s / len(jobs) * 1e6, 1),
+        "naive_us_per_job": round(naive_s / len(jobs) * 1e6, 1),
+        "routes": sum(len(v) for v in routes.values()),
+        "same_result": same,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--jobs", type=int, default=100, help="вакансий для маршрутизации")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    jobs = build_jobs(args.jobs, args.seed)
+    results = [measure(n, jobs, args.seed) for n in args.subscribers]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{c:>17}" for c in columns))
+    for row in results:
+        print("  ".join(f"{str(row[c]):>17}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Офлайн-бенчмарк этапов парсинга на синтетическом корпусе t.me/s.
+
+Оба входа используют общий конвейер TelegramParser (src/parser.py):
+"parser" — с профилем jobs, "cron" — с профилем orders и настройками
+api/cron.py. Для каждого этапа (parse_html, clean_html, filter, hash,
+similarity; filter_all — профили jobs и orders за один проход)
+печатается пропускная способность и пик памяти за проход; для
+parse_html дополнительно — доля постов, чей текст сопоставлен
+с правильным message_id.
+
+Примеры:
+    python benchmarks/bench_parser.py                   # сравнение с baseline.json
+    python benchmarks/bench_parser.py --save-baseline   # записать новый baseline
+    python benchmarks/bench_parser.py --channels 200 --threshold 0.15
+
+Baseline зависит от машины: сохраняйте его на той же машине, где сравниваете.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_page  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Минимальная длительность одного замера этапа, секунд
+MIN_SAMPLE_SECONDS = 0.05
+
+TEXT_DIV = re.compile(r'<div class="tgme_widget_message_text[^"]*"[^>]*>(.*?)</div>', re.DOTALL)
+
+
+def load_implementations() -> Dict[str, Dict[str, Callable]]:
+    """Этапы конвейера для фонового парсинга и для cron под общими именами"""
+    from src.filters import check_profiles, filter_registry
+    from src.parser import TelegramParser
+    import api.cron as cron
+
+    implementations = {}
+    for name, parser in (("parser", TelegramParser()), ("cron", cron.create_parser())):
+        implementations[name] = {
+            "parse_html": parser.parse_html,
+            "clean_html": parser.clean_html,
+            "filter": parser.is_job_posting,
+            "hash": parser.calculate_hash,
+            "similarity": parser.is_similar_to_existing,
+        }
+    # Оба профиля за один проход по сообщению
+    both = [filter_registry.get("jobs"), filter_registry.get("orders")]
+    implementations["parser"]["filter_all"] = lambda text: check_profiles(both, text)
+    return implementations
+
+
+def build_inputs(channels: int, seed: int) -> Dict:
+    pages, expected = [], {}
+    for i in range(channels):
+        channel = f"bench_channel_{i}"
+        last_id = 5000 + i * 13
+        html, texts = generate_page(channel, seed=seed, last_id=last_id)
+        pages.append((channel, html))
+        for offset, text in enumerate(reversed(texts)):
+            expected[(channel, last_id - offset)] = text
+    fragments = [f for _, html in pages for f in TEXT_DIV.findall(html)]
+    return {"pages": pages, "fragments": fragments, "expected": expected}
+
+
+def alignment(messages: List[Dict], expected: Dict) -> float:
+    """Доля сообщений, текст которых взят из поста с тем же message_id"""
+    if not messages:
+        return 0.0
+    ok = 0
+    for msg in messages:
+        source = expected.get((msg["channel"], msg["message_id"]))
+        # Первая строка исходного текста без эмодзи-префикса
+        if source and source.split("\n")[0].strip()[-30:] in msg["text"]:
+            ok += 1
+    return ok / len(messages)
+
+
+def _loops(fn: Callable[[], object]) -> int:
+    """Сколько вызовов fn уложить в один замер, чтобы он занял MIN_SAMPLE_SECONDS:
+    иначе разброс таймера и планировщика сравним с самим временем этапа."""
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    return max(1, math.ceil(MIN_SAMPLE_SECONDS / first)) if first > 0 else 1
+
+
+def _sample(fn: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return (time.perf_counter() - start) / loops
+
+
+def _calibration_workload():
+    text = "Ищем Python разработчика, удалённо, бюджет 100000 ₽ " * 20
+    for _ in range(500):
+        re.sub(r"\s+", " ", text.lower()).split()
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Tuple[float, float, float]:
+    """Медианы repeat замеров: (время этапа, скорость машины, относительная стоимость).
+
+    Каждый замер этапа идёт сразу за замером фиксированной нагрузки, и
+    относительная стоимость считается по паре соседних замеров: колебания
+    скорости машины (соседи по CPU, частота) сокращаются, а медиана по
+    парам отбрасывает единичные выбросы. Именно её сравнивает compare().
+    """
+    stage_loops = _loops(fn)
+    cal_loops = _loops(_calibration_workload)
+    stage, cal, relative = [], [], []
+    for _ in range(repeat):
+        c = _sample(_calibration_workload, cal_loops)
+        t = _sample(fn, stage_loops)
+        cal.append(c)
+        stage.append(t)
+        relative.append(t / c)
+    return statistics.median(stage), 500 / statistics.median(cal), statistics.median(relative)
+
+
+def peak_kb(fn: Callable[[], int]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_impl(name: str, stages: Dict[str, Callable], inputs: Dict, repeat: int) -> Dict[str, Dict]:
+    pages: Sequence = inputs["pages"]
+    fragments: Sequence[str] = inputs["fragments"]
+    page_bytes = sum(len(html.encode()) for _, html in pages)
+    fragment_bytes = sum(len(f.encode()) for f in fragments)
+
+    messages = [m for channel, html in pages for m in stages["parse_html"](html, channel)]
+    texts = [m["text"] for m in messages]
+    existing = texts[:50]
+    probes = texts[50:90]
+
+    runs = {
+        "parse_html": (lambda: [stages["parse_html"](html, ch) for ch, html in pages], len(pages), page_bytes),
+        "clean_html": (lambda: [stages["clean_html"](f) for f in fragments], len(fragments), fragment_bytes),
+        "filter": (lambda: [stages["filter"](t) for t in texts], len(texts), 0),
+        "filter_all": (lambda: [stages["filter_all"](t) for t in texts], len(texts), 0),
+        "hash": (lambda: [stages["hash"](t) for t in texts], len(texts), 0),
+        "similarity": (lambda: [stages["similarity"](t, existing) for t in probes], len(probes), 0),
+    }
+
+    results = {}
+    for stage, (fn, items, size) in runs.items():
+        if stage not in stages:
+            continue
+        seconds, speed, relative = timed(fn, repeat)
+        results[stage] = {
+            "calibration": round(speed, 1),
+            "relative_cost": round(relative, 6),
+            "items": items,
+            "seconds": round(seconds, 5),
+            "items_per_s": round(items / seconds, 1) if seconds else 0.0,
+            "mb_per_s": round(size / seconds / 1e6, 2) if size and seconds else None,
+            "peak_kb": round(peak_kb(fn), 1),
+        }
+    results["parse_html"]["alignment"] = round(alignment(messages, inputs["expected"]), 3)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Этапы, чья пропускная способность (с поправкой на скорость машины)
+    упала больше чем на threshold"""
+    regressions = []
+    for impl, stages in results.items():
+        for stage, data in stages.items():
+            base = baseline.get(impl, {}).get(stage)
+            if not base or not base.get("items_per_s"):
+                continue
+            if base.get("relative_cost") and data.get("relative_cost"):
+                ratio = base["relative_cost"] / data["relative_cost"]
+            else:
+                speed = data["calibration"] / base["calibration"] if base.get("calibration") else 1.0
+                ratio = data["items_per_s"] / base["items_per_s"] / speed
+            data["vs_baseline"] = round(ratio, 3)
+            if ratio < 1 - threshold:
+                regressions.append(f"{impl}.{stage}: {ratio:.0%} of baseline throughput")
+    return regressions
+
+
+def print_results(results: Dict):
+    header = f"{'impl':<8}{'stage':<12}{'items/s':>12}{'MB/s':>8}{'peak KB':>10}{'vs base':>9}  notes"
+    print(header)
+    print("-" * len(header))
+    for impl, stages in results.items():
+        for stage, d in stages.items():
+            mb = f"{d['mb_per_s']:.2f}" if d["mb_per_s"] is not None else "-"
+            vs = f"{d['vs_baseline']:.2f}" if "vs_baseline" in d else "-"
+            notes = f"alignment={d['alignment']:.1%}" if "alignment" in d else ""
+            print(f"{impl:<8}{stage:<12}{d['items_per_s']:>12.1f}{mb:>8}{d['peak_kb']:>10.1f}{vs:>9}  {notes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=50, help="страниц в корпусе")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="замеров на этап, берётся медиана")
+    parser.add_argument("--impl", choices=["parser", "cron"], action="append", help="только эти реализации")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимое падение пропускной способности")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    inputs = build_inputs(args.channels, args.seed)
+    impls = load_implementations()
+    results = {
+        name: bench_impl(name, stages, inputs, args.repeat)
+        for name, stages in impls.items()
+        if not args.impl or name in args.impl
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_results(results)
+
+    for line in regressions:
+        print(f"REGRESSION: {line}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
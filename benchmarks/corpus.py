@@ -0,0 +1,211 @@
+"""
+Генератор синтетических страниц t.me/s/<channel> для офлайн-бенчмарков.
+
+Страницы повторяют разметку публичного веб-интерфейса Telegram: обёртки
+tgme_widget_message_wrap, data-post, текст с <br/>, ссылками, эмодзи и
+HTML-сущностями, футер с датой. В корпус попадают русские и английские
+посты, посты без текста (только фото), пересланные сообщения и репосты
+одного объявления с мелкими правками (для проверки дедупликации).
+
+Генерация детерминирована: одинаковый seed даёт одинаковый корпус.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import List, Tuple
+
+
+RU_TASKS = [
+    "Нужен телеграм бот для записи клиентов в салон, интеграция с Google Sheets",
+    "Ищем frontend разработчика на React для доработки личного кабинета",
+    "Требуется backend разработчик (Python, FastAPI, PostgreSQL) на проект",
+    "Нужно сделать лендинг для онлайн-школы, верстка по макету из Figma",
+    "Ищу программиста для доработки сайта на WordPress, исправить форму оплаты",
+    "Требуется DevOps инженер: настроить CI/CD, docker, kubernetes",
+    "Нужен парсер маркетплейса с выгрузкой в Excel, бюджет обсуждается",
+    "Ищем fullstack разработчика (Node.js + Vue) в стартап, удалённо",
+    "Разработать мобильное приложение на Flutter для доставки еды",
+    "Нужна помощь с интеграцией API платёжной системы в интернет-магазин",
+    "Ищем ML инженера: дообучить LLM на наших данных, Python, PyTorch",
+    "Кто возьмётся написать скрипт автоматизации отчётов? Оплачу сразу",
+]
+RU_DETAILS = [
+    "Бюджет {budget} ₽, оплата поэтапно.",
+    "Оплата {budget} руб. за проект, срок 2 недели.",
+    "Зарплата от {budget} ₽ на руки, удалённо, полный день.",
+    "Формат: удаленно, частичная занятость. Ставка обсуждается.",
+    "ТЗ пришлю в личку, пишите с примерами работ.",
+    "Стек: Python 3.11, aiogram, PostgreSQL, Redis.",
+    "Офис в Москве, гибрид 2/3, ДМС, оформление по ТК.",
+    "Срок — до конца месяца, возможно продолжение сотрудничества.",
+]
+EN_TASKS = [
+    "Looking for a Python developer to build a Telegram bot for our community",
+    "We are hiring a Senior Frontend Engineer (React, TypeScript), fully remote",
+    "Need a freelance web developer to fix our Next.js landing page",
+    "Backend engineer wanted: Go or Node.js, AWS, microservices",
+    "Seeking a DevOps engineer for Kubernetes migration, contract role",
+    "Looking for an ML engineer with LLM and data science experience",
+]
+EN_DETAILS = [
+    "Budget: ${budget}, paid via escrow.",
+    "Salary ${budget}/month, remote, flexible hours.",
+    "Send your CV and GitHub profile to apply.",
+    "Stack: Django, PostgreSQL, Celery, Docker.",
+    "Part-time is OK, long-term cooperation possible.",
+]
+NOISE = [
+    "Доброе утро! Сегодня разбираем новые фичи Python 3.12 🔥",
+    "Подборка полезных статей за неделю: асинхронность, тестирование, CI.",
+    "Менеджер по продажам ищет клиентов, пишите в директ.",
+    "Конференция для разработчиков пройдёт 15 мая, регистрация открыта.",
+    "Weekly digest: top 10 GitHub repos of the week.",
+    "Опрос: какой фреймворк вы используете для фронтенда?",
+    "Вакансия: HR менеджер в IT-компанию, опыт от 1 года.",
+]
+EMOJI = ["🔥", "💼", "🚀", "💰", "✅", "📌"]
+CONTACTS = ["@recruiter_anna", "@dev_orders_bot", "@ivan_pm", "@hr_team", "@cto_maxim"]
+
+
+def _emoji(char: str) -> str:
+    code = "".join(f"{ord(c):x}" for c in char)
+    return (
+        f'<i class="emoji" style="background-image:url(\'//telegram.org/img/emoji/40/{code.upper()}.png\')">'
+        f"<b>{char}</b></i>"
+    )
+
+
+def _post_text(rng: random.Random, lang: str) -> str:
+    """Текст поста: задача + 1–3 детали + контакт"""
+    if lang == "ru":
+        task, details = rng.choice(RU_TASKS), RU_DETAILS
+    else:
+        task, details = rng.choice(EN_TASKS), EN_DETAILS
+    parts = [task]
+    for detail in rng.sample(details, rng.randint(1, 3)):
+        parts.append(detail.format(budget=rng.choice([15000, 30000, 50000, 80000, 120000, 500, 1500, 3000])))
+    parts.append(f"Контакт: {rng.choice(CONTACTS)}" if lang == "ru" else f"Contact: {rng.choice(CONTACTS)}")
+    return "\n".join(parts)
+
+
+def _edit(rng: random.Random, text: str) -> str:
+    """Репост с мелкой правкой: другая сумма, лишний эмодзи или пробелы"""
+    choice = rng.randint(0, 2)
+    if choice == 0:
+        return text.replace("000", "500", 1)
+    if choice == 1:
+        return rng.choice(EMOJI) + " " + text
+    return text.replace("\n", "\n\n", 1) + " "
+
+
+def _render_text(rng: random.Random, text: str) -> str:
+    """Текст поста в разметке t.me/s: сущности, <br/>, ссылки, эмодзи, жирный"""
+    lines = []
+    for i, line in enumerate(text.split("\n")):
+        html_line = escape(line, quote=True)
+        if i == 0:
+            html_line = f"<b>{html_line}</b>"
+        for contact in CONTACTS:
+            if contact in line:
+                html_line = html_line.replace(
+                    contact, f'<a href="https://t.me/{contact[1:]}" target="_blank">{contact}</a>'
+                )
+        lines.append(html_line)
+    if rng.random() < 0.5:
+        lines.insert(0, _emoji(rng.choice(EMOJI)))
+    if rng.random() < 0.3:
+        lines.append(
+            '<a href="https://example.com/job?id=%d&amp;utm_source=tg" target="_blank" '
+            'rel="noopener">Подробнее &#8594;</a>' % rng.randint(1000, 9999)
+        )
+    return "<br/>".join(lines)
+
+
+def _render_post(channel: str, post_id: int, date: datetime, text_html: str,
+                 photo: bool, forwarded_from: str = "") -> str:
+    forwarded = ""
+    if forwarded_from:
+        forwarded = (
+            '<div class="tgme_widget_message_forwarded_from accent_color">Forwarded from '
+            f'<a class="tgme_widget_message_forwarded_from_name" href="https://t.me/{forwarded_from}">'
+            f"<span dir=\"auto\">{forwarded_from}</span></a></div>"
+        )
+    media = ""
+    if photo:
+        media = (
+            f'<a class="tgme_widget_message_photo_wrap" href="https://t.me/{channel}/{post_id}" '
+            "style=\"width:800px;background-image:url('https://cdn4.telesco.pe/file/x.jpg')\">"
+            '<div class="tgme_widget_message_photo" style="padding-top:56.25%"></div></a>'
+        )
+    text = ""
+    if text_html:
+        text = f'<div class="tgme_widget_message_text js-message_text" dir="auto">{text_html}</div>'
+    return (
+        '<div class="tgme_widget_message_wrap js-widget_message_wrap">'
+        f'<div class="tgme_widget_message text_not_supported_wrap js-widget_message" '
+        f'data-post="{channel}/{post_id}" data-view="eyJjIjotMTAw">'
+        f'<div class="tgme_widget_message_user"><a href="https://t.me/{channel}">'
+        '<i class="tgme_widget_message_user_photo bgcolor0"></i></a></div>'
+        '<div class="tgme_widget_message_bubble"><i class="tgme_widget_message_bubble_tail"></i>'
+        f"{forwarded}{media}{text}"
+        '<div class="tgme_widget_message_footer compact js-message_footer">'
+        '<div class="tgme_widget_message_info short js-message_info">'
+        f'<span class="tgme_widget_message_views">{post_id % 97 / 10:.1f}K</span>'
+        '<span class="tgme_widget_message_meta">'
+        f'<a class="tgme_widget_message_date" href="https://t.me/{channel}/{post_id}">'
+        f'<time datetime="{date.isoformat()}" class="time">{date:%H:%M}</time></a></span>'
+        "</div></div></div></div></div>"
+    )
+
+
+def generate_page(channel: str, seed: int = 0, posts: int = 20, last_id: int = 5000,
+                  now: datetime = None) -> Tuple[str, List[str]]:
+    """HTML одной страницы канала и список исходных текстов постов (None — без текста)"""
+    rng = random.Random(f"{channel}:{seed}")
+    now = now or datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc)
+    texts: List[str] = []
+    items: List[str] = []
+    previous = None
+    first_id = last_id - posts + 1
+    for n, post_id in enumerate(range(first_id, last_id + 1)):
+        date = now - timedelta(minutes=37 * (last_id - post_id))
+        roll = rng.random()
+        photo = rng.random() < 0.25
+        forwarded_from = ""
+        if roll < 0.1:
+            text = None                       # только фото
+            photo = True
+        elif roll < 0.25 and previous:
+            text = _edit(rng, previous)       # репост с правкой
+            forwarded_from = rng.choice(["jobs_aggregator", "it_freelance_hub"])
+        elif roll < 0.45:
+            text = rng.choice(NOISE)          # не вакансия
+        else:
+            text = _post_text(rng, "ru" if rng.random() < 0.75 else "en")
+        if text and n % 7 == 0:
+            previous = text
+        texts.append(text)
+        items.append(_render_post(
+            channel, post_id, date, _render_text(rng, text) if text else "", photo, forwarded_from
+        ))
+
+    page = (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{channel} – Telegram</title>"
+        '<link href="//telegram.org/css/widget-frame.css?66" rel="stylesheet"></head>'
+        '<body class="widget_frame_base tgme_webpreview_channel"><main class="tgme_main">'
+        '<section class="tgme_channel_history js-message_history">'
+        + "".join(items)
+        + "</section></main></body></html>"
+    )
+    return page, texts
+
+
+def generate_corpus(channels: int = 50, seed: int = 0, posts: int = 20) -> List[Tuple[str, str]]:
+    """Корпус страниц: [(channel, html), ...]"""
+    corpus = []
+    for i in range(channels):
+        channel = f"bench_channel_{i}"
+        html, _ = generate_page(channel, seed=seed, posts=posts, last_id=5000 + i * 13)
+        corpus.append((channel, html))
+    return corpus
@@ -0,0 +1,221 @@
+"""
+Локальная замена Bot API (api.telegram.org) для тестов рассылки.
+
+Принимает вызовы /bot<token>/<method> (JSON или form-data, как шлёт
+aiogram), записывает их и отвечает минимально валидными объектами.
+Flood control моделируется token bucket'ами: на чат (по умолчанию
+Telegram допускает ~1 сообщение в секунду с небольшим всплеском) и
+глобальным (~30 сообщений в секунду); при превышении возвращается 429
+с parameters.retry_after. Дополнительно можно задать случайную долю 429
+и задержку ответа.
+
+Запуск отдельно:
+    python benchmarks/fake_bot_api.py --port 8082 --chat-rate 1 --chat-burst 5
+    TELEGRAM_API_BASE=http://127.0.0.1:8082 python -m src.main
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+SEND_METHODS = {"sendMessage", "sendDocument", "sendPhoto", "copyMessage", "forwardMessage"}
+
+
+@dataclass
+class FloodPolicy:
+    chat_rate: float = 0.0       # сообщений в секунду на чат (0 — без лимита)
+    chat_burst: int = 1
+    global_rate: float = 0.0     # сообщений в секунду всего (0 — без лимита)
+    global_burst: int = 1
+    random_429: float = 0.0      # доля случайных 429
+    retry_after: int = 1         # retry_after для случайных 429
+    latency_ms: float = 0.0
+    seed: int = 0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0, если токен взят, иначе — сколько секунд ждать до следующего"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class Call:
+    method: str
+    chat_id: Optional[str]
+    status: int
+    at: float
+    text_len: int = 0
+
+
+@dataclass
+class Recorder:
+    calls: List[Call] = field(default_factory=list)
+    message_id: int = 0
+
+    def summary(self) -> Dict:
+        by_status: Dict[str, int] = {}
+        by_method: Dict[str, int] = {}
+        for call in self.calls:
+            by_status[str(call.status)] = by_status.get(str(call.status), 0) + 1
+            by_method[call.method] = by_method.get(call.method, 0) + 1
+        delivered = [c for c in self.calls if c.method in SEND_METHODS and c.status == 200]
+        return {
+            "calls": len(self.calls),
+            "delivered": len(delivered),
+            "throttled": by_status.get("429", 0),
+            "by_status": by_status,
+            "by_method": by_method,
+        }
+
+    def reset(self):
+        self.calls.clear()
+
+
+POLICY_KEY = web.AppKey("policy", FloodPolicy)
+RECORDER_KEY = web.AppKey("recorder", Recorder)
+BUCKETS_KEY = web.AppKey("buckets", dict)
+RNG_KEY = web.AppKey("rng", random.Random)
+
+
+async def _read_params(request: web.Request) -> Dict:
+    if request.content_type == "application/json":
+        return await request.json()
+    form = await request.post()
+    return {key: value for key, value in form.items() if isinstance(value, str)}
+
+
+def _too_many(retry_after: int) -> web.Response:
+    return web.json_response({
+        "ok": False,
+        "error_code": 429,
+        "description": f"Too Many Requests: retry after {retry_after}",
+        "parameters": {"retry_after": retry_after},
+    }, status=429)
+
+
+def _result(method: str, params: Dict, message_id: int):
+    if method == "getMe":
+        return {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+    if method in SEND_METHODS:
+        chat_id = int(params.get("chat_id", 0))
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        return message
+    return True
+
+
+async def handle_method(request: web.Request) -> web.Response:
+    policy = request.app[POLICY_KEY]
+    recorder = request.app[RECORDER_KEY]
+    buckets: Dict = request.app[BUCKETS_KEY]
+    rng = request.app[RNG_KEY]
+    method = request.match_info["method"]
+    params = await _read_params(request)
+    chat_id = str(params["chat_id"]) if "chat_id" in params else None
+
+    if policy.latency_ms:
+        await asyncio.sleep(policy.latency_ms / 1000)
+
+    wait = 0.0
+    if method in SEND_METHODS:
+        if policy.random_429 and rng.random() < policy.random_429:
+            wait = policy.retry_after
+        if not wait and policy.global_rate:
+            bucket = buckets.setdefault(None, TokenBucket(policy.global_rate, policy.global_burst))
+            wait = bucket.take()
+        if not wait and policy.chat_rate and chat_id is not None:
+            bucket = buckets.setdefault(chat_id, TokenBucket(policy.chat_rate, policy.chat_burst))
+            wait = bucket.take()
+
+    text_len = len(params.get("text", "") or "")
+    if wait:
+        recorder.calls.append(Call(method, chat_id, 429, time.monotonic(), text_len))
+        return _too_many(max(1, math.ceil(wait)))
+
+    recorder.message_id += 1
+    recorder.calls.append(Call(method, chat_id, 200, time.monotonic(), text_len))
+    return web.json_response({"ok": True, "result": _result(method, params, recorder.message_id)})
+
+
+def create_app(policy: FloodPolicy = None) -> web.Application:
+    policy = policy or FloodPolicy()
+    app = web.Application()
+    app[POLICY_KEY] = policy
+    app[RECORDER_KEY] = Recorder()
+    app[BUCKETS_KEY] = {}
+    app[RNG_KEY] = random.Random(policy.seed)
+    app.router.add_post("/bot{token}/{method}", handle_method)
+    app.router.add_get("/bot{token}/{method}", handle_method)
+    return app
+
+
+async def start_server(policy: FloodPolicy = None, host: str = "127.0.0.1", port: int = 0):
+    """Запуск в текущем event loop; возвращает (runner, app, api_base)"""
+    app = create_app(policy)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner, app, f"http://{host}:{runner.addresses[0][1]}"
+
+
+def add_policy_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--chat-rate", type=float, default=0.0, help="сообщений/с на чат, 0 — без лимита")
+    parser.add_argument("--chat-burst", type=int, default=1)
+    parser.add_argument("--global-rate", type=float, default=0.0, help="сообщений/с всего, 0 — без лимита")
+    parser.add_argument("--global-burst", type=int, default=1)
+    parser.add_argument("--random-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def policy_from_args(args: argparse.Namespace) -> FloodPolicy:
+    return FloodPolicy(
+        chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst,
+        global_rate=args.global_rate,
+        global_burst=args.global_burst,
+        random_429=args.random_429,
+        retry_after=args.retry_after,
+        latency_ms=args.api_latency_ms,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    add_policy_args(parser)
+    args = parser.parse_args()
+
+    print(f"Fake Bot API on http://{args.host}:{args.port}")
+    web.run_app(create_app(policy_from_args(args)), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Локальная замена t.me/s: отдаёт сгенерированные страницы каналов.
+
+Страницы строятся генератором из benchmarks/corpus.py и кешируются.
+Поведение настраивается: задержка ответа, доля ошибок 500, доля 429 с
+Retry-After, доля «медленных» ответов (тело отдаётся кусками с паузами).
+Поддерживается пагинация ?before=<id>, как у t.me/s, gzip по
+Accept-Encoding и ETag с ответом 304 на If-None-Match (--no-compress,
+--no-etag — выключить). GET /stats возвращает число запросов, байты по
+сети и достигнутую конкурентность.
+
+Запуск отдельно:
+    python benchmarks/fake_tme.py --port 8081 --latency-ms 150 --error-rate 0.05
+    TELEGRAM_WEB_BASE=http://127.0.0.1:8081/s python -m src.main
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import os
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_page  # noqa: E402
+
+NOW = datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 0.0          # средняя задержка перед ответом
+    jitter_ms: float = 0.0           # равномерный разброс задержки ±
+    error_rate: float = 0.0          # доля ответов 500
+    rate_429: float = 0.0            # доля ответов 429
+    retry_after: int = 5             # значение Retry-After для 429
+    slow_rate: float = 0.0           # доля медленных ответов
+    slow_chunk_delay_ms: float = 200  # пауза между кусками медленного тела
+    slow_chunks: int = 5
+    posts: int = 20
+    last_id: int = 5000              # id последнего поста канала (глубина истории для ?before=)
+    seed: int = 0
+    compress: bool = True            # gzip, если клиент его принимает
+    etag: bool = True                # ETag и 304 на If-None-Match
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+    bytes_sent: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+BEHAVIOUR_KEY = web.AppKey("behaviour", Behaviour)
+STATS_KEY = web.AppKey("stats", Stats)
+PAGES_KEY = web.AppKey("pages", dict)
+RNG_KEY = web.AppKey("rng", random.Random)
+
+
+def render_page(channel: str, before: int, behaviour: Behaviour) -> str:
+    """Страница с постами id < before; у канала посты 1..last_id, даты от NOW назад"""
+    last_id = min(before - 1, behaviour.last_id)
+    if last_id < 1:
+        html, _ = generate_page(channel, seed=behaviour.seed, posts=0, last_id=0)
+        return html
+    # Дата поста зависит только от его id, а не от страницы
+    now = NOW - timedelta(minutes=37 * (behaviour.last_id - last_id))
+    html, _ = generate_page(
+        channel, seed=f"{behaviour.seed}:{last_id}", posts=min(behaviour.posts, last_id),
+        last_id=last_id, now=now,
+    )
+    return html
+
+
+async def handle_channel(request: web.Request) -> web.StreamResponse:
+    behaviour = request.app[BEHAVIOUR_KEY]
+    stats = request.app[STATS_KEY]
+    rng = request.app[RNG_KEY]
+    channel = request.match_info["channel"]
+
+    stats.requests += 1
+    stats.in_flight += 1
+    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+    status = 200
+    try:
+        delay = behaviour.latency_ms + rng.uniform(-behaviour.jitter_ms, behaviour.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        roll = rng.random()
+        if roll < behaviour.rate_429:
+            status = 429
+            return web.Response(status=429, headers={"Retry-After": str(behaviour.retry_after)})
+        if roll < behaviour.rate_429 + behaviour.error_rate:
+            status = 500
+            return web.Response(status=500, text="Internal Server Error")
+
+        pages = request.app[PAGES_KEY]
+        before = int(request.query.get("before", behaviour.last_id + 1))
+        page = pages.get((channel, before))
+        if page is None:
+            body = render_page(channel, before, behaviour).encode("utf-8")
+            page = pages[(channel, before)] = {
+                "body": body,
+                "gzip": gzip.compress(body),
+                "etag": f'"{hashlib.md5(body).hexdigest()}"',
+            }
+
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if behaviour.etag:
+            headers["ETag"] = page["etag"]
+            if request.headers.get("If-None-Match") == page["etag"]:
+                status = 304
+                return web.Response(status=304, headers={"ETag": page["etag"]})
+        body = page["body"]
+        if behaviour.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = page["gzip"]
+            headers["Content-Encoding"] = "gzip"
+        stats.bytes_sent += len(body)
+
+        if rng.random() >= behaviour.slow_rate:
+            return web.Response(body=body, headers=headers)
+
+        # Медленное тело: заголовки сразу, содержимое кусками с паузами
+        response = web.StreamResponse(headers=headers)
+        response.content_length = len(body)
+        await response.prepare(request)
+        step = max(1, len(body) // behaviour.slow_chunks)
+        for start in range(0, len(body), step):
+            await response.write(body[start:start + step])
+            await asyncio.sleep(behaviour.slow_chunk_delay_ms / 1000)
+        await response.write_eof()
+        return response
+    finally:
+        stats.in_flight -= 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app[STATS_KEY].to_dict())
+
+
+def create_app(behaviour: Behaviour = None) -> web.Application:
+    behaviour = behaviour or Behaviour()
+    app = web.Application()
+    app[BEHAVIOUR_KEY] = behaviour
+    app[STATS_KEY] = Stats()
+    app[PAGES_KEY] = {}
+    app[RNG_KEY] = random.Random(behaviour.seed)
+    app.router.add_get("/s/{channel}", handle_channel)
+    app.router.add_get("/stats", handle_stats)
+    return app
+
+
+async def start_server(behaviour: Behaviour = None, host: str = "127.0.0.1", port: int = 0):
+    """Запуск в текущем event loop; возвращает (runner, app, base_url вида http://host:port/s)"""
+    app = create_app(behaviour)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = runner.addresses[0][1]
+    return runner, app, f"http://{host}:{actual_port}/s"
+
+
+def add_behaviour_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=5)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-chunk-delay-ms", type=float, default=200)
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--last-id", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compress", action="store_true", help="не сжимать ответы")
+    parser.add_argument("--no-etag", action="store_true", help="без ETag и ответов 304")
+
+
+def behaviour_from_args(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        slow_rate=args.slow_rate,
+        slow_chunk_delay_ms=args.slow_chunk_delay_ms,
+        posts=args.posts,
+        last_id=args.last_id,
+        seed=args.seed,
+        compress=not args.no_compress,
+        etag=not args.no_etag,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    print(f"Fake t.me on http://{args.host}:{args.port}/s/<channel>")
+    web.run_app(create_app(behaviour_from_args(args)), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
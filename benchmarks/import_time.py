@@ -0,0 +1,112 @@
+"""
+Замер времени импорта (холодный старт) для точек входа.
+
+Каждая цель импортируется в отдельном интерпретаторе с `-X importtime`,
+вывод сводится в таблицу по модулям верхнего уровня.
+
+Примеры:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py api.cron --top 15
+    python benchmarks/import_time.py api.cron --budget-ms 400   # exit 1 при превышении
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ["api.cron", "api.webhook"]
+
+
+def measure(target: str) -> List[Dict]:
+    """Импорт модуля в чистом интерпретаторе, разбор вывода -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": depth,
+        })
+    return rows
+
+
+def summarize(target: str, rows: List[Dict], top: int) -> Dict:
+    # -X importtime печатает модули в post-order: прямые импорты цели
+    # (depth 1) идут подряд перед строкой самой цели (depth 0)
+    end = max(i for i, r in enumerate(rows) if r["depth"] == 0 and r["module"] == target)
+    start = end
+    while start > 0 and rows[start - 1]["depth"] > 0:
+        start -= 1
+    subtree = rows[start:end + 1]
+    direct = [r for r in subtree if r["depth"] == 1]
+    return {
+        "target": target,
+        "total_ms": round(rows[end]["cumulative_ms"], 1),
+        "direct_imports": [
+            {"module": r["module"], "cumulative_ms": round(r["cumulative_ms"], 1)}
+            for r in sorted(direct, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+        ],
+        "top_self": [
+            {"module": r["module"], "self_ms": round(r["self_ms"], 1)}
+            for r in sorted(subtree, key=lambda r: r["self_ms"], reverse=True)[:top]
+        ],
+    }
+
+
+def print_summary(summary: Dict):
+    print(f"\n== {summary['target']}: {summary['total_ms']:.1f} ms ==")
+    print(f"{'cumulative, ms':>15}  module")
+    for row in summary["direct_imports"]:
+        print(f"{row['cumulative_ms']:>15.1f}  {row['module']}")
+    print(f"{'self, ms':>15}  module")
+    for row in summary["top_self"]:
+        print(f"{row['self_ms']:>15.1f}  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=10, help="сколько модулей показывать")
+    parser.add_argument("--runs", type=int, default=3, help="повторов, берётся минимум")
+    parser.add_argument("--budget-ms", type=float, help="порог суммарного времени импорта")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    summaries = []
+    for target in args.targets:
+        runs = [summarize(target, measure(target), args.top) for _ in range(args.runs)]
+        summaries.append(min(runs, key=lambda s: s["total_ms"]))
+
+    if args.json:
+        print(json.dumps(summaries, ensure_ascii=False, indent=2))
+    else:
+        for summary in summaries:
+            print_summary(summary)
+
+    if args.budget_ms is not None:
+        over = [s for s in summaries if s["total_ms"] > args.budget_ms]
+        for s in over:
+            print(f"REGRESSION: {s['target']} imports in {s['total_ms']:.1f} ms > {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Нагрузочный тест обхода каналов против локальной замены t.me.
+
+Поднимает benchmarks/fake_tme.py в том же процессе, направляет на него
+TelegramParser.parse_all_channels (или crawl_channels из api/cron.py)
+с сотнями/тысячами фиктивных каналов и печатает время, достигнутую
+конкурентность, статусы ответов, байты по сети и память. С --passes N
+проходы повторяются на том же движке загрузки (src/fetch.py): со второго
+прохода неизменные страницы приходят как 304 без тела.
+
+Примеры:
+    python benchmarks/load_crawl.py --channels 500 --latency-ms 100
+    python benchmarks/load_crawl.py --channels 2000 --batch-size 50 --batch-pause 0 \\
+        --error-rate 0.02 --rate-429 0.02 --slow-rate 0.05
+    python benchmarks/load_crawl.py --target cron --channels 300
+    python benchmarks/load_crawl.py --channels 200 --batch-pause 0 --passes 3 --no-etag
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_tme import STATS_KEY, add_behaviour_args, behaviour_from_args, start_server  # noqa: E402
+
+
+async def run_parser(base_url: str, channels, args) -> list:
+    from src.parser import TelegramParser
+
+    parser = TelegramParser(web_base=base_url, batch_size=args.batch_size, batch_pause=args.batch_pause)
+    urls = [f"https://t.me/{name}" for name in channels]
+    found = []
+    try:
+        for _ in range(args.passes):
+            found.append(len(await parser.parse_all_channels(urls)))
+            # Как run_crawl после сохранения: следующий проход — условными запросами
+            parser.commit_validators()
+        return found
+    finally:
+        await parser.close()
+
+
+async def run_cron(base_url: str, channels, args) -> list:
+    import api.cron as cron
+    from src.fetch import shared_engine
+
+    # cron берёт базовый URL из src.config при импорте
+    cron.TELEGRAM_WEB_BASE = base_url
+    try:
+        return [len((await cron.crawl_channels(channels))[0]) for _ in range(args.passes)]
+    finally:
+        await shared_engine.close()
+
+
+async def main_async(args) -> dict:
+    runner, app, base_url = await start_server(behaviour_from_args(args))
+    channels = [f"load_channel_{i}" for i in range(args.channels)]
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    try:
+        runner_fn = run_parser if args.target == "parser" else run_cron
+        jobs = await runner_fn(base_url, channels, args)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats = app[STATS_KEY].to_dict()
+        await runner.cleanup()
+
+    result = {
+        "target": args.target,
+        "channels": args.channels,
+        "wall_s": round(elapsed, 3),
+        "channels_per_s": round(args.channels * args.passes / elapsed, 1),
+        "jobs": jobs,
+        "max_concurrency": stats["max_in_flight"],
+        "requests": stats["requests"],
+        "statuses": stats["statuses"],
+        "mb_served": round(stats["bytes_sent"] / 1e6, 2),
+        "passes": args.passes,
+        # ru_maxrss в КБ на Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+    }
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["tracemalloc_peak_mb"] = round(peak / 1e6, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["parser", "cron"], default="parser")
+    parser.add_argument("--channels", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5, help="только для --target parser")
+    parser.add_argument("--batch-pause", type=float, default=1.0, help="только для --target parser")
+    parser.add_argument("--passes", type=int, default=1, help="проходов на одном движке загрузки")
+    parser.add_argument("--tracemalloc", action="store_true", help="пик памяти Python-объектов (медленнее)")
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Замена Database в памяти для бенчмарков без Postgres.
+
+Реализует методы, которые вызывают обработчики команд бота, и имитирует
+пул соединений: каждый запрос занимает «соединение» на latency_ms,
+одновременно занято не больше pool_size. Счётчики позволяют сравнить
+нагрузку на БД с реальным asyncpg-пулом.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+
+class MemoryDatabase:
+    def __init__(self, jobs: Optional[List[Dict]] = None, latency_ms: float = 0.0, pool_size: int = 5):
+        now = datetime.utcnow()
+        self.jobs = jobs or []
+        for n, job in enumerate(self.jobs):
+            job.setdefault("sent", False)
+            job.setdefault("created_at", now - timedelta(minutes=n))
+        self.latency_ms = latency_ms
+        self.pool_size = pool_size
+        self._pool: Optional[asyncio.Semaphore] = None
+        self.queries = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def _acquire(self):
+        # Семафор создаётся в том loop, где выполняются запросы
+        if self._pool is None:
+            self._pool = asyncio.Semaphore(self.pool_size)
+        start = time.perf_counter()
+        async with self._pool:
+            self.wait_seconds += time.perf_counter() - start
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            try:
+                self.queries += 1
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000)
+                yield
+            finally:
+                self.in_use -= 1
+
+    async def init_tables(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def get_unsent_jobs(self, limit: int = 50, filters=None) -> List[Dict]:
+        async with self._acquire():
+            unsent = [job for job in self.jobs if not job["sent"] and (not filters or filters.matches(job))]
+            return sorted(unsent, key=lambda job: job.get("score", 0), reverse=True)[:limit]
+
+    async def mark_jobs_sent(self, job_ids: List[int]):
+        # Бенчмарку нужен одинаковый дайджест на каждый вызов — флаг не меняем
+        async with self._acquire():
+            pass
+
+    async def get_jobs_for_export(self, days: int = 7, filters=None) -> List[Dict]:
+        since = datetime.utcnow() - timedelta(days=days)
+        async with self._acquire():
+            return [
+                job for job in self.jobs
+                if job["created_at"] > since and (not filters or filters.matches(job))
+            ]
+
+    async def get_stats(self) -> Dict:
+        since = datetime.utcnow() - timedelta(hours=24)
+        async with self._acquire():
+            return {
+                "total": len(self.jobs),
+                "today": sum(1 for job in self.jobs if job["created_at"] > since),
+                "sent": sum(1 for job in self.jobs if job["sent"]),
+            }
+
+    def usage(self) -> Dict:
+        return {
+            "pool_size": self.pool_size,
+            "queries": self.queries,
+            "max_in_use": self.max_in_use,
+            "wait_s": round(self.wait_seconds, 3),
+        }
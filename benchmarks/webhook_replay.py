@@ -0,0 +1,274 @@
+"""
+Нагрузочный тест вебхука: повтор обновлений Telegram против api/webhook.py.
+
+Обработчик `handler` из api/webhook.py поднимается в ThreadingHTTPServer
+(как его вызывает среда выполнения — по потоку на запрос), Bot API
+заменён benchmarks/fake_bot_api.py. Обновления берутся из файла
+(JSON-список или JSON Lines с записанными Update) или генерируются из
+смеси команд. База — реальный Postgres (--database-url) или замена
+в памяти benchmarks/memory_db.py с задержкой запросов.
+
+Печатает время холодного старта (первое обновление), пропускную
+способность, p50/p90/p99 задержки (в целом и по командам), число вызовов
+Bot API и использование соединений БД.
+
+Примеры:
+    python benchmarks/webhook_replay.py --updates 500 --concurrency 16
+    python benchmarks/webhook_replay.py --mix stats=8,digest=1,export=1 --db-latency-ms 5
+    python benchmarks/webhook_replay.py --database-url postgresql://localhost/jobs --concurrency 32
+    python benchmarks/webhook_replay.py --file recorded_updates.jsonl --concurrency 8
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_bot_api import RECORDER_KEY, add_policy_args, policy_from_args, start_server  # noqa: E402
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'stats=8,digest cat:bots=1' -> {'stats': 8, 'digest cat:bots': 1}"""
+    mix = {}
+    for part in value.split(","):
+        command, _, weight = part.rpartition("=")
+        mix[command.strip().lstrip("/")] = int(weight or 1)
+    return mix
+
+
+def synthetic_updates(count: int, mix: Dict[str, int], admin_id: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    commands = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    updates = []
+    for n, command in enumerate(commands, 1):
+        text = f"/{command}"
+        updates.append({
+            "update_id": n,
+            "message": {
+                "message_id": n,
+                "date": int(time.time()),
+                "chat": {"id": admin_id, "type": "private"},
+                "from": {"id": admin_id, "is_bot": False, "first_name": "Admin"},
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}],
+            },
+        })
+    return updates
+
+
+def load_updates(path: str, count: int) -> List[Dict]:
+    """Записанные обновления; при нехватке повторяются по кругу"""
+    with open(path, encoding="utf-8") as f:
+        raw = f.read().strip()
+    if raw.startswith("["):
+        updates = json.loads(raw)
+    else:
+        updates = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    if not updates:
+        raise SystemExit(f"{path}: no updates")
+    return [updates[i % len(updates)] for i in range(count or len(updates))]
+
+
+def command_of(update: Dict) -> str:
+    text = (update.get("message") or {}).get("text") or ""
+    return text.split()[0] if text.startswith("/") else "other"
+
+
+def start_background_loop() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="fake-bot-api", daemon=True).start()
+    return loop
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def latency_summary(values: List[float]) -> Dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(values, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def post(url: str, update: Dict) -> Tuple[str, float, int]:
+    body = json.dumps(update).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as resp:
+        resp.read()
+        status = resp.status
+    return command_of(update), time.perf_counter() - start, status
+
+
+class PoolSampler:
+    """Периодический опрос asyncpg-пула в loop вебхука"""
+
+    def __init__(self, database, interval: float = 0.005):
+        self.database = database
+        self.interval = interval
+        self.max_size = 0
+        self.max_in_use = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            pool = self.database.pool
+            if pool is not None:
+                size = pool.get_size()
+                self.max_size = max(self.max_size, size)
+                self.max_in_use = max(self.max_in_use, size - pool.get_idle_size())
+            await asyncio.sleep(self.interval)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        async def create():
+            self._task = asyncio.create_task(self._run())
+        asyncio.run_coroutine_threadsafe(create(), loop).result()
+
+    def stop(self, loop: asyncio.AbstractEventLoop):
+        if self._task:
+            loop.call_soon_threadsafe(self._task.cancel)
+
+    def usage(self) -> Dict:
+        return {
+            "pool_max_size": self.database.pool.get_max_size() if self.database.pool else None,
+            "pool_size_peak": self.max_size,
+            "max_in_use": self.max_in_use,
+        }
+
+
+def run(args) -> Dict:
+    # Конфигурация читается при импорте: окружение готовим до import api.webhook
+    api_loop = start_background_loop()
+    api_runner, api_app, api_base = asyncio.run_coroutine_threadsafe(
+        start_server(policy_from_args(args)), api_loop
+    ).result()
+    os.environ["TELEGRAM_API_BASE"] = api_base
+    os.environ.setdefault("BOT_TOKEN", "123456:bench-token")
+    os.environ["DATABASE_URL"] = args.database_url or ""
+
+    import api.webhook as webhook
+    from src.bot import set_database
+    from src.config import ADMIN_ID
+
+    if args.database_url:
+        database_usage = None
+    else:
+        from bench_delivery import build_jobs
+        from memory_db import MemoryDatabase
+
+        webhook.db = MemoryDatabase(build_jobs(args.jobs, args.seed), args.db_latency_ms, args.db_pool_size)
+        set_database(webhook.db)
+        database_usage = webhook.db.usage
+
+    if args.file:
+        updates = load_updates(args.file, args.updates)
+    else:
+        updates = synthetic_updates(args.updates, parse_mix(args.mix), ADMIN_ID, args.seed)
+
+    class Handler(webhook.handler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="webhook-http", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/webhook"
+
+    # Первое обновление — холодный старт: бот, диспетчер, пул БД
+    _, cold, _ = post(url, updates[0])
+    sampler = None
+    if args.database_url:
+        sampler = PoolSampler(webhook.db)
+        sampler.start(webhook.get_loop())
+        database_usage = sampler.usage
+    calls_after_cold = api_app[RECORDER_KEY].summary()["calls"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda update: post(url, update), updates[1:]))
+    elapsed = time.perf_counter() - start
+
+    if sampler:
+        sampler.stop(webhook.get_loop())
+    server.shutdown()
+    summary = api_app[RECORDER_KEY].summary()
+    asyncio.run_coroutine_threadsafe(api_runner.cleanup(), api_loop).result()
+
+    by_command: Dict[str, List[float]] = {}
+    for command, seconds, _ in results:
+        by_command.setdefault(command, []).append(seconds)
+    latencies = [seconds for _, seconds, _ in results]
+    warm_updates = len(results)
+
+    report = {
+        "updates": len(updates),
+        "concurrency": args.concurrency,
+        "database": "postgres" if args.database_url else "memory",
+        "cold_start_ms": round(cold * 1000, 2),
+        "wall_s": round(elapsed, 3),
+        "updates_per_s": round(warm_updates / elapsed, 1) if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "by_command": {command: latency_summary(values) for command, values in sorted(by_command.items())},
+        "http_errors": sum(1 for _, _, status in results if status != 200),
+        "bot_api_calls": summary["calls"],
+        "bot_api_calls_per_update": round((summary["calls"] - calls_after_cold) / warm_updates, 2)
+        if warm_updates else 0.0,
+        "bot_api_429": summary["throttled"],
+        "db": database_usage(),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=200, help="сколько обновлений отправить")
+    parser.add_argument("--concurrency", type=int, default=8, help="одновременных запросов")
+    parser.add_argument("--mix", default="stats=6,digest=2,export=2", help="смесь команд с весами")
+    parser.add_argument("--file", help="записанные Update (JSON-список или JSON Lines)")
+    parser.add_argument("--database-url", help="реальный Postgres вместо замены в памяти")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="задержка запроса замены БД")
+    parser.add_argument("--db-pool-size", type=int, default=5, help="размер пула замены БД")
+    parser.add_argument("--jobs", type=int, default=40, help="вакансий в замене БД")
+    add_policy_args(parser)
+    parser.add_argument("--verbose", action="store_true", help="не глушить отладочный вывод вебхука")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    if args.verbose:
+        report = run(args)
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report = run(args)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    for key, value in report.items():
+        if key == "by_command":
+            for command, stats in value.items():
+                print(f"  {command:<20}{stats}")
+            continue
+        print(f"{key:<26}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import os
 import sys
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token (проверяется src/server.py)
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 
 
 async def set_webhook(vercel_url: str):
@@ -18,9 +20,12 @@ async def set_webhook(vercel_url: str):
         raise RuntimeError("Переменная окружения BOT_TOKEN не задана")
     webhook_url = f"{vercel_url}/api/webhook"
     api_url = f"https://api.telegram.org/bot{BOT_TOKEN}/setWebhook"
+    payload = {"url": webhook_url}
+    if WEBHOOK_SECRET:
+        payload["secret_token"] = WEBHOOK_SECRET
     
     async with aiohttp.ClientSession() as session:
-        async with session.post(api_url, json={"url": webhook_url}) as resp:
+        async with session.post(api_url, json=payload) as resp:
             result = await resp.json()
             print(f"Set webhook result: {result}")
             return result
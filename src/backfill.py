@@ -0,0 +1,233 @@
+"""
+Загрузка истории каналов через пагинацию t.me/s/<channel>?before=<id>.
+
+Обычный проход видит только последнюю страницу канала (~20 постов), так
+что история нового канала и всплески между проходами теряются. Backfill
+идёт по страницам вглубь до даты (--since) или id (--min-id), каналы
+обрабатываются параллельно, общий темп запросов ограничен (--rate,
+--concurrency). Прогресс сохраняется в crawl_checkpoints после каждой
+страницы: прерванный запуск продолжается с того же места, посты, вышедшие
+после прошлого запуска, догружаются сверху. Вакансии
+проходят тот же путь, что и при обычном парсинге: фильтр → дедупликация
+→ пакетная вставка db.add_jobs.
+
+Примеры:
+    python -m src.backfill --since 2026-01-01
+    python -m src.backfill --channel https://t.me/devjobs --max-pages 50 --rate 1
+    python -m src.backfill --channel devjobs --reset --min-id 1000
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from src.config import CHANNELS, DATABASE_URL
+from src.database import Database
+from src.filters import filter_registry
+from src.metrics import metrics
+from src.parser import TelegramParser
+from src.pipeline import dedup_jobs
+from src.ratelimit import RateLimiter
+from src.scoring import YIELD_DAYS, channel_yields, score_jobs
+
+
+def posted_since(message: Dict, since: Optional[datetime]) -> bool:
+    """Пост не старше since; посты без даты не отбрасываются"""
+    if not since or not message.get("posted_at"):
+        return True
+    moment = datetime.fromisoformat(message["posted_at"])
+    if not moment.tzinfo:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment >= since
+
+
+def bound_reached(checkpoint: Optional[Dict], since: Optional[datetime], min_id: int) -> bool:
+    """История уже загружена до начала канала или до запрошенной границы"""
+    if not checkpoint:
+        return False
+    if checkpoint["complete"]:
+        return True
+    if min_id and checkpoint["oldest_id"] is not None and checkpoint["oldest_id"] <= min_id:
+        return True
+    return bool(since and checkpoint.get("since_bound") and checkpoint["since_bound"] <= since)
+
+
+async def backfill_channel(parser: TelegramParser, db: Database, channel: str,
+                           limiter: RateLimiter, existing_hashes: Set[str],
+                           existing_texts: List[str], since: Optional[datetime] = None,
+                           min_id: int = 0, max_pages: int = 20,
+                           mark_sent: bool = True,
+                           yields: Optional[Dict[str, float]] = None) -> Dict:
+    """Загрузка истории одного канала: сначала пропуск выше сохранённого
+    newest_id (посты, вышедшие после прошлого запуска), затем вглубь от
+    oldest_id до начала канала, --since или --min-id
+    """
+    checkpoint = await db.get_checkpoint(channel)
+    stats = {"channel": channel, "pages": 0, "messages": 0, "passed_filter": 0, "new": 0, "status": "bound"}
+
+    async def load(before: Optional[int]):
+        async with limiter:
+            # 304 здесь означал бы пропуск страницы — история грузится целиком
+            html = await parser.fetch_page(channel, before, conditional=False)
+        if html is None:
+            # Ошибка загрузки: прогресс сохранён, следующий запуск продолжит
+            stats["status"] = "error"
+        return html
+
+    async def ingest(messages: List[Dict]):
+        jobs = parser.select_jobs(messages)
+        candidates = dedup_jobs(parser, jobs, existing_hashes, existing_texts)
+        new_jobs = await db.add_jobs(score_jobs(candidates, yields or {}))
+        if mark_sent and new_jobs:
+            # История не должна приходить администратору дайджестом
+            await db.mark_jobs_sent([j["id"] for j in new_jobs])
+        stats["pages"] += 1
+        stats["messages"] += len(messages)
+        stats["passed_filter"] += len(jobs)
+        stats["new"] += len(new_jobs)
+        metrics.inc("backfill_pages_total")
+        metrics.inc("jobs_new_total", len(new_jobs))
+
+    # Вперёд: от последнего поста вниз до сохранённого newest_id. newest_id
+    # сдвигается только когда пропуск закрыт целиком — иначе в диапазоне
+    # [oldest_id, newest_id] осталась бы дыра; позиция незакрытого пропуска
+    # (gap_top, gap_before) сохраняется, и следующий запуск продолжает с неё
+    head = checkpoint["newest_id"] if checkpoint else None
+    if head:
+        top, before = checkpoint.get("gap_top"), checkpoint.get("gap_before")
+        while True:
+            if stats["pages"] >= max_pages:
+                stats["status"] = "max_pages"
+                print(f"[BACKFILL] {channel}: {stats}")
+                return stats
+            html = await load(before)
+            if html is None:
+                print(f"[BACKFILL] {channel}: {stats}")
+                return stats
+            oldest_id, newest_id, _ = parser.page_bounds(html)
+            if oldest_id is None or (before and oldest_id >= before):
+                break
+            top = top or newest_id
+            await ingest([m for m in parser.parse_html(html, channel) if m["message_id"] > head])
+            if oldest_id <= head + 1:
+                break
+            before = oldest_id
+            await db.save_gap(channel, top, before)
+        if top:
+            await db.save_checkpoint(channel, None, top)
+            await db.save_gap(channel, None, None)
+
+    # Вглубь: complete — дошли до начала канала, since_bound/oldest_id —
+    # до границы прошлого запуска; более глубокая граница продолжает загрузку
+    if bound_reached(checkpoint, since, min_id):
+        stats["status"] = "complete" if checkpoint["complete"] else "bound"
+        print(f"[BACKFILL] {channel}: {stats}")
+        return stats
+
+    before = checkpoint["oldest_id"] if checkpoint else None
+    while stats["pages"] < max_pages:
+        html = await load(before)
+        if html is None:
+            break
+
+        oldest_id, newest_id, oldest_date = parser.page_bounds(html)
+        if oldest_id is None or (before and oldest_id >= before):
+            await db.save_checkpoint(channel, before, before, complete=True)
+            stats["status"] = "complete"
+            break
+
+        messages = [
+            m for m in parser.parse_html(html, channel)
+            if m["message_id"] >= min_id and posted_since(m, since)
+        ]
+        await ingest(messages)
+
+        if oldest_id <= max(min_id, 1):
+            # Всё с id >= min_id загружено; id 1 — начало канала
+            await db.save_checkpoint(channel, max(oldest_id, min_id), newest_id, complete=oldest_id <= 1)
+            stats["status"] = "complete" if oldest_id <= 1 else "bound"
+            break
+        if since and oldest_date and oldest_date < since:
+            # Страница перешла границу: загружено всё не старше since
+            lowest = min((m["message_id"] for m in messages), default=before)
+            await db.save_checkpoint(channel, lowest, newest_id, since_bound=since)
+            break
+        await db.save_checkpoint(channel, oldest_id, newest_id)
+        before = oldest_id
+    else:
+        stats["status"] = "max_pages"
+
+    print(f"[BACKFILL] {channel}: {stats}")
+    return stats
+
+
+async def backfill(parser: TelegramParser, db: Database, channels: List[str],
+                   since: Optional[datetime] = None, min_id: int = 0, max_pages: int = 20,
+                   rate: float = 2.0, concurrency: int = 4, reset: bool = False,
+                   mark_sent: bool = True) -> List[Dict]:
+    """Загрузка истории нескольких каналов параллельно под общим ограничением темпа"""
+    names = [parser.extract_channel_name(url) for url in channels]
+    if reset:
+        for name in names:
+            await db.reset_checkpoint(name)
+
+    await filter_registry.refresh(db)
+    existing_jobs = await db.get_similar_jobs(hours=48)
+    existing_hashes = {j["text_hash"] for j in existing_jobs}
+    existing_texts = [j["text"] for j in existing_jobs]
+    # Урожайность каналов для оценки — один раз на запуск, а не на страницу
+    yields = channel_yields(await db.get_channel_counts(days=YIELD_DAYS))
+
+    limiter = RateLimiter(rate, concurrency)
+    return await asyncio.gather(*[
+        backfill_channel(
+            parser, db, name, limiter, existing_hashes, existing_texts,
+            since=since, min_id=min_id, max_pages=max_pages, mark_sent=mark_sent,
+            yields=yields,
+        )
+        for name in names
+    ])
+
+
+def parse_since(value: str) -> datetime:
+    since = datetime.fromisoformat(value)
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+async def main_async(args) -> List[Dict]:
+    if not DATABASE_URL:
+        raise SystemExit("Переменная окружения DATABASE_URL не задана")
+    db = Database(DATABASE_URL)
+    parser = TelegramParser()
+    try:
+        await db.init_tables()
+        return await backfill(
+            parser, db, args.channel or CHANNELS,
+            since=args.since, min_id=args.min_id, max_pages=args.max_pages,
+            rate=args.rate, concurrency=args.concurrency, reset=args.reset,
+            mark_sent=not args.notify,
+        )
+    finally:
+        await parser.close()
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channel", action="append", help="канал (имя или https://t.me/...), по умолчанию все CHANNELS")
+    parser.add_argument("--since", type=parse_since, help="не глубже этой даты (ISO)")
+    parser.add_argument("--min-id", type=int, default=0, help="не глубже этого id поста")
+    parser.add_argument("--max-pages", type=int, default=20, help="страниц на канал за запуск")
+    parser.add_argument("--rate", type=float, default=2.0, help="запросов в секунду всего")
+    parser.add_argument("--concurrency", type=int, default=4, help="одновременных запросов")
+    parser.add_argument("--reset", action="store_true", help="начать заново, забыв сохранённый прогресс")
+    parser.add_argument("--notify", action="store_true", help="не помечать историю отправленной (попадёт в /digest)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    total = {key: sum(r[key] for r in results) for key in ("pages", "messages", "passed_filter", "new")}
+    print(f"[BACKFILL] Done: {len(results)} channels, {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,33 @@
 Telegram бот для отправки вакансий
 """
 from aiogram import Bot, Dispatcher, Router, F
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.filters import Command
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import csv
+import html
 import io
+import shlex
 from datetime import datetime
 
-from src.config import BOT_TOKEN, ADMIN_ID, KEYWORDS
+from src.config import BOT_TOKEN, ADMIN_ID, TELEGRAM_API_BASE
 from src.database import Database
+from src.extract import FILTER_HELP, parse_filters
+from src.filters import FILTER_EDIT_HELP, describe_config, edit_config, filter_registry
+from src.metrics import metrics
+from src.profiling import request_profile
+from src.subscriptions import (
+    SUBSCRIBE_HELP, SendFunc, describe_subscription, parse_subscription,
+)
 
 
 router = Router()
 db: Database = None
+# Внеочередной запуск фонового парсинга (есть только в src/main.py)
+crawl_trigger: Optional[Callable[[], bool]] = None
 
 
 def set_database(database: Database):
@@ -23,6 +36,11 @@ def set_database(database: Database):
     db = database
 
 
+def set_crawl_trigger(trigger: Callable[[], bool]):
+    global crawl_trigger
+    crawl_trigger = trigger
+
+
 def format_job(job: Dict) -> str:
     """Форматирование вакансии для отправки"""
     keywords_str = ", ".join(job.get("keywords", []))
@@ -32,14 +50,35 @@ def format_job(job: Dict) -> str:
     if len(text) > 800:
         text = text[:800] + "..."
     
+    details = format_details(job)
+    details_line = f"{details}\n" if details else ""
+    
     return (
         f"📌 <b>Новая вакансия</b>\n\n"
-        f"{text}\n\n"
+        f"{html.escape(text)}\n\n"
         f"🏷 <i>{keywords_str}</i>\n"
+        f"{details_line}"
         f"📢 <a href=\"{job['url']}\">Источник</a>"
     )
 
 
+def format_details(job: Dict) -> str:
+    """Строка с извлечёнными полями: бюджет, формат, стек"""
+    parts = []
+    if job.get("budget_amount"):
+        parts.append(f"💰 {job['budget_amount']:,} {job['budget_currency']}".replace(",", " "))
+    if job.get("work_format"):
+        parts.append(f"🏠 {job['work_format']}")
+    if job.get("tech"):
+        parts.append(f"🛠 {', '.join(job['tech'])}")
+    return " · ".join(parts)
+
+
+def command_filters(message: Message):
+    """Фильтры и оставшийся текст из аргументов команды"""
+    return parse_filters((message.text or "").partition(" ")[2], filter_registry.categories())
+
+
 def format_digest(jobs: List[Dict]) -> str:
     """Форматирование дайджеста"""
     if not jobs:
@@ -56,7 +95,14 @@ def format_digest(jobs: List[Dict]) -> str:
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     if message.from_user.id != ADMIN_ID:
-        await message.answer("⛔ Бот доступен только администратору")
+        await message.answer(
+            "👋 <b>Job Monitor Bot</b>\n\n"
+            "Присылаю новые IT-вакансии из Telegram-каналов по вашей подписке.\n\n"
+            f"{SUBSCRIBE_HELP}\n\n"
+            "/subscribe - Текущая подписка\n"
+            "/unsubscribe - Отписаться",
+            parse_mode="HTML"
+        )
         return
     
     await message.answer(
@@ -66,9 +112,15 @@ async def cmd_start(message: Message):
         "/digest - Получить текущий дайджест\n"
         "/stats - Статистика\n"
         "/export - Экспорт в CSV\n"
+        "/search - Поиск по вакансиям\n"
         "/channels - Список каналов\n"
         "/keywords - Ключевые слова\n"
-        "/help - Помощь",
+        "/filter - Правила фильтрации\n"
+        "/subscribe - Подписка на вакансии\n"
+        "/metrics - Метрики парсинга\n"
+        "/profile - Профилировать проход парсинга\n"
+        "/help - Помощь\n\n"
+        f"🎛 <b>Фильтры</b> для /digest, /export и /search: {html.escape(FILTER_HELP)}",
         parse_mode="HTML"
     )
 
@@ -124,10 +176,14 @@ async def cmd_digest(message: Message):
         await message.answer("❌ База данных не подключена")
         return
     
-    jobs = await db.get_unsent_jobs(limit=20)
+    filters, _ = command_filters(message)
+    jobs = await db.get_unsent_jobs(limit=20, filters=filters)
     
     if not jobs:
-        await message.answer("📭 Новых вакансий пока нет")
+        if filters:
+            await message.answer(f"📭 Новых вакансий по фильтру ({filters.describe()}) нет")
+        else:
+            await message.answer("📭 Новых вакансий пока нет")
         return
     
     await message.answer(format_digest(jobs), parse_mode="HTML")
@@ -155,7 +211,8 @@ async def cmd_export(message: Message):
         await message.answer("❌ База данных не подключена")
         return
     
-    jobs = await db.get_jobs_for_export(days=7)
+    filters, _ = command_filters(message)
+    jobs = await db.get_jobs_for_export(days=7, filters=filters)
     
     if not jobs:
         await message.answer("📭 Нет вакансий для экспорта")
@@ -164,7 +221,7 @@ async def cmd_export(message: Message):
     # Создаём CSV
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(["ID", "Канал", "Текст", "URL", "Категории", "Дата"])
+    writer.writerow(["ID", "Канал", "Текст", "URL", "Категории", "Бюджет", "Валюта", "Формат", "Стек", "Дата"])
     
     for job in jobs:
         writer.writerow([
@@ -173,6 +230,10 @@ async def cmd_export(message: Message):
             job["text"][:500],
             job["url"],
             ", ".join(job.get("keywords", [])),
+            job.get("budget_amount") or "",
+            job.get("budget_currency") or "",
+            job.get("work_format") or "",
+            ", ".join(job.get("tech") or []),
             job["created_at"].strftime("%d.%m.%Y %H:%M")
         ])
     
@@ -209,37 +270,298 @@ async def cmd_keywords(message: Message):
     if message.from_user.id != ADMIN_ID:
         return
     
+    if db:
+        await filter_registry.refresh(db)
     text = "🔑 <b>Ключевые слова</b>\n\n"
     
-    for category, words in KEYWORDS.items():
+    for category, words in filter_registry.get("jobs").config.keywords.items():
         text += f"<b>{category}:</b> {', '.join(words[:10])}...\n\n"
     
     await message.answer(text, parse_mode="HTML")
 
 
+@router.message(Command("filter"))
+async def cmd_filter(message: Message):
+    if message.from_user.id != ADMIN_ID:
+        return
+    
+    if not db:
+        await message.answer("❌ База данных не подключена")
+        return
+    
+    await filter_registry.refresh(db)
+    try:
+        args = shlex.split((message.text or "").partition(" ")[2])
+    except ValueError:
+        args = (message.text or "").split()[1:]
+    
+    if not args:
+        lines = [
+            f"• <b>{name}</b> — версия {filter_registry.get(name).version or 'по умолчанию'}"
+            for name in filter_registry.names()
+        ]
+        await message.answer(
+            "🎛 <b>Профили фильтрации</b>\n\n" + "\n".join(lines) + f"\n\n{FILTER_EDIT_HELP}",
+            parse_mode="HTML"
+        )
+        return
+    
+    name = args[0].lower()
+    if name not in filter_registry.names():
+        await message.answer(f"❌ Нет профиля {name}. Доступны: {', '.join(filter_registry.names())}")
+        return
+    compiled = filter_registry.get(name)
+    
+    if len(args) == 1:
+        text = describe_config(compiled.config)
+        if len(text) > 3500:
+            file = BufferedInputFile(text.encode("utf-8"), filename=f"filter_{name}.txt")
+            await message.answer_document(file, caption=f"🎛 Профиль {name}, версия {compiled.version}")
+            return
+        await message.answer(
+            f"🎛 <b>{name}</b>, версия {compiled.version}\n\n<pre>{html.escape(text)}</pre>",
+            parse_mode="HTML"
+        )
+        return
+    
+    if args[1].lower() == "reset":
+        await db.delete_filter_config(name)
+        await filter_registry.refresh(db)
+        await message.answer(f"♻️ Профиль {name} возвращён к значениям по умолчанию")
+        return
+    
+    if len(args) < 4:
+        await message.answer(FILTER_EDIT_HELP, parse_mode="HTML")
+        return
+    
+    try:
+        config = edit_config(compiled.config, args[1].lower(), args[2].lower(), args[3:])
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        return
+    
+    version = await db.save_filter_config(name, config.to_dict(), compiled.version)
+    if version is None:
+        await message.answer("⚠️ Профиль только что изменили, повторите команду")
+        return
+    await filter_registry.refresh(db)
+    await message.answer(f"✅ Профиль {name} сохранён, версия {version}")
+
+
+@router.message(Command("metrics"))
+async def cmd_metrics(message: Message):
+    if message.from_user.id != ADMIN_ID:
+        return
+    
+    text = metrics.render_prometheus()
+    if not text.strip():
+        await message.answer("📈 Метрик пока нет")
+        return
+    
+    # Полный вывод может не влезть в сообщение — отправляем файлом
+    if len(text) > 3500:
+        file = BufferedInputFile(text.encode("utf-8"), filename="metrics.txt")
+        await message.answer_document(file, caption="📈 Метрики (Prometheus text format)")
+        return
+    
+    await message.answer(f"<pre>{html.escape(text)}</pre>", parse_mode="HTML")
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message):
+    if message.from_user.id != ADMIN_ID:
+        return
+    
+    if not crawl_trigger:
+        await message.answer(
+            "ℹ️ В этом режиме фоновый парсинг не запущен. "
+            "Для cron включите профилирование переменной PROFILE_CRAWL=1."
+        )
+        return
+    
+    request_profile()
+    if crawl_trigger():
+        await message.answer("🔬 Запущен проход парсинга с профилированием, сводка придёт по завершении")
+    else:
+        await message.answer("🔬 Проход парсинга уже идёт, профилирование включится на следующем")
+
+
+@router.message(Command("subscribe"))
+async def cmd_subscribe(message: Message):
+    if not db:
+        await message.answer("❌ База данных не подключена")
+        return
+    
+    args = (message.text or "").partition(" ")[2].strip()
+    if not args:
+        sub = await db.get_subscription(message.chat.id)
+        status = (
+            f"📬 <b>Ваша подписка</b>\n{describe_subscription(sub)}" if sub
+            else "📭 Подписки нет"
+        )
+        await message.answer(f"{status}\n\n{SUBSCRIBE_HELP}", parse_mode="HTML")
+        return
+    
+    try:
+        sub = parse_subscription(args, filter_registry.categories())
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        return
+    
+    await db.save_subscription(message.chat.id, **sub)
+    await message.answer(
+        f"✅ <b>Подписка сохранена</b>\n{describe_subscription(sub)}\n\n"
+        "Новые вакансии будут приходить после каждого прохода парсинга.",
+        parse_mode="HTML"
+    )
+
+
+@router.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: Message):
+    if not db:
+        await message.answer("❌ База данных не подключена")
+        return
+    
+    if await db.delete_subscription(message.chat.id):
+        await message.answer("👋 Подписка удалена")
+    else:
+        await message.answer("📭 Подписки нет")
+
+
+SEARCH_PAGE_SIZE = 5
+SEARCH_HEADER = "🔍 Поиск: "
+
+
+def format_search_page(query: str, jobs: List[Dict]) -> str:
+    """Страница результатов поиска (первая строка хранит запрос для кнопки «Дальше»)"""
+    lines = [f"<b>{SEARCH_HEADER}</b>{html.escape(query)}\n"]
+    for job in jobs:
+        text = job["text"]
+        if len(text) > 300:
+            text = text[:300] + "..."
+        details = format_details(job)
+        details_line = f"{details}\n" if details else ""
+        lines.append(
+            f"📌 <b>{html.escape(job['channel'])}</b> · {job['created_at'].strftime('%d.%m.%Y')}\n"
+            f"{html.escape(text)}\n"
+            f"{details_line}"
+            f"📢 <a href=\"{job['url']}\">Источник</a>\n"
+        )
+    return "\n".join(lines)
+
+
+def search_keyboard(jobs: List[Dict], has_more: bool):
+    """Кнопка следующей страницы: в callback_data — ключ (rank, id) последней вакансии"""
+    if not has_more:
+        return None
+    last = jobs[-1]
+    builder = InlineKeyboardBuilder()
+    builder.button(text="Дальше ▶", callback_data=f"search:{last['rank']!r}:{last['id']}")
+    return builder.as_markup()
+
+
+async def search_page(args: str, after=None):
+    """Текст и клавиатура страницы результатов (args — запрос вместе с фильтрами)"""
+    filters, query = parse_filters(args, filter_registry.categories())
+    if not query:
+        return None, None
+    jobs = await db.search_jobs(query, limit=SEARCH_PAGE_SIZE + 1, after=after, filters=filters)
+    has_more = len(jobs) > SEARCH_PAGE_SIZE
+    jobs = jobs[:SEARCH_PAGE_SIZE]
+    if not jobs:
+        return None, None
+    return format_search_page(args, jobs), search_keyboard(jobs, has_more)
+
+
+@router.message(Command("search"))
+async def cmd_search(message: Message):
+    if message.from_user.id != ADMIN_ID:
+        return
+    
+    if not db:
+        await message.answer("❌ База данных не подключена")
+        return
+    
+    query = (message.text or "").partition(" ")[2].strip()
+    if not parse_filters(query, filter_registry.categories())[1]:
+        await message.answer(
+            "🔍 Использование: /search &lt;запрос&gt; [фильтры]\n"
+            "Например: /search телеграм бот -wordpress format:remote\n"
+            f"Фильтры: {html.escape(FILTER_HELP)}",
+            parse_mode="HTML"
+        )
+        return
+    
+    with metrics.timer("search_seconds"):
+        text, keyboard = await search_page(query)
+    if not text:
+        await message.answer("📭 Ничего не найдено")
+        return
+    
+    await message.answer(text, parse_mode="HTML", reply_markup=keyboard, disable_web_page_preview=True)
+
+
+@router.callback_query(F.data.startswith("search:"))
+async def cb_search_next(callback: CallbackQuery):
+    if callback.from_user.id != ADMIN_ID or not db:
+        await callback.answer()
+        return
+    
+    # Запрос берём из первой строки сообщения — состояние между вызовами не нужно
+    first_line = (callback.message.text or "").split("\n", 1)[0]
+    query = first_line[len(SEARCH_HEADER):].strip() if first_line.startswith(SEARCH_HEADER) else ""
+    _, rank, job_id = callback.data.split(":")
+    if not query:
+        await callback.answer("Запрос не найден, повторите /search")
+        return
+    
+    with metrics.timer("search_seconds"):
+        text, keyboard = await search_page(query, after=(float(rank), int(job_id)))
+    if not text:
+        await callback.answer("Больше результатов нет")
+        return
+    
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard, disable_web_page_preview=True)
+    await callback.answer()
+
+
 async def send_digest_to_admin(bot: Bot, jobs: List[Dict]):
     """Отправка дайджеста администратору"""
     if not jobs:
         return
     
-    await bot.send_message(ADMIN_ID, format_digest(jobs), parse_mode="HTML")
-    
-    for job in jobs[:15]:
-        try:
-            await bot.send_message(ADMIN_ID, format_job(job), parse_mode="HTML")
-        except Exception as e:
-            print(f"Error sending job: {e}")
+    with metrics.stage("send"):
+        await bot.send_message(ADMIN_ID, format_digest(jobs), parse_mode="HTML")
+        metrics.inc("messages_sent_total")
+        
+        for job in jobs[:15]:
+            try:
+                await bot.send_message(ADMIN_ID, format_job(job), parse_mode="HTML")
+                metrics.inc("messages_sent_total")
+            except Exception as e:
+                metrics.inc("send_errors_total")
+                print(f"Error sending job: {e}")
+        
+        if len(jobs) > 15:
+            await bot.send_message(
+                ADMIN_ID, 
+                f"📌 Показано 15 из {len(jobs)} вакансий. /export для полного списка."
+            )
+            metrics.inc("messages_sent_total")
+
+
+def subscriber_sender(bot: Bot) -> SendFunc:
+    """Функция отправки для рассылки подписчикам (src/subscriptions.py)"""
+    async def send(chat_id: int, text: str):
+        await bot.send_message(chat_id, text, parse_mode="HTML", disable_web_page_preview=True)
     
-    if len(jobs) > 15:
-        await bot.send_message(
-            ADMIN_ID, 
-            f"📌 Показано 15 из {len(jobs)} вакансий. /export для полного списка."
-        )
+    return send
 
 
-def create_bot() -> tuple[Bot, Dispatcher]:
+def create_bot(api_base: str = TELEGRAM_API_BASE) -> tuple[Bot, Dispatcher]:
     """Создание бота и диспетчера"""
-    bot = Bot(token=BOT_TOKEN)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base))
+    bot = Bot(token=BOT_TOKEN, session=session)
     dp = Dispatcher()
     dp.include_router(router)
     return bot, dp
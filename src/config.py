@@ -10,9 +10,72 @@ load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 ADMIN_ID = int(os.getenv("ADMIN_ID", "5171260626"))
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Базовый URL Bot API (для тестов — локальная замена api.telegram.org)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+
+# Пул соединений с Postgres (src/database.py, POOL_SETTINGS): "session" —
+# долгоживущий процесс, "serverless" — Vercel и transaction pooler. На Vercel — serverless.
+DB_POOL_MODE = (os.getenv("DB_POOL_MODE") or ("serverless" if os.getenv("VERCEL") else "session")).lower()
+# Переопределения режима: максимум соединений (0 — по режиму) и простой
+# соединения до закрытия в секундах (пусто — по режиму)
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "0"))
+DB_IDLE_TIMEOUT = float(os.environ["DB_IDLE_TIMEOUT"]) if os.getenv("DB_IDLE_TIMEOUT") else None
 
 # Parsing settings
 PARSE_INTERVAL = int(os.getenv("PARSE_INTERVAL", "60"))
+# Базовый URL веб-интерфейса каналов (для тестов — локальная замена t.me)
+TELEGRAM_WEB_BASE = os.getenv("TELEGRAM_WEB_BASE", "https://t.me/s").rstrip("/")
+
+# Загрузка страниц (src/fetch.py): лимит тела ответа, соединений на движок,
+# время жизни кэша DNS и простоя keep-alive соединения, секунды
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+FETCH_CONNECTIONS = int(os.getenv("FETCH_CONNECTIONS", "20"))
+FETCH_DNS_TTL = int(os.getenv("FETCH_DNS_TTL", "300"))
+FETCH_KEEPALIVE = float(os.getenv("FETCH_KEEPALIVE", "30"))
+
+# Профили фильтрации (src/filters.py), которые проверяет фоновый парсинг
+# за один проход, через запятую: "jobs", "jobs,orders"
+FILTER_PROFILES = [name.strip() for name in os.getenv("FILTER_PROFILES", "jobs").split(",") if name.strip()]
+
+# Профилирование проходов парсинга (cProfile + tracemalloc), см. src/profiling.py
+PROFILE_CRAWL = os.getenv("PROFILE_CRAWL", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/jobbot-profiles")
+
+# Архив загруженных страниц t.me/s для офлайн-повтора (src/snapshots.py, src/replay.py):
+# "" — выключен, "disk" — каталог SNAPSHOT_DIR, "db" — таблицы в Postgres
+SNAPSHOT_STORE = os.getenv("SNAPSHOT_STORE", "").lower()
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_MAX_AGE_DAYS = int(os.getenv("SNAPSHOT_MAX_AGE_DAYS", "30"))
+SNAPSHOT_MAX_MB = int(os.getenv("SNAPSHOT_MAX_MB", "500"))
+
+# Секционирование и хранение jobs (src/retention.py). JOBS_RETENTION_MONTHS —
+# сколько полных месяцев хранить (0 — хранить всё); JOBS_RETENTION_MODE:
+# "drop" — удалить секцию, "detach" — отключить от jobs и оставить таблицей;
+# JOBS_ARCHIVE_DIR — каталог для выгрузки секции в .jsonl.gz перед этим ("" — без выгрузки)
+JOBS_RETENTION_MONTHS = int(os.getenv("JOBS_RETENTION_MONTHS", "0"))
+JOBS_RETENTION_MODE = os.getenv("JOBS_RETENTION_MODE", "drop").lower()
+JOBS_ARCHIVE_DIR = os.getenv("JOBS_ARCHIVE_DIR", "")
+
+# Оценка релевантности (src/scoring.py): период полураспада свежести, часы
+SCORE_HALF_LIFE_HOURS = float(os.getenv("SCORE_HALF_LIFE_HOURS", "24"))
+
+# Подписки (src/subscriptions.py): сколько чатов получают рассылку одновременно,
+# общий темп отправки (сообщений в секунду; Telegram допускает ~30) и сколько раз
+# повторять сообщение после 429
+SUBSCRIBER_SEND_CONCURRENCY = int(os.getenv("SUBSCRIBER_SEND_CONCURRENCY", "10"))
+SUBSCRIBER_SEND_RATE = float(os.getenv("SUBSCRIBER_SEND_RATE", "25"))
+SUBSCRIBER_SEND_RETRIES = int(os.getenv("SUBSCRIBER_SEND_RETRIES", "3"))
+
+# Self-hosted webhook server (src/server.py)
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/api/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+# Сколько обновлений обрабатывается одновременно
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "32"))
+# Токен GET /metrics (Authorization: Bearer); по умолчанию WEBHOOK_SECRET,
+# без обоих маршрут не регистрируется
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or WEBHOOK_SECRET
 
 # Список IT-каналов с вакансиями для парсинга
 CHANNELS = [
@@ -77,7 +140,8 @@ CHANNELS = [
     "https://t.me/remoteworkers",
 ]
 
-# Ключевые слова для фильтрации вакансий
+# Ключевые слова для фильтрации вакансий (значения по умолчанию профиля "jobs",
+# профили можно менять без деплоя командой /filter, см. src/filters.py)
 KEYWORDS = {
     "web": [
         "сайт", "веб", "web", "frontend", "фронтенд", "backend", "бэкенд", "бекенд",
@@ -113,5 +177,48 @@ STOP_WORDS = [
     "маркетолог", "marketing", "smm", "seo", "копирайт", "дизайнер ux/ui"
 ]
 
+# Признаки того, что сообщение — вакансия (нужен хотя бы один)
+JOB_INDICATORS = [
+    "ищем", "ищу", "требуется", "нужен", "вакансия", "работа",
+    "оплата", "бюджет", "зп", "зарплата", "оклад", "ставка",
+    "удалённо", "удаленно", "remote", "фриланс", "freelance",
+    "проект", "заказ", "задача", "тз", "разработка", "разработать",
+    "сделать", "создать", "написать", "нужно сделать"
+]
+
+# Профиль "orders" (api/cron.py): заказы и просьбы о помощи в чатах, а не вакансии
+ORDER_KEYWORDS = {
+    "web": ["сайт", "веб", "web", "лендинг", "landing", "верстка", "страниц", "wordpress", "интернет-магазин"],
+    "bots": ["бот", "bot", "телеграм", "telegram", "discord", "автоматизац", "парсер", "parser"],
+    "dev": ["скрипт", "программ", "приложени", "доработ", "исправ", "функци", "api", "интеграц"],
+}
+
+ORDER_STOP_WORDS = [
+    "менеджер", "manager", "hr", "recruiter", "продажи", "sales", "маркетолог",
+    # Игровая разработка - исключаем
+    "игр", "game", "gaming", "unity", "unreal", "godot", "gamedev", "геймдев",
+    "3d модел", "3d artist", "левел дизайн", "level design", "игровой движок",
+    # Исключаем вакансии (ищем заказы, а не работу в штат)
+    "вакансия", "vacancy", "в штат", "офис", "full-time", "трудоустройство"
+]
+
+# Индикаторы просьб о помощи/заказов
+ORDER_INDICATORS = [
+    # Просьбы
+    "помогите", "помоги", "нужна помощь", "кто может", "кто сможет", 
+    "кто возьмется", "кто возьмётся", "посоветуйте", "подскажите",
+    # Заказы
+    "нужен", "нужна", "нужно", "ищу", "ищем", "требуется",
+    "сделать", "сделайте", "создать", "разработать", "написать",
+    # Доработка
+    "доработать", "доработка", "исправить", "починить", "пофиксить",
+    "добавить функци", "изменить", "переделать", "улучшить",
+    # Оплата
+    "оплачу", "заплачу", "бюджет", "за вознаграждение", "платно", "$", "₽", "руб"
+]
+
 # Порог схожести для дедупликации (0.0 - 1.0)
 SIMILARITY_THRESHOLD = 0.7
+# С каким числом последних вакансий сравнивать текст по схожести (SequenceMatcher
+# попарный и дорогой — окно не должно расти вместе с таблицей)
+SIMILARITY_WINDOW = 50
@@ -1,102 +1,722 @@
 """
 Работа с базой данных Vercel Postgres
 """
+import asyncio
 import asyncpg
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import json
+import re
+
+from src.config import DB_IDLE_TIMEOUT, DB_POOL_MAX_SIZE, DB_POOL_MODE
+from src.extract import JobFilter
+from src.metrics import metrics
+from src.scoring import rescore_unsent_jobs
+
+
+# Ключ advisory-блокировки, под которой применяются миграции
+MIGRATION_LOCK_ID = 7_340_521
+
+# Ключ advisory-блокировки, под которой создаются секции jobs
+PARTITION_LOCK_ID = 7_340_522
+# Пауза перед повторной попыткой после ошибки создания секций
+PARTITION_RETRY = timedelta(minutes=10)
+
+# Миграции схемы: (версия, [SQL]). Только добавлять новые шаги в конец,
+# уже применённые шаги не менять.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id SERIAL PRIMARY KEY,
+            message_id BIGINT,
+            channel VARCHAR(255),
+            text TEXT,
+            text_hash VARCHAR(64),
+            url VARCHAR(500),
+            keywords TEXT[],
+            created_at TIMESTAMP DEFAULT NOW(),
+            sent BOOLEAN DEFAULT FALSE,
+            UNIQUE(channel, message_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sent_digests (
+            id SERIAL PRIMARY KEY,
+            job_ids INTEGER[],
+            sent_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_sent ON jobs(sent)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(text_hash)",
+    ]),
+    (2, [
+        # Архив страниц: тела по sha256 (сжатые gzip), загрузки ссылаются на них
+        """
+        CREATE TABLE IF NOT EXISTS page_blobs (
+            key CHAR(64) PRIMARY KEY,
+            body BYTEA NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS page_snapshots (
+            id BIGSERIAL PRIMARY KEY,
+            channel VARCHAR(255) NOT NULL,
+            blob_key CHAR(64) NOT NULL REFERENCES page_blobs(key) ON DELETE CASCADE,
+            fetched_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_page_snapshots_fetched ON page_snapshots(fetched_at)",
+        "CREATE INDEX IF NOT EXISTS idx_page_snapshots_blob ON page_snapshots(blob_key)",
+    ]),
+    (3, [
+        # Прогресс загрузки истории каналов (src/backfill.py)
+        """
+        CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+            channel VARCHAR(255) PRIMARY KEY,
+            oldest_id BIGINT,
+            newest_id BIGINT,
+            complete BOOLEAN DEFAULT FALSE,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+    ]),
+    (4, [
+        # Полнотекстовый поиск: русская морфология + simple для англ./тех. терминов
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', COALESCE(text, '')), 'A') ||
+            setweight(to_tsvector('simple', COALESCE(text, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search ON jobs USING GIN (search_vector)",
+    ]),
+    (5, [
+        # Поля, извлечённые при сохранении (src/extract.py), для фильтров по индексам
+        """
+        ALTER TABLE jobs
+            ADD COLUMN IF NOT EXISTS budget_amount INTEGER,
+            ADD COLUMN IF NOT EXISTS budget_currency CHAR(3),
+            ADD COLUMN IF NOT EXISTS tech TEXT[] DEFAULT '{}',
+            ADD COLUMN IF NOT EXISTS work_format VARCHAR(16)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_budget ON jobs(budget_currency, budget_amount)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_tech ON jobs USING GIN (tech)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_keywords ON jobs USING GIN (keywords)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_work_format ON jobs(work_format)",
+    ]),
+    (6, [
+        # Подписки пользователей (src/subscriptions.py)
+        """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            chat_id BIGINT PRIMARY KEY,
+            categories TEXT[] NOT NULL DEFAULT '{}',
+            keywords TEXT[] NOT NULL DEFAULT '{}',
+            stop_words TEXT[] NOT NULL DEFAULT '{}',
+            active BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_subscriptions_active ON subscriptions(active)",
+    ]),
+    (7, [
+        # Профили фильтрации (src/filters.py); версии из общей последовательности,
+        # чтобы после reset и повторной правки версия не повторялась
+        "CREATE SEQUENCE IF NOT EXISTS filter_config_version_seq",
+        """
+        CREATE TABLE IF NOT EXISTS filter_config (
+            profile VARCHAR(64) PRIMARY KEY,
+            config JSONB NOT NULL,
+            version BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+    ]),
+    (8, [
+        # jobs секционируется по месяцам created_at (см. ensure_partitions и
+        # src/retention.py). Первичный ключ секционированной таблицы обязан
+        # включать created_at, поэтому глобальная уникальность (channel,
+        # message_id) вынесена в узкую таблицу job_keys.
+        "ALTER TABLE jobs RENAME TO jobs_legacy",
+        "ALTER SEQUENCE jobs_id_seq OWNED BY NONE",
+        "DROP INDEX IF EXISTS idx_jobs_created",
+        "DROP INDEX IF EXISTS idx_jobs_sent",
+        "DROP INDEX IF EXISTS idx_jobs_hash",
+        "DROP INDEX IF EXISTS idx_jobs_search",
+        "DROP INDEX IF EXISTS idx_jobs_budget",
+        "DROP INDEX IF EXISTS idx_jobs_tech",
+        "DROP INDEX IF EXISTS idx_jobs_keywords",
+        "DROP INDEX IF EXISTS idx_jobs_work_format",
+        """
+        CREATE TABLE jobs (
+            id INTEGER NOT NULL DEFAULT nextval('jobs_id_seq'),
+            message_id BIGINT,
+            channel VARCHAR(255),
+            text TEXT,
+            text_hash VARCHAR(64),
+            url VARCHAR(500),
+            keywords TEXT[],
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            sent BOOLEAN DEFAULT FALSE,
+            search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', COALESCE(text, '')), 'A') ||
+                setweight(to_tsvector('simple', COALESCE(text, '')), 'B')
+            ) STORED,
+            budget_amount INTEGER,
+            budget_currency CHAR(3),
+            tech TEXT[] DEFAULT '{}',
+            work_format VARCHAR(16),
+            CONSTRAINT jobs_partitioned_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+        # Страховка: строки вне созданных месяцев не ломают вставку
+        "CREATE TABLE jobs_default PARTITION OF jobs DEFAULT",
+        "CREATE INDEX idx_jobs_created ON jobs(created_at)",
+        "CREATE INDEX idx_jobs_sent ON jobs(sent)",
+        "CREATE INDEX idx_jobs_hash ON jobs(text_hash)",
+        "CREATE INDEX idx_jobs_search ON jobs USING GIN (search_vector)",
+        "CREATE INDEX idx_jobs_budget ON jobs(budget_currency, budget_amount)",
+        "CREATE INDEX idx_jobs_tech ON jobs USING GIN (tech)",
+        "CREATE INDEX idx_jobs_keywords ON jobs USING GIN (keywords)",
+        "CREATE INDEX idx_jobs_work_format ON jobs(work_format)",
+        """
+        CREATE TABLE IF NOT EXISTS job_keys (
+            channel VARCHAR(255) NOT NULL,
+            message_id BIGINT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (channel, message_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_job_keys_created ON job_keys(created_at)",
+        # Секции на все месяцы уже накопленных данных и на следующий месяц
+        """
+        DO $$
+        DECLARE
+            month DATE;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE(MIN(created_at), NOW())),
+                    date_trunc('month', NOW()) + INTERVAL '1 month',
+                    INTERVAL '1 month'
+                )::date
+                FROM jobs_legacy
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF jobs FOR VALUES FROM (%L) TO (%L)',
+                    'jobs_p' || to_char(month, 'YYYY_MM'), month, (month + INTERVAL '1 month')::date
+                );
+            END LOOP;
+        END
+        $$
+        """,
+        """
+        INSERT INTO jobs (id, message_id, channel, text, text_hash, url, keywords,
+                          created_at, sent, budget_amount, budget_currency, tech, work_format)
+        SELECT id, message_id, channel, text, text_hash, url, keywords,
+               COALESCE(created_at, NOW()), sent, budget_amount, budget_currency, tech, work_format
+        FROM jobs_legacy
+        """,
+        """
+        INSERT INTO job_keys (channel, message_id, created_at)
+        SELECT channel, message_id, COALESCE(created_at, NOW())
+        FROM jobs_legacy
+        WHERE channel IS NOT NULL AND message_id IS NOT NULL
+        ON CONFLICT DO NOTHING
+        """,
+        "DROP TABLE jobs_legacy",
+        # Удаление старых дайджестов по сроку хранения
+        "CREATE INDEX IF NOT EXISTS idx_sent_digests_sent_at ON sent_digests(sent_at)",
+    ]),
+    (9, [
+        # Оценка релевантности при сохранении (src/scoring.py): top-N неотправленных
+        # — один проход по частичному индексу
+        # Уже сохранённые неотправленные (score = 0) оцениваются в Python той же
+        # формулой, что и новые (src/scoring.py, rescore_unsent_jobs из init_tables)
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS score DOUBLE PRECISION NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_unsent_score ON jobs (score DESC) WHERE sent = FALSE",
+    ]),
+    (10, [
+        # Граница загруженной истории по дате (--since): посты с posted_at >= since_bound
+        # в диапазоне [oldest_id, newest_id] загружены
+        "ALTER TABLE crawl_checkpoints ADD COLUMN IF NOT EXISTS since_bound TIMESTAMPTZ",
+    ]),
+    (11, [
+        # Незакрытый пропуск выше newest_id (src/backfill.py): id верхнего поста на
+        # момент начала обхода и before следующей страницы — продолжение между запусками
+        """
+        ALTER TABLE crawl_checkpoints
+            ADD COLUMN IF NOT EXISTS gap_top BIGINT,
+            ADD COLUMN IF NOT EXISTS gap_before BIGINT
+        """,
+    ]),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Начало месяца через count месяцев (count может быть отрицательным)"""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+PARTITION_NAME_PATTERN = re.compile(r"^jobs_p(\d{4})_(\d{2})$")
+
+
+def partition_name(month: datetime) -> str:
+    """Имя месячной секции jobs: jobs_p2026_01"""
+    return f"jobs_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """Начало месяца секции по имени (None — не месячная секция, например jobs_default)"""
+    match = PARTITION_NAME_PATTERN.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _log_query(record):
+    """Учёт каждого обращения к БД (round trip) в метриках"""
+    words = record.query.split(None, 1)
+    op = words[0].upper() if words else "?"
+    metrics.inc("db_queries_total", op=op)
+    metrics.observe("db_query_seconds", record.elapsed, op=op)
+    if record.exception is not None:
+        metrics.inc("db_errors_total", op=op)
+
+
+def _filter_clause(filters: Optional[JobFilter], params: List) -> str:
+    """Условия WHERE по извлечённым полям; значения дописываются в params"""
+    if not filters:
+        return ""
+    conditions = []
+    
+    def param(value) -> str:
+        params.append(value)
+        return f"${len(params)}"
+    
+    if filters.min_budget:
+        conditions.append(
+            f"budget_currency = {param(filters.currency)} AND budget_amount >= {param(filters.min_budget)}"
+        )
+    if filters.tech:
+        conditions.append(f"tech @> {param(filters.tech)}::text[]")
+    if filters.categories:
+        conditions.append(f"keywords @> {param(filters.categories)}::text[]")
+    if filters.work_format:
+        conditions.append(f"work_format = {param(filters.work_format)}")
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    conn.add_query_logger(_log_query)
+
+
+# Параметры пула по режиму DB_POOL_MODE. serverless — для Vercel и
+# pgbouncer/transaction pooler: без кэша подготовленных выражений (в режиме
+# transaction соседние запросы могут уйти в разные серверные соединения),
+# без постоянного соединения и с коротким простоем, чтобы тёплый инстанс
+# не держал слоты Postgres.
+POOL_SETTINGS = {
+    "session": {"min_size": 1, "max_size": 5, "statement_cache_size": 100,
+                "max_inactive_connection_lifetime": 300.0},
+    "serverless": {"min_size": 0, "max_size": 2, "statement_cache_size": 0,
+                   "max_inactive_connection_lifetime": 30.0},
+}
+
+
+def pool_settings(mode: str = DB_POOL_MODE) -> Dict:
+    """Параметры asyncpg.create_pool для режима с учётом переопределений из окружения"""
+    if mode not in POOL_SETTINGS:
+        raise ValueError(f"DB_POOL_MODE должен быть {' или '.join(POOL_SETTINGS)}")
+    settings = dict(POOL_SETTINGS[mode])
+    if DB_POOL_MAX_SIZE:
+        settings["max_size"] = DB_POOL_MAX_SIZE
+    if DB_IDLE_TIMEOUT is not None:
+        settings["max_inactive_connection_lifetime"] = DB_IDLE_TIMEOUT
+    return settings
 
 class Database:
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, mode: str = DB_POOL_MODE):
         self.database_url = database_url
+        self.mode = mode
         self.pool: Optional[asyncpg.Pool] = None
+        # Loop, к которому привязан пул: на завершённом loop пул неработоспособен
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.schema_version: int = 0
+        # До какого момента секции jobs уже созданы этим процессом
+        self._partitions_until: Optional[datetime] = None
+        # Неоценённых неотправленных вакансий не осталось (проверено этим процессом)
+        self._scores_ready = False
     
     async def connect(self):
-        """Подключение к базе данных"""
+        """Подключение к базе данных (пул создаётся один раз на event loop)"""
+        loop = asyncio.get_running_loop()
+        if self.pool and self._loop is not loop:
+            # Пул остался от завершённого loop (asyncio.run): закрыть его штатно
+            # уже нельзя, соединения обрываются сразу, чтобы не держать слоты
+            print("[DB] Pool belongs to another event loop, terminating it")
+            self._terminate()
         if not self.pool:
-            self.pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=5)
+            self.pool = await asyncpg.create_pool(
+                self.database_url, init=_init_connection, **pool_settings(self.mode)
+            )
+            self._loop = loop
+            metrics.inc("db_pools_created_total", mode=self.mode)
         return self.pool
     
+    def _terminate(self):
+        try:
+            self.pool.terminate()
+        except Exception as e:
+            print(f"[DB] Pool terminate error: {e}")
+        self.pool = None
+        self._loop = None
+    
     async def close(self):
-        """Закрытие соединения"""
+        """Закрытие пула (повторный вызов ничего не делает)"""
         if self.pool:
-            await self.pool.close()
+            pool, self.pool, self._loop = self.pool, None, None
+            await pool.close()
+            self._report_pool(pool)
+    
+    def _report_pool(self, pool: asyncpg.Pool):
+        """Число соединений пула (всего и свободных) в gauge-метриках"""
+        metrics.set("db_pool_connections", pool.get_size(), mode=self.mode)
+        metrics.set("db_pool_idle_connections", pool.get_idle_size(), mode=self.mode)
+        metrics.set("db_pool_max_connections", pool.get_max_size(), mode=self.mode)
+    
+    @asynccontextmanager
+    async def acquire(self):
+        """Соединение из пула с учётом времени ожидания (db_pool_wait_seconds)"""
+        start = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            metrics.observe("db_pool_wait_seconds", time.perf_counter() - start, mode=self.mode)
+            self._report_pool(self.pool)
+            yield conn
     
     async def init_tables(self):
-        """Создание таблиц"""
+        """Создание таблиц (применение миграций схемы) и секций jobs"""
+        await self.migrate()
+        await self.ensure_partitions()
+        if not self._scores_ready:
+            # Идемпотентно: прерванная оценка продолжится при следующем старте
+            try:
+                await rescore_unsent_jobs(self)
+                self._scores_ready = True
+            except Exception as e:
+                metrics.inc("rescore_errors_total")
+                print(f"[DB] Rescore error: {e}")
+    
+    async def get_schema_version(self) -> int:
+        """Текущая версия схемы (0, если миграции ещё не применялись)"""
         await self.connect()
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id SERIAL PRIMARY KEY,
-                    message_id BIGINT,
-                    channel VARCHAR(255),
-                    text TEXT,
-                    text_hash VARCHAR(64),
-                    url VARCHAR(500),
-                    keywords TEXT[],
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    sent BOOLEAN DEFAULT FALSE,
-                    UNIQUE(channel, message_id)
-                )
-            """)
-            
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS sent_digests (
-                    id SERIAL PRIMARY KEY,
-                    job_ids INTEGER[],
-                    sent_at TIMESTAMP DEFAULT NOW()
+        async with self.acquire() as conn:
+            try:
+                version = await conn.fetchval("SELECT MAX(version) FROM schema_version")
+            except asyncpg.UndefinedTableError:
+                return 0
+            return version or 0
+    
+    async def migrate(self) -> int:
+        """Применение недостающих миграций (каждая — в своей транзакции под advisory-блокировкой)"""
+        if self.schema_version == LATEST_SCHEMA_VERSION:
+            return self.schema_version
+        
+        current = await self.get_schema_version()
+        if current < LATEST_SCHEMA_VERSION:
+            async with self.acquire() as conn:
+                for version, statements in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    if await self._apply_migration(conn, version, statements):
+                        print(f"[DB] Applied migration {version}")
+                    current = version
+        
+        self.schema_version = current
+        return current
+    
+    async def _apply_migration(self, conn: asyncpg.Connection, version: int,
+                               statements: List[str]) -> bool:
+        """Применение одной миграции; False, если её уже применил другой процесс"""
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+            # До миграции 1 таблицы schema_version ещё нет, её шаги идемпотентны
+            if version > 1:
+                applied = await conn.fetchval(
+                    "SELECT EXISTS(SELECT 1 FROM schema_version WHERE version = $1)", version
                 )
+                if applied:
+                    return False
+            for statement in statements:
+                await conn.execute(statement)
+            await conn.execute(
+                "INSERT INTO schema_version (version) VALUES ($1) ON CONFLICT DO NOTHING", version
+            )
+        return True
+    
+    async def ensure_partitions(self, months_ahead: int = 1) -> List[str]:
+        """Секции jobs на текущий и months_ahead следующих месяцев (проверка — раз в месяц)"""
+        now = datetime.utcnow()
+        if self._partitions_until and now < self._partitions_until:
+            return []
+        await self.connect()
+        current = month_start(now)
+        created = []
+        try:
+            async with self.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock($1)", PARTITION_LOCK_ID)
+                    for n in range(months_ahead + 1):
+                        month = add_months(current, n)
+                        name = partition_name(month)
+                        if await conn.fetchval("SELECT to_regclass($1)", name) is not None:
+                            continue
+                        await self._create_partition(conn, name, month, add_months(month, 1))
+                        created.append(name)
+        except asyncpg.PostgresError as e:
+            # Вставка не ломается (строки попадут в jobs_default и будут перенесены
+            # при следующей попытке), но и не повторяет DDL на каждый запрос
+            metrics.inc("partition_errors_total")
+            print(f"[DB] Partition error: {e}")
+            self._partitions_until = now + PARTITION_RETRY
+            return created
+        self._partitions_until = add_months(current, months_ahead)
+        if created:
+            metrics.inc("partitions_created_total", len(created))
+            print(f"[DB] Created partitions: {', '.join(created)}")
+        return created
+    
+    async def _create_partition(self, conn, name: str, start: datetime, end: datetime):
+        """Секция [start, end); строки этого диапазона из jobs_default переносятся в неё"""
+        bounds = f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        stray = await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM jobs_default WHERE created_at >= $1 AND created_at < $2)",
+            start, end,
+        )
+        if not stray:
+            await conn.execute(f"CREATE TABLE {name} PARTITION OF jobs {bounds}")
+            return
+        # CREATE ... PARTITION OF упал бы: строки диапазона уже лежат в jobs_default.
+        # Отдельная таблица, перенос строк, затем ATTACH (проверка default пройдёт)
+        columns = ", ".join(await conn.fetchval("""
+            SELECT array_agg(attname::text ORDER BY attnum) FROM pg_attribute
+            WHERE attrelid = 'jobs'::regclass AND attnum > 0
+              AND NOT attisdropped AND attgenerated = ''
+        """))
+        await conn.execute(
+            f"CREATE TABLE {name} (LIKE jobs INCLUDING DEFAULTS INCLUDING GENERATED)"
+        )
+        moved = await conn.execute(f"""
+            WITH moved AS (
+                DELETE FROM jobs_default WHERE created_at >= $1 AND created_at < $2
+                RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+        """, start, end)
+        await conn.execute(f"ALTER TABLE jobs ATTACH PARTITION {name} {bounds}")
+        metrics.inc("partition_rows_moved_total", int(moved.split()[-1]))
+        print(f"[DB] Moved {moved.split()[-1]} rows from jobs_default to {name}")
+    
+    async def list_job_partitions(self) -> List[str]:
+        """Имена подключённых секций jobs"""
+        await self.connect()
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT c.relname AS name
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'jobs'::regclass
+                ORDER BY c.relname
             """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at)
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_sent ON jobs(sent)
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(text_hash)
-            """)
+            return [row["name"] for row in rows]
+    
+    async def iter_partition(self, name: str):
+        """Строки секции (курсором) — для выгрузки перед удалением"""
+        if partition_month(name) is None:
+            raise ValueError(f"Not a monthly partition: {name}")
+        await self.connect()
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(f"""
+                    SELECT id, message_id, channel, text, text_hash, url, keywords, created_at,
+                           sent, budget_amount, budget_currency, tech, work_format
+                    FROM {name}
+                    ORDER BY created_at, id
+                """):
+                    yield dict(row)
+    
+    async def detach_partition(self, name: str, drop: bool = False):
+        """Отключение секции от jobs (остаётся отдельной таблицей) или удаление"""
+        if partition_month(name) is None:
+            raise ValueError(f"Not a monthly partition: {name}")
+        await self.connect()
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"ALTER TABLE jobs DETACH PARTITION {name}")
+                if drop:
+                    await conn.execute(f"DROP TABLE {name}")
+    
+    async def prune_job_history(self, before: datetime) -> Dict[str, int]:
+        """Удаление ключей дедупликации и дайджестов старше before"""
+        await self.connect()
+        async with self.acquire() as conn:
+            keys = await conn.execute("DELETE FROM job_keys WHERE created_at < $1", before)
+            digests = await conn.execute("DELETE FROM sent_digests WHERE sent_at < $1", before)
+        return {"job_keys": int(keys.split()[-1]), "sent_digests": int(digests.split()[-1])}
     
     async def add_job(self, message_id: int, channel: str, text: str, 
-                      text_hash: str, url: str, keywords: List[str]) -> Optional[int]:
-        """Добавление вакансии"""
+                      text_hash: str, url: str, keywords: List[str],
+                      budget_amount: Optional[int] = None, budget_currency: Optional[str] = None,
+                      tech: Optional[List[str]] = None,
+                      work_format: Optional[str] = None, score: float = 0) -> Optional[int]:
+        """Добавление вакансии (None, если (channel, message_id) уже есть)"""
         await self.connect()
+        await self.ensure_partitions()
         try:
-            async with self.pool.acquire() as conn:
+            async with self.acquire() as conn:
                 result = await conn.fetchrow("""
-                    INSERT INTO jobs (message_id, channel, text, text_hash, url, keywords)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    ON CONFLICT (channel, message_id) DO NOTHING
+                    WITH new_key AS (
+                        INSERT INTO job_keys (channel, message_id)
+                        VALUES ($2::varchar, $1::bigint)
+                        ON CONFLICT DO NOTHING
+                        RETURNING 1
+                    )
+                    INSERT INTO jobs (message_id, channel, text, text_hash, url, keywords,
+                                      budget_amount, budget_currency, tech, work_format, score)
+                    SELECT $1::bigint, $2::varchar, $3::text, $4::varchar, $5::varchar, $6::text[],
+                           $7::integer, $8::char(3), $9::text[], $10::varchar, $11::float8
+                    WHERE EXISTS (SELECT 1 FROM new_key)
                     RETURNING id
-                """, message_id, channel, text, text_hash, url, keywords)
+                """, message_id, channel, text, text_hash, url, keywords,
+                    budget_amount, budget_currency, tech or [], work_format, score)
                 return result['id'] if result else None
         except Exception as e:
             print(f"Error adding job: {e}")
             return None
     
-    async def get_unsent_jobs(self, limit: int = 50) -> List[Dict]:
-        """Получение неотправленных вакансий"""
+    async def add_jobs(self, jobs: List[Dict]) -> List[Dict]:
+        """Пакетное добавление вакансий; возвращает только вставленные (с id)"""
+        if not jobs:
+            return []
         await self.connect()
-        async with self.pool.acquire() as conn:
+        await self.ensure_partitions()
+        payload = json.dumps([
+            {
+                "message_id": job["message_id"],
+                "channel": job["channel"],
+                "text": job["text"],
+                "text_hash": job["text_hash"],
+                "url": job["url"],
+                "keywords": job.get("keywords", []),
+                "budget_amount": job.get("budget_amount"),
+                "budget_currency": job.get("budget_currency"),
+                "tech": job.get("tech", []),
+                "work_format": job.get("work_format"),
+                "score": job.get("score", 0),
+            }
+            for job in jobs
+        ])
+        async with self.acquire() as conn:
             rows = await conn.fetch("""
-                SELECT id, message_id, channel, text, url, keywords, created_at
+                WITH j AS (
+                    SELECT *
+                    FROM jsonb_to_recordset($1::jsonb) AS j(
+                        message_id BIGINT, channel VARCHAR(255), text TEXT,
+                        text_hash VARCHAR(64), url VARCHAR(500), keywords TEXT[],
+                        budget_amount INTEGER, budget_currency CHAR(3), tech TEXT[],
+                        work_format VARCHAR(16), score DOUBLE PRECISION
+                    )
+                ), new_keys AS (
+                    INSERT INTO job_keys (channel, message_id)
+                    SELECT channel, message_id FROM j
+                    ON CONFLICT DO NOTHING
+                    RETURNING channel, message_id
+                )
+                INSERT INTO jobs (message_id, channel, text, text_hash, url, keywords,
+                                  budget_amount, budget_currency, tech, work_format, score)
+                SELECT DISTINCT ON (j.channel, j.message_id)
+                       j.message_id, j.channel, j.text, j.text_hash, j.url, j.keywords,
+                       j.budget_amount, j.budget_currency, j.tech, j.work_format,
+                       COALESCE(j.score, 0)
+                FROM j JOIN new_keys k ON k.channel = j.channel AND k.message_id = j.message_id
+                RETURNING id, channel, message_id
+            """, payload)
+        
+        ids = {(row["channel"], row["message_id"]): row["id"] for row in rows}
+        inserted = []
+        for job in jobs:
+            job_id = ids.pop((job["channel"], job["message_id"]), None)
+            if job_id:
+                job["id"] = job_id
+                inserted.append(job)
+        return inserted
+    
+    async def get_unsent_jobs(self, limit: int = 50,
+                              filters: Optional[JobFilter] = None) -> List[Dict]:
+        """Лучшие по score неотправленные вакансии (частичный индекс idx_jobs_unsent_score в каждой секции)"""
+        await self.connect()
+        params: List = [limit]
+        where = _filter_clause(filters, params)
+        async with self.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT id, message_id, channel, text, url, keywords, created_at,
+                       budget_amount, budget_currency, tech, work_format, score
                 FROM jobs
-                WHERE sent = FALSE
-                ORDER BY created_at DESC
+                WHERE sent = FALSE{where}
+                ORDER BY score DESC
                 LIMIT $1
-            """, limit)
+            """, *params)
             return [dict(row) for row in rows]
     
+    async def get_unscored_jobs(self, after_id: int = 0, limit: int = 1000) -> List[Dict]:
+        """Неотправленные вакансии с score = 0 по возрастанию id, начиная после after_id"""
+        await self.connect()
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT id, channel, keywords, tech, budget_amount, created_at
+                FROM jobs
+                WHERE sent = FALSE AND score = 0 AND id > $1
+                ORDER BY id
+                LIMIT $2
+            """, after_id, limit)
+            return [dict(row) for row in rows]
+    
+    async def update_job_scores(self, scores: Dict[int, float]):
+        """Запись оценок по id вакансий"""
+        if not scores:
+            return
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("""
+                UPDATE jobs SET score = s.score
+                FROM unnest($1::int[], $2::float8[]) AS s(id, score)
+                WHERE jobs.id = s.id
+            """, list(scores), list(scores.values()))
+    
     async def mark_jobs_sent(self, job_ids: List[int]):
         """Отметить вакансии как отправленные"""
         if not job_ids:
             return
         await self.connect()
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             await conn.execute("""
                 UPDATE jobs SET sent = TRUE WHERE id = ANY($1)
             """, job_ids)
@@ -105,10 +725,22 @@ class Database:
                 INSERT INTO sent_digests (job_ids) VALUES ($1)
             """, job_ids)
     
+    async def get_channel_counts(self, days: int = 30) -> Dict[str, int]:
+        """Число сохранённых вакансий по каналам за последние N дней"""
+        await self.connect()
+        since = datetime.utcnow() - timedelta(days=days)
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT channel, COUNT(*) AS jobs FROM jobs
+                WHERE created_at > $1
+                GROUP BY channel
+            """, since)
+            return {row["channel"]: row["jobs"] for row in rows}
+    
     async def check_duplicate(self, text_hash: str) -> bool:
         """Проверка на дубликат по хешу"""
         await self.connect()
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             result = await conn.fetchval("""
                 SELECT EXISTS(SELECT 1 FROM jobs WHERE text_hash = $1)
             """, text_hash)
@@ -118,30 +750,273 @@ class Database:
         """Получение вакансий за последние N часов для проверки схожести"""
         await self.connect()
         since = datetime.utcnow() - timedelta(hours=hours)
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             rows = await conn.fetch("""
                 SELECT id, text, text_hash FROM jobs
                 WHERE created_at > $1
+                ORDER BY created_at, id
             """, since)
             return [dict(row) for row in rows]
     
-    async def get_jobs_for_export(self, days: int = 7) -> List[Dict]:
+    async def get_jobs_for_export(self, days: int = 7,
+                                  filters: Optional[JobFilter] = None) -> List[Dict]:
         """Получение вакансий для экспорта"""
         await self.connect()
         since = datetime.utcnow() - timedelta(days=days)
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT id, channel, text, url, keywords, created_at
+        params: List = [since]
+        where = _filter_clause(filters, params)
+        async with self.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT id, channel, text, url, keywords, created_at,
+                       budget_amount, budget_currency, tech, work_format
                 FROM jobs
-                WHERE created_at > $1
+                WHERE created_at > $1{where}
                 ORDER BY created_at DESC
-            """, since)
+            """, *params)
+            return [dict(row) for row in rows]
+    
+    async def save_snapshot(self, channel: str, key: str, body: bytes, size: int,
+                            fetched_at: datetime):
+        """Сохранение загрузки страницы; тело пишется, только если его ещё нет"""
+        await self.connect()
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO page_blobs (key, body, size) VALUES ($1, $2, $3)
+                    ON CONFLICT (key) DO NOTHING
+                """, key, body, size)
+                await conn.execute("""
+                    INSERT INTO page_snapshots (channel, blob_key, fetched_at)
+                    VALUES ($1, $2, $3)
+                """, channel, key, fetched_at)
+    
+    async def iter_snapshots(self, since: Optional[datetime] = None,
+                             until: Optional[datetime] = None,
+                             channels: Optional[List[str]] = None):
+        """Загрузки страниц по времени (курсором, без загрузки всего архива в память)"""
+        await self.connect()
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor("""
+                    SELECT s.channel, s.fetched_at, s.blob_key, b.body
+                    FROM page_snapshots s
+                    JOIN page_blobs b ON b.key = s.blob_key
+                    WHERE ($1::timestamp IS NULL OR s.fetched_at >= $1)
+                      AND ($2::timestamp IS NULL OR s.fetched_at < $2)
+                      AND ($3::text[] IS NULL OR s.channel = ANY($3))
+                    ORDER BY s.fetched_at, s.id
+                """, since, until, channels):
+                    yield dict(row)
+    
+    async def prune_snapshots(self, max_age_days: int, max_bytes: int) -> int:
+        """Удаление загрузок старше max_age_days и самых старых сверх max_bytes"""
+        await self.connect()
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                removed = await conn.fetchval("""
+                    WITH deleted AS (
+                        DELETE FROM page_snapshots WHERE fetched_at < $1 RETURNING 1
+                    )
+                    SELECT COUNT(*) FROM deleted
+                """, cutoff)
+                # Общее тело нескольких загрузок считается для каждой — оценка сверху
+                removed += await conn.fetchval("""
+                    WITH ranked AS (
+                        SELECT s.id, SUM(LENGTH(b.body)) OVER (
+                            ORDER BY s.fetched_at DESC, s.id DESC
+                        ) AS total
+                        FROM page_snapshots s
+                        JOIN page_blobs b ON b.key = s.blob_key
+                    ), deleted AS (
+                        DELETE FROM page_snapshots
+                        WHERE id IN (SELECT id FROM ranked WHERE total > $1)
+                        RETURNING 1
+                    )
+                    SELECT COUNT(*) FROM deleted
+                """, max_bytes)
+                await conn.execute("""
+                    DELETE FROM page_blobs b
+                    WHERE NOT EXISTS (SELECT 1 FROM page_snapshots s WHERE s.blob_key = b.key)
+                """)
+        return removed
+    
+    async def search_jobs(self, query: str, limit: int = 5,
+                          after: Optional[Tuple[float, int]] = None,
+                          filters: Optional[JobFilter] = None) -> List[Dict]:
+        """Полнотекстовый поиск по вакансиям, по убыванию релевантности.
+        
+        Пагинация по ключу (rank, id): after — rank и id последней вакансии
+        предыдущей страницы, без OFFSET.
+        """
+        await self.connect()
+        after_rank, after_id = after if after else (None, None)
+        params: List = [query, after_rank, after_id, limit]
+        where = _filter_clause(filters, params)
+        async with self.acquire() as conn:
+            rows = await conn.fetch(f"""
+                WITH q AS (
+                    SELECT websearch_to_tsquery('russian', $1) ||
+                           websearch_to_tsquery('simple', $1) AS query
+                )
+                SELECT *
+                FROM (
+                    SELECT j.id, j.channel, j.text, j.url, j.keywords, j.created_at,
+                           j.budget_amount, j.budget_currency, j.tech, j.work_format,
+                           ts_rank(j.search_vector, q.query) AS rank
+                    FROM jobs j, q
+                    WHERE j.search_vector @@ q.query{where}
+                ) ranked
+                WHERE $2::real IS NULL OR (rank, id) < ($2::real, $3::int)
+                ORDER BY rank DESC, id DESC
+                LIMIT $4
+            """, *params)
             return [dict(row) for row in rows]
     
+    async def get_checkpoint(self, channel: str) -> Optional[Dict]:
+        """Прогресс загрузки истории канала"""
+        await self.connect()
+        async with self.acquire() as conn:
+            row = await conn.fetchrow("""
+                SELECT channel, oldest_id, newest_id, complete, since_bound,
+                       gap_top, gap_before, updated_at
+                FROM crawl_checkpoints WHERE channel = $1
+            """, channel)
+            return dict(row) if row else None
+    
+    async def save_checkpoint(self, channel: str, oldest_id: Optional[int],
+                              newest_id: Optional[int], complete: bool = False,
+                              since_bound: Optional[datetime] = None):
+        """Сохранение прогресса: диапазон id и граница по дате только расширяются"""
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO crawl_checkpoints (channel, oldest_id, newest_id, complete, since_bound)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (channel) DO UPDATE SET
+                    oldest_id = LEAST(crawl_checkpoints.oldest_id, EXCLUDED.oldest_id),
+                    newest_id = GREATEST(crawl_checkpoints.newest_id, EXCLUDED.newest_id),
+                    complete = crawl_checkpoints.complete OR EXCLUDED.complete,
+                    since_bound = LEAST(crawl_checkpoints.since_bound, EXCLUDED.since_bound),
+                    updated_at = NOW()
+            """, channel, oldest_id, newest_id, complete, since_bound)
+    
+    async def save_gap(self, channel: str, top: Optional[int], before: Optional[int]):
+        """Позиция обхода пропуска выше newest_id (None, None — пропуск закрыт)"""
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("""
+                UPDATE crawl_checkpoints SET gap_top = $2, gap_before = $3, updated_at = NOW()
+                WHERE channel = $1
+            """, channel, top, before)
+    
+    async def reset_checkpoint(self, channel: str):
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("DELETE FROM crawl_checkpoints WHERE channel = $1", channel)
+    
+    async def save_subscription(self, chat_id: int, categories: List[str],
+                                keywords: List[str], stop_words: List[str]):
+        """Создание или замена подписки (заодно включает отключённую)"""
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO subscriptions (chat_id, categories, keywords, stop_words)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (chat_id) DO UPDATE SET
+                    categories = EXCLUDED.categories,
+                    keywords = EXCLUDED.keywords,
+                    stop_words = EXCLUDED.stop_words,
+                    active = TRUE,
+                    updated_at = NOW()
+            """, chat_id, categories, keywords, stop_words)
+    
+    async def get_subscription(self, chat_id: int) -> Optional[Dict]:
+        await self.connect()
+        async with self.acquire() as conn:
+            row = await conn.fetchrow("""
+                SELECT chat_id, categories, keywords, stop_words
+                FROM subscriptions WHERE chat_id = $1 AND active
+            """, chat_id)
+            return dict(row) if row else None
+    
+    async def get_subscriptions(self) -> List[Dict]:
+        """Все активные подписки (для построения индекса маршрутизации)"""
+        await self.connect()
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT chat_id, categories, keywords, stop_words
+                FROM subscriptions WHERE active
+            """)
+            return [dict(row) for row in rows]
+    
+    async def delete_subscription(self, chat_id: int) -> bool:
+        await self.connect()
+        async with self.acquire() as conn:
+            result = await conn.execute("DELETE FROM subscriptions WHERE chat_id = $1", chat_id)
+            return result != "DELETE 0"
+    
+    async def deactivate_subscriptions(self, chat_ids: List[int]):
+        """Отключение подписок (пользователь заблокировал бота)"""
+        if not chat_ids:
+            return
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("""
+                UPDATE subscriptions SET active = FALSE, updated_at = NOW()
+                WHERE chat_id = ANY($1)
+            """, chat_ids)
+    
+    async def get_filter_versions(self) -> Dict[str, int]:
+        """Версии сохранённых профилей фильтрации (проверка перед каждым проходом)"""
+        await self.connect()
+        async with self.acquire() as conn:
+            rows = await conn.fetch("SELECT profile, version FROM filter_config")
+            return {row["profile"]: row["version"] for row in rows}
+    
+    async def get_filter_config(self, profile: str) -> Optional[Tuple[Dict, int]]:
+        """Правила профиля и их версия"""
+        await self.connect()
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT config, version FROM filter_config WHERE profile = $1", profile
+            )
+            return (json.loads(row["config"]), row["version"]) if row else None
+    
+    async def save_filter_config(self, profile: str, config: Dict,
+                                 expected_version: int) -> Optional[int]:
+        """Сохранение правил с новой версией.
+        
+        expected_version — версия, от которой сделана правка (0 — профиля в
+        таблице ещё нет). Если её успели изменить, возвращает None.
+        """
+        await self.connect()
+        payload = json.dumps(config, ensure_ascii=False)
+        async with self.acquire() as conn:
+            if expected_version == 0:
+                return await conn.fetchval("""
+                    INSERT INTO filter_config (profile, config, version)
+                    VALUES ($1, $2::jsonb, nextval('filter_config_version_seq'))
+                    ON CONFLICT (profile) DO NOTHING
+                    RETURNING version
+                """, profile, payload)
+            return await conn.fetchval("""
+                UPDATE filter_config
+                SET config = $2::jsonb, version = nextval('filter_config_version_seq'), updated_at = NOW()
+                WHERE profile = $1 AND version = $3
+                RETURNING version
+            """, profile, payload, expected_version)
+    
+    async def delete_filter_config(self, profile: str):
+        """Возврат профиля к значениям по умолчанию из кода"""
+        await self.connect()
+        async with self.acquire() as conn:
+            await conn.execute("DELETE FROM filter_config WHERE profile = $1", profile)
+    
     async def get_stats(self) -> Dict:
         """Статистика по вакансиям"""
         await self.connect()
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             total = await conn.fetchval("SELECT COUNT(*) FROM jobs")
             today = await conn.fetchval("""
                 SELECT COUNT(*) FROM jobs 
@@ -154,3 +1029,16 @@ class Database:
                 "today": today,
                 "sent": sent
             }
+
+
+# Экземпляры Database процесса по URL: на тёплом инстансе serverless-функции
+# пул переиспользуется между вызовами (api/cron.py, api/webhook.py)
+_databases: Dict[str, Database] = {}
+
+
+def get_database(database_url: str) -> Database:
+    """Общий экземпляр Database для URL"""
+    db = _databases.get(database_url)
+    if db is None:
+        db = _databases[database_url] = Database(database_url)
+    return db
@@ -0,0 +1,254 @@
+"""
+Извлечение структурированных полей из текста вакансии при сохранении.
+
+Бюджет (сумма и валюта), технологии и формат работы вычисляются один раз
+при парсинге и хранятся в индексируемых колонках jobs, чтобы фильтры
+дайджеста, поиска и экспорта не сканировали text. Здесь же разбор
+фильтров из аргументов команд бота.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Сумма: "150 000", "150000", "1.5", "150k", "150 тыс", "1,2 млн"
+_AMOUNT = r"(\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+(?:[.,]\d+)?)\s*(k|к|тыс\.?|тысяч\w*|m|млн\.?)?"
+_MULTIPLIERS = {"k": 1_000, "к": 1_000, "тыс": 1_000, "тысяч": 1_000, "m": 1_000_000, "млн": 1_000_000}
+
+_CURRENCIES = {
+    "₽": "RUB", "руб": "RUB", "р": "RUB", "rub": "RUB",
+    "$": "USD", "usd": "USD", "долл": "USD",
+    "€": "EUR", "eur": "EUR", "евро": "EUR",
+}
+_CURRENCY_BEFORE = r"(\$|€|usd|eur)"
+_CURRENCY_AFTER = r"(₽|руб\w*\.?|р\.|rub|\$|usd|долл\w*|€|eur|евро)"
+
+BUDGET_PATTERNS = [
+    # $500, € 1 000
+    (re.compile(_CURRENCY_BEFORE + r"\s*" + _AMOUNT, re.IGNORECASE), "before"),
+    # 50 000 ₽, 500$, 80к руб
+    (re.compile(r"(?<![\w.,])" + _AMOUNT + r"\s*" + _CURRENCY_AFTER, re.IGNORECASE), "after"),
+    # бюджет 50000, зп от 100к (без валюты — рубли), budget 500 (доллары)
+    (re.compile(r"(бюджет|оплата|зарплата|зп|ставка|оклад|budget|salary)[:\s]*"
+                r"(?:от|до|from|up to)?\s*" + _AMOUNT, re.IGNORECASE), "keyword"),
+]
+
+MIN_BUDGET = 10
+MAX_BUDGET = 100_000_000
+
+# Каноническое имя → регулярное выражение (границы слов добавляются ниже)
+TECH_ALIASES = {
+    "python": r"python|питон",
+    "javascript": r"javascript",
+    "typescript": r"typescript",
+    "react native": r"react[ -]native",
+    "react": r"react(?![ -]native)|реакт",
+    "vue": r"vue(?:\.?js)?",
+    "angular": r"angular",
+    "next.js": r"next\.?js",
+    "node.js": r"node(?:\.?js)?",
+    "php": r"php",
+    "laravel": r"laravel",
+    "django": r"django",
+    "fastapi": r"fastapi",
+    "flask": r"flask",
+    "go": r"golang|go(?= (?:developer|разработчик|engineer))",
+    "java": r"java(?!script)",
+    "kotlin": r"kotlin",
+    "swift": r"swift",
+    "flutter": r"flutter",
+    "c#": r"c#|\.net|dotnet",
+    "c++": r"c\+\+",
+    "1c": r"1[cс]",
+    "wordpress": r"wordpress",
+    "docker": r"docker",
+    "kubernetes": r"kubernetes|k8s",
+    "aws": r"aws",
+    "postgresql": r"postgres(?:ql)?|постгрес",
+    "mysql": r"mysql",
+    "mongodb": r"mongo(?:db)?",
+    "redis": r"redis",
+    "aiogram": r"aiogram",
+    "llm": r"llm|gpt|chatgpt|openai",
+    "pytorch": r"pytorch",
+    "tensorflow": r"tensorflow",
+    "figma": r"figma",
+}
+_TECH_NAMES = list(TECH_ALIASES)
+TECH_PATTERN = re.compile(
+    "|".join(
+        rf"(?P<t{i}>(?<![\w+#.])(?:{alias})(?![\w+#]))"
+        for i, alias in enumerate(TECH_ALIASES.values())
+    ),
+    re.IGNORECASE,
+)
+
+# Короткие обозначения совпадают с обычными сокращениями в тексте и считаются
+# только рядом с другой технологией (см. extract_tech)
+SHORT_TECH_ALIASES = {"js": "javascript", "ts": "typescript"}
+SHORT_TECH_PATTERN = re.compile(r"(?<![\w+#.])(js|ts)(?![\w+#])", re.IGNORECASE)
+_TECH_JOINER = re.compile(r"\s*[/,+&]\s*|\s+и\s+|\s+and\s+")
+
+WORK_FORMATS = ("remote", "office", "hybrid")
+_REMOTE = re.compile(r"удал[её]нн?\w*|удал[её]нк\w*|remote|дистанц\w*|из дома|work from home|wfh", re.IGNORECASE)
+_OFFICE = re.compile(r"(?<!\w)(?:офис\w*|office|on-?site)(?!\w)", re.IGNORECASE)
+_HYBRID = re.compile(r"гибрид\w*|hybrid", re.IGNORECASE)
+
+
+def _parse_amount(number: str, suffix: Optional[str]) -> Optional[int]:
+    value = float(re.sub(r"[ \u00a0\u202f]", "", number).replace(",", "."))
+    if suffix:
+        value *= _MULTIPLIERS.get(suffix.lower().rstrip("."), 1)
+    amount = int(value)
+    return amount if MIN_BUDGET <= amount <= MAX_BUDGET else None
+
+
+def _currency(token: str) -> str:
+    token = token.lower().rstrip(".")
+    for prefix, code in _CURRENCIES.items():
+        if token.startswith(prefix):
+            return code
+    return "RUB"
+
+
+def extract_budget(text: str) -> Tuple[Optional[int], Optional[str]]:
+    """Наибольшая сумма в первой найденной валюте: (сумма, RUB/USD/EUR)"""
+    found: List[Tuple[int, int, str]] = []
+    for pattern, kind in BUDGET_PATTERNS:
+        for match in pattern.finditer(text):
+            if kind == "before":
+                currency, number, suffix = match.group(1), match.group(2), match.group(3)
+            elif kind == "after":
+                number, suffix, currency = match.group(1), match.group(2), match.group(3)
+            else:
+                keyword, number, suffix = match.group(1), match.group(2), match.group(3)
+                currency = "usd" if keyword.isascii() else "руб"
+            amount = _parse_amount(number, suffix)
+            if amount:
+                found.append((match.start(), amount, _currency(currency)))
+    if not found:
+        return None, None
+    found.sort()
+    currency = found[0][2]
+    return max(amount for _, amount, code in found if code == currency), currency
+
+
+def extract_tech(text: str) -> List[str]:
+    """Упомянутые технологии (канонические имена, по алфавиту)"""
+    found = [(m.start(), m.end(), _TECH_NAMES[int(m.lastgroup[1:])]) for m in TECH_PATTERN.finditer(text)]
+    short = [(m.start(), m.end(), SHORT_TECH_ALIASES[m.group(1).lower()])
+             for m in SHORT_TECH_PATTERN.finditer(text)]
+    names = {name for _, _, name in found}
+    spans = found + short
+    for start, end, name in short:
+        # Только вплотную к другой технологии: «JS/TS», «React + TS»
+        if any(
+            (start, end) != (other_start, other_end) and _TECH_JOINER.fullmatch(
+                text[other_end:start] if other_end <= start else text[end:other_start]
+            )
+            for other_start, other_end, _ in spans
+        ):
+            names.add(name)
+    return sorted(names)
+
+
+def extract_work_format(text: str) -> Optional[str]:
+    """remote / office / hybrid или None, если формат не указан"""
+    if _HYBRID.search(text):
+        return "hybrid"
+    remote = bool(_REMOTE.search(text))
+    office = bool(_OFFICE.search(text))
+    if remote and office:
+        return "hybrid"
+    if remote:
+        return "remote"
+    if office:
+        return "office"
+    return None
+
+
+def extract_fields(text: str) -> Dict:
+    """Все структурированные поля вакансии для колонок jobs"""
+    amount, currency = extract_budget(text)
+    return {
+        "budget_amount": amount,
+        "budget_currency": currency,
+        "tech": extract_tech(text),
+        "work_format": extract_work_format(text),
+    }
+
+
+@dataclass
+class JobFilter:
+    """Фильтр вакансий по извлечённым полям"""
+    min_budget: Optional[int] = None
+    currency: str = "RUB"
+    tech: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    work_format: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.min_budget or self.tech or self.categories or self.work_format)
+
+    def matches(self, job: Dict) -> bool:
+        """Проверка вакансии в памяти (для кода без БД)"""
+        if self.min_budget and (
+            job.get("budget_currency") != self.currency or (job.get("budget_amount") or 0) < self.min_budget
+        ):
+            return False
+        if not set(self.tech) <= set(job.get("tech") or []):
+            return False
+        if not set(self.categories) <= set(job.get("keywords") or []):
+            return False
+        return not self.work_format or job.get("work_format") == self.work_format
+
+    def describe(self) -> str:
+        parts = []
+        if self.min_budget:
+            parts.append(f"бюджет ≥ {self.min_budget:,} {self.currency}".replace(",", " "))
+        parts.extend(self.categories)
+        parts.extend(self.tech)
+        if self.work_format:
+            parts.append(self.work_format)
+        return ", ".join(parts)
+
+
+FILTER_HELP = "budget>=50000 (или budget>=500$), cat:bots, tech:python, format:remote"
+
+
+def parse_budget_arg(value: str) -> Tuple[Optional[int], Optional[str]]:
+    """Сумма из фильтра: 50000, 50k, 500$, $500, 100000₽ (без валюты — рубли)"""
+    match = re.fullmatch(rf"{_CURRENCY_BEFORE}?\s*{_AMOUNT}\s*{_CURRENCY_AFTER}?", value, re.IGNORECASE)
+    if not match:
+        return None, None
+    before, number, suffix, after = match.groups()
+    return _parse_amount(number, suffix), _currency(before or after or "₽")
+
+
+def parse_filters(args: str, categories=()) -> Tuple[JobFilter, str]:
+    """Разбор аргументов команды: фильтры и оставшийся текст.
+
+    budget>=N[валюта] — минимальный бюджет, cat:<категория>, tech:<технология>
+    (или stack:), format:remote|office|hybrid. Остальные слова возвращаются
+    как текст (для /search).
+    """
+    filters = JobFilter()
+    rest = []
+    for token in args.split():
+        key, sep, value = token.partition(":")
+        key = key.lower()
+        if token.lower().startswith("budget>="):
+            amount, currency = parse_budget_arg(token[len("budget>="):])
+            if amount:
+                filters.min_budget, filters.currency = amount, currency
+                continue
+        elif sep and key == "cat" and (not categories or value.lower() in categories):
+            filters.categories.append(value.lower())
+            continue
+        elif sep and key in ("tech", "stack") and extract_tech(value):
+            filters.tech.extend(extract_tech(value))
+            continue
+        elif sep and key == "format" and value.lower() in WORK_FORMATS:
+            filters.work_format = value.lower()
+            continue
+        rest.append(token)
+    return filters, " ".join(rest)
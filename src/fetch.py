@@ -0,0 +1,229 @@
+"""
+HTTP-загрузка страниц t.me/s, общая для фонового парсинга и cron.
+
+- Сжатие: Accept-Encoding gzip и deflate, а также br, если установлен пакет
+  brotli (без него aiohttp не распакует такой ответ).
+- Условные запросы: ETag и Last-Modified ответа возвращаются в FetchResult
+  и запоминаются по URL вызывающим, когда страница обработана (см.
+  TelegramParser.commit_validators); следующий запрос того же URL уходит с
+  If-None-Match/If-Modified-Since. Ответ 304 означает, что страница не
+  изменилась, и тело не передаётся.
+- Один настроенный TCPConnector (keep-alive, кэш DNS, лимит соединений) на
+  движок: между проходами фонового парсинга и на тёплом инстансе cron
+  (shared_engine) соединения и DNS переиспользуются.
+- Лимит размера ответа FETCH_MAX_BYTES: тело читается кусками, загрузка
+  прерывается при превышении.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+from urllib.parse import urlencode
+
+import aiohttp
+
+from src.config import FETCH_CONNECTIONS, FETCH_DNS_TTL, FETCH_KEEPALIVE, FETCH_MAX_BYTES
+
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(Exception):
+    """Тело ответа больше лимита движка"""
+
+    def __init__(self, url: str, size: int, limit: int):
+        super().__init__(f"{url}: response exceeds {limit} bytes ({size}+)")
+        self.url = url
+        self.size = size
+        self.limit = limit
+
+
+@dataclass
+class FetchResult:
+    status: int
+    body: bytes
+    seconds: float
+    # Байт по сети (Content-Length до распаковки); None — сервер не указал
+    wire_bytes: Optional[int] = None
+    encoding: str = "utf-8"
+    # Ключ запроса и ETag/Last-Modified ответа 200 — для ValidatorCache.remember
+    key: str = ""
+    validators: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+
+class ValidatorCache:
+    """ETag и Last-Modified последних ответов по URL (LRU, в памяти процесса)"""
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def headers(self, key: str) -> Dict[str, str]:
+        """Заголовки условного запроса для URL"""
+        validators = self._items.get(key)
+        if not validators:
+            return {}
+        self._items.move_to_end(key)
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def remember(self, key: str, validators: Dict[str, str]) -> None:
+        """Сохранение валидаторов обработанной страницы; пустые — забыть URL"""
+        if not validators:
+            self._items.pop(key, None)
+            return
+        self._items[key] = validators
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
+def response_validators(response_headers) -> Dict[str, str]:
+    validators = {}
+    if response_headers.get("ETag"):
+        validators["etag"] = response_headers["ETag"]
+    if response_headers.get("Last-Modified"):
+        validators["last_modified"] = response_headers["Last-Modified"]
+    return validators
+
+
+def request_key(url: str, params: Optional[Dict] = None) -> str:
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+
+class FetchEngine:
+    """Сессия с настроенным коннектором, условные запросы и лимит размера.
+
+    Сессия создаётся лениво и пересоздаётся, если прежняя закрыта или
+    привязана к другому (уже завершённому) event loop.
+    """
+
+    def __init__(self, max_bytes: int = FETCH_MAX_BYTES, connections: int = FETCH_CONNECTIONS,
+                 dns_ttl: int = FETCH_DNS_TTL, keepalive: float = FETCH_KEEPALIVE,
+                 validators: Optional[ValidatorCache] = None):
+        self.max_bytes = max_bytes
+        self.connections = connections
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.validators = validators if validators is not None else ValidatorCache()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """Сессия движка для текущего event loop (вызывать из корутины)"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            self._discard_session()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connections,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING},
+            )
+            self._loop = loop
+        return self._session
+
+    def _discard_session(self):
+        """Закрытие сессии, оставшейся от другого event loop"""
+        session, loop = self._session, self._loop
+        self._session, self._loop = None, None
+        if session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # Loop жив в другом потоке (src/runtime.py): штатное закрытие в нём
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        # Loop завершён (asyncio.run): отсоединить коннектор и оборвать его соединения
+        print("[FETCH] Session belongs to another event loop, closing its connector")
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            task = asyncio.get_running_loop().create_task(_close_connector(connector))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+    
+    async def fetch(self, url: str, params: Optional[Dict] = None, timeout: float = 15,
+                    conditional: bool = True) -> FetchResult:
+        """GET с условными заголовками; 304 — FetchResult с пустым телом.
+
+        Валидаторы ответа не запоминаются: их сохраняет вызывающий после
+        обработки страницы. Ошибки сети и таймауты пробрасываются,
+        ResponseTooLarge — при превышении max_bytes.
+        """
+        key = request_key(url, params)
+        headers = self.validators.headers(key) if conditional else {}
+        start = time.perf_counter()
+        async with self.session().get(
+            url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            wire_bytes = resp.content_length
+            if resp.status == 304:
+                return FetchResult(304, b"", time.perf_counter() - start, wire_bytes, key=key)
+            if wire_bytes is not None and wire_bytes > self.max_bytes:
+                raise ResponseTooLarge(url, wire_bytes, self.max_bytes)
+
+            chunks = []
+            size = 0
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ResponseTooLarge(url, size, self.max_bytes)
+                chunks.append(chunk)
+
+            return FetchResult(
+                resp.status, b"".join(chunks), time.perf_counter() - start, wire_bytes,
+                resp.charset or "utf-8", key,
+                response_validators(resp.headers) if resp.status == 200 else {},
+            )
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Задачи закрытия коннекторов (ссылки, пока задачи не завершены)
+_closing: Set[asyncio.Task] = set()
+
+
+async def _close_connector(connector: aiohttp.BaseConnector):
+    try:
+        await connector.close()
+    except Exception as e:
+        print(f"[FETCH] Connector close error: {e}")
+
+
+# Движок процесса: переживает вызовы cron на тёплом инстансе
+shared_engine = FetchEngine()
@@ -0,0 +1,216 @@
+"""
+Профили фильтрации сообщений с конфигурацией в Postgres.
+
+Профиль — категории с ключевыми словами, стоп-слова и индикаторы
+(признаки вакансии или заказа): "jobs" для src/parser.py и "orders" для
+api/cron.py. Значения по умолчанию — из src/config.py; администратор
+меняет профиль командой /filter, изменение сохраняется в таблицу
+filter_config с новой версией.
+
+Каждый процесс держит скомпилированные профили в filter_registry и раз в
+проход сверяет версии одним запросом (refresh): перекомпилируется только
+изменённый профиль, на горячем пути — только поиск по готовым регулярным
+выражениям в уже приведённом к нижнему регистру тексте.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.config import (
+    JOB_INDICATORS, KEYWORDS, ORDER_INDICATORS, ORDER_KEYWORDS, ORDER_STOP_WORDS, STOP_WORDS,
+)
+from src.metrics import metrics
+
+
+@dataclass
+class FilterConfig:
+    """Правила профиля в исходном виде (то, что хранится в filter_config)"""
+    keywords: Dict[str, List[str]] = field(default_factory=dict)
+    stop_words: List[str] = field(default_factory=list)
+    indicators: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {"keywords": self.keywords, "stop_words": self.stop_words, "indicators": self.indicators}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FilterConfig":
+        return cls(
+            keywords={category: list(words) for category, words in (data.get("keywords") or {}).items()},
+            stop_words=list(data.get("stop_words") or []),
+            indicators=list(data.get("indicators") or []),
+        )
+
+
+DEFAULT_PROFILES = {
+    "jobs": FilterConfig(KEYWORDS, STOP_WORDS, JOB_INDICATORS),
+    "orders": FilterConfig(ORDER_KEYWORDS, ORDER_STOP_WORDS, ORDER_INDICATORS),
+}
+
+
+def _compile(words: List[str]) -> Optional["re.Pattern"]:
+    """Одно выражение на группу слов: поиск подстрок одним проходом в C"""
+    words = sorted({word.lower() for word in words if word}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in words))
+
+
+class CompiledFilter:
+    """Профиль, готовый к проверке сообщений"""
+
+    def __init__(self, name: str, config: FilterConfig, version: int = 0):
+        self.name = name
+        self.config = config
+        self.version = version
+        self._stop = _compile(config.stop_words)
+        self._categories = [
+            (category, pattern)
+            for category, pattern in ((c, _compile(words)) for c, words in config.keywords.items())
+            if pattern
+        ]
+        self._indicators = _compile(config.indicators)
+
+    def check(self, text: str) -> Tuple[bool, List[str]]:
+        """(подходит ли сообщение, найденные категории)"""
+        return self.check_lower(text.lower())
+
+    def check_lower(self, text_lower: str) -> Tuple[bool, List[str]]:
+        """То же для текста, уже приведённого к нижнему регистру"""
+        # Проверяем стоп-слова
+        if self._stop and self._stop.search(text_lower):
+            return False, []
+
+        # Категории, хотя бы одно слово которых есть в тексте
+        found = [category for category, pattern in self._categories if pattern.search(text_lower)]
+        if not found:
+            return False, []
+
+        # Должен быть хотя бы один индикатор
+        has_indicator = bool(self._indicators and self._indicators.search(text_lower))
+        return has_indicator, found
+
+
+def check_profiles(profiles: List[CompiledFilter], text: str) -> Tuple[List[str], List[str]]:
+    """Проверка сообщения сразу несколькими профилями.
+
+    Возвращает имена подошедших профилей и объединение их категорий.
+    """
+    text_lower = text.lower()
+    matched: List[str] = []
+    categories: List[str] = []
+    for profile in profiles:
+        ok, found = profile.check_lower(text_lower)
+        if ok:
+            matched.append(profile.name)
+            categories.extend(category for category in found if category not in categories)
+    return matched, categories
+
+
+class FilterRegistry:
+    """Кэш скомпилированных профилей по версиям из filter_config"""
+
+    def __init__(self, defaults: Dict[str, FilterConfig] = DEFAULT_PROFILES):
+        self.defaults = defaults
+        self._compiled: Dict[str, CompiledFilter] = {}
+
+    def get(self, name: str) -> CompiledFilter:
+        """Профиль из кэша (до первого refresh — значения по умолчанию)"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = self._compiled[name] = CompiledFilter(name, self.defaults[name])
+        return compiled
+
+    def names(self) -> List[str]:
+        return sorted(set(self.defaults) | set(self._compiled))
+
+    def categories(self) -> List[str]:
+        """Категории всех профилей (для cat: в фильтрах и подписках)"""
+        return sorted({category for name in self.names() for category in self.get(name).config.keywords})
+
+    async def refresh(self, db) -> List[str]:
+        """Сверка версий одним запросом; перекомпилируются только изменённые профили.
+
+        Возвращает имена перезагруженных профилей. При ошибке БД остаются
+        закэшированные правила.
+        """
+        try:
+            versions = await db.get_filter_versions()
+        except Exception as e:
+            print(f"[FILTERS] Version check failed: {e}")
+            return []
+
+        reloaded = []
+        for name in sorted(set(self.defaults) | set(versions)):
+            version = versions.get(name, 0)
+            cached = self._compiled.get(name)
+            if cached is not None and cached.version == version:
+                continue
+            if cached is None and version == 0:
+                continue
+            config = self.defaults.get(name, FilterConfig())
+            if version:
+                stored = await db.get_filter_config(name)
+                if stored is None:
+                    continue
+                data, version = stored
+                config = FilterConfig.from_dict(data)
+            self._compiled[name] = CompiledFilter(name, config, version)
+            reloaded.append(name)
+
+        if reloaded:
+            metrics.inc("filter_reloads_total", len(reloaded))
+            print(f"[FILTERS] Reloaded: {', '.join(reloaded)}")
+        return reloaded
+
+
+filter_registry = FilterRegistry()
+
+
+FILTER_FIELDS = ("stop", "indicator")
+
+FILTER_EDIT_HELP = (
+    "/filter — профили и версии\n"
+    "/filter &lt;профиль&gt; — правила профиля\n"
+    "/filter &lt;профиль&gt; add|remove stop|indicator|cat:&lt;категория&gt; слово \"фраза\" ...\n"
+    "/filter &lt;профиль&gt; reset — вернуть значения по умолчанию"
+)
+
+
+def edit_config(config: FilterConfig, action: str, target: str, words: List[str]) -> FilterConfig:
+    """Новая конфигурация после add/remove слов; ValueError при некорректной команде"""
+    if action not in ("add", "remove"):
+        raise ValueError("Действие должно быть add или remove")
+    words = [word.strip().lower() for word in words if word.strip()]
+    if not words:
+        raise ValueError("Не указаны слова")
+
+    result = FilterConfig.from_dict(config.to_dict())
+    if target == "stop":
+        current = result.stop_words
+    elif target == "indicator":
+        current = result.indicators
+    elif target.startswith("cat:") and len(target) > len("cat:"):
+        category = target[len("cat:"):]
+        if action == "remove" and category not in result.keywords:
+            raise ValueError(f"Нет категории {category}")
+        current = result.keywords.setdefault(category, [])
+    else:
+        raise ValueError(f"Поле должно быть {', '.join(FILTER_FIELDS)} или cat:<категория>")
+
+    if action == "add":
+        current.extend(word for word in words if word not in current)
+    else:
+        current[:] = [word for word in current if word not in words]
+    # Категория без слов не нужна
+    result.keywords = {category: items for category, items in result.keywords.items() if items}
+    return result
+
+
+def describe_config(config: FilterConfig) -> str:
+    """Правила профиля текстом (для /filter <профиль>)"""
+    lines = []
+    for category, words in config.keywords.items():
+        lines.append(f"cat:{category}: {', '.join(words)}")
+    lines.append(f"stop: {', '.join(config.stop_words)}")
+    lines.append(f"indicator: {', '.join(config.indicators)}")
+    return "\n".join(lines)
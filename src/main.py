@@ -1,14 +1,39 @@
 """
 Локальный запуск Telegram-бота через long polling.
 
-Используется для разработки и тестирования на локальной машине.
+Используется для разработки и тестирования на локальной машине, а также
+как долгоживущий демон: параллельно с polling в том же event loop каждые
+PARSE_INTERVAL минут запускается парсинг каналов, новые вакансии сразу
+уходят администратору.
 """
 import asyncio
 from typing import Optional
 
-from src.config import BOT_TOKEN, DATABASE_URL
+from aiogram import Bot
+
+from src.config import BOT_TOKEN, ADMIN_ID, DATABASE_URL, PARSE_INTERVAL
 from src.database import Database
-from src.bot import create_bot, set_database
+from src.parser import TelegramParser
+from src.pipeline import CrawlScheduler, run_crawl
+from src.profiling import profile_run
+from src.snapshots import create_store
+from src.bot import (
+    create_bot, set_database, set_crawl_trigger, send_digest_to_admin, subscriber_sender,
+)
+
+
+async def crawl_and_notify(parser: TelegramParser, db: Database, bot: Bot):
+    """Проход парсинга, рассылка подписчикам и отправка новых вакансий администратору"""
+    with profile_run("crawl") as profiler:
+        result = await run_crawl(parser, db, send=subscriber_sender(bot))
+    if profiler:
+        await bot.send_message(ADMIN_ID, profiler.summary_html(), parse_mode="HTML")
+    
+    new_jobs = result["new"]
+    if new_jobs:
+        await send_digest_to_admin(bot, new_jobs)
+        await db.mark_jobs_sent([j["id"] for j in new_jobs])
+    return result
 
 
 async def main():
@@ -28,11 +53,25 @@ async def main():
         print("[LOCAL] WARNING: DATABASE_URL не задан, часть команд (stats/digest/export) работать не будет")
 
     bot, dp = create_bot()
+
+    # Фоновый парсинг использует тот же пул БД и ту же сессию бота
+    parser = TelegramParser(snapshots=create_store(db=db))
+    scheduler: Optional[CrawlScheduler] = None
+    if db and PARSE_INTERVAL > 0:
+        scheduler = CrawlScheduler(lambda: crawl_and_notify(parser, db, bot), PARSE_INTERVAL)
+        scheduler.start()
+        set_crawl_trigger(scheduler.trigger)
+        print(f"[LOCAL] Background crawling every {PARSE_INTERVAL} min")
+
     print("[LOCAL] Bot is starting via long polling...")
 
     try:
         await dp.start_polling(bot)
     finally:
+        if scheduler:
+            await scheduler.stop()
+            print("[LOCAL] Background crawling stopped")
+        await parser.close()
         if db and db.pool:
             await db.close()
             print("[LOCAL] Database connection closed")
@@ -40,5 +79,3 @@ async def main():
 
 if __name__ == "__main__":
     asyncio.run(main())
-
-
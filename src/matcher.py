@@ -0,0 +1,68 @@
+"""
+Поиск множества подстрок за один проход по тексту (автомат Ахо — Корасик).
+
+Фильтры репозитория проверяют слова как подстроки (`word in text_lower`),
+поэтому стоимость растёт с числом слов. Автомат строится один раз по всем
+словам и находит все вхождения за время, пропорциональное длине текста
+и числу найденных слов, сколько бы слов ни было в словаре.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class AhoCorasick:
+    def __init__(self, words: Iterable[str]):
+        # Переходы бора, суффиксные ссылки и слова, заканчивающиеся в состоянии
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+        self.words: Set[str] = set()
+
+        for word in words:
+            word = word.lower()
+            if not word or word in self.words:
+                continue
+            self.words.add(word)
+            state = 0
+            for char in word:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (word,)
+
+        self._build_links()
+
+    def _build_links(self):
+        """Суффиксные ссылки обходом в ширину; выходы наследуются по ссылке"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                link = self._goto[fail].get(char, 0)
+                self._fail[nxt] = link if link != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def find(self, text: str) -> Set[str]:
+        """Все слова словаря, входящие в text как подстроки (без учёта регистра)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
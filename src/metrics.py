@@ -0,0 +1,148 @@
+"""
+Лёгкая инструментация: счётчики, gauge-метрики и гистограммы длительностей.
+
+Метрики живут в памяти процесса (глобальный объект `metrics`) и отдаются
+как JSON (ответ cron) или в текстовом формате Prometheus (/metrics).
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+
+PREFIX = "jobbot_"
+
+# Границы корзин гистограмм, секунды
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "max": round(self.max, 4),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def reset(self):
+        """Сброс всех метрик (например, в начале прохода cron)"""
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Замер длительности блока в гистограмму name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, stage: str):
+        """Замер длительности этапа конвейера (fetch, parse, filter, dedup, insert, send)"""
+        return self.timer("stage_seconds", stage=stage)
+
+    def snapshot(self) -> Dict:
+        """Метрики в виде JSON-совместимого словаря"""
+        def flat(series: Dict[str, Dict[LabelKey, float]]) -> Dict[str, float]:
+            return {
+                name + _format_labels(key): round(value, 4)
+                for name, values in sorted(series.items())
+                for key, value in sorted(values.items())
+            }
+
+        stages = {
+            dict(key)["stage"]: histogram.to_dict()
+            for key, histogram in self.histograms.get("stage_seconds", {}).items()
+        }
+        histograms = {
+            name + _format_labels(key): histogram.to_dict()
+            for name, values in sorted(self.histograms.items())
+            if name != "stage_seconds"
+            for key, histogram in sorted(values.items())
+        }
+        return {
+            "stages": stages,
+            "counters": flat(self.counters),
+            "gauges": flat(self.gauges),
+            "histograms": histograms,
+        }
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus (exposition format 0.0.4)"""
+        lines: List[str] = []
+        for name, values in sorted(self.counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for key, value in sorted(values.items()):
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value:g}")
+        for name, values in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for key, value in sorted(values.items()):
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value:g}")
+        for name, values in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for key, histogram in sorted(values.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = 'le="%g"' % bound
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, le)} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
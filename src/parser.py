@@ -1,139 +1,206 @@
 """
 Парсер Telegram каналов через публичный веб-интерфейс
 """
-import aiohttp
 import asyncio
 import re
 import hashlib
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 from difflib import SequenceMatcher
 from datetime import datetime
-from src.config import CHANNELS, KEYWORDS, STOP_WORDS, SIMILARITY_THRESHOLD
+from html import unescape
+from src.config import CHANNELS, FILTER_PROFILES, SIMILARITY_THRESHOLD, TELEGRAM_WEB_BASE
+from src.extract import extract_fields
+from src.fetch import FetchEngine
+from src.filters import check_profiles, filter_registry
+from src.metrics import metrics
+
+
+POST_PATTERN = re.compile(r'data-post="([^"]+)"')
+TEXT_PATTERN = re.compile(r'<div class="tgme_widget_message_text[^"]*"[^>]*>(.*?)</div>', re.DOTALL)
+BR_PATTERN = re.compile(r'<br\s*/?>')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+SPACES_PATTERN = re.compile(r'\s+')
+TIME_PATTERN = re.compile(r'<time datetime="([^"]+)"')
 
 
 class TelegramParser:
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-    
-    async def get_session(self) -> aiohttp.ClientSession:
-        if not self.session or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-            )
-        return self.session
+    """Конвейер загрузки и разбора каналов, общий для src/main.py и api/cron.py.
+    
+    profiles — профили фильтрации из src/filters.py, проверяемые за один
+    проход; fetcher — внешний движок загрузки src/fetch.py (не закрывается
+    парсером), по умолчанию — свой, живущий до close().
+    """
+    
+    def __init__(self, web_base: str = TELEGRAM_WEB_BASE, batch_size: int = 5,
+                 batch_pause: float = 1.0, snapshots=None,
+                 profiles: Sequence[str] = FILTER_PROFILES,
+                 fetcher: Optional[FetchEngine] = None,
+                 timeout: float = 15, max_posts: int = 20):
+        self.fetcher = fetcher or FetchEngine()
+        self._own_fetcher = fetcher is None
+        self.web_base = web_base.rstrip("/")
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        # Архив загруженных страниц (src/snapshots.py), None — не сохранять
+        self.snapshots = snapshots
+        self.profiles = list(profiles)
+        self.timeout = timeout
+        # Сколько последних постов страницы разбирать
+        self.max_posts = max_posts
+        # Сообщений разобрано за последний parse_all_channels
+        self.messages_parsed = 0
+        # Валидаторы страниц последнего прохода (канал → ключ, ETag/Last-Modified):
+        # запоминаются commit_validators только после сохранения результата,
+        # иначе 304 следующего прохода скрыл бы непосчитанные посты
+        self.pending_validators: Dict[str, Tuple[str, Dict[str, str]]] = {}
     
     async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        if self._own_fetcher:
+            await self.fetcher.close()
+    
+    def commit_validators(self):
+        """Запомнить валидаторы страниц прохода: следующий запрос будет условным"""
+        for key, validators in self.pending_validators.values():
+            self.fetcher.validators.remember(key, validators)
+        self.pending_validators.clear()
     
     def extract_channel_name(self, url: str) -> str:
         """Извлечение имени канала из URL"""
         match = re.search(r't\.me/([^/]+)', url)
         return match.group(1) if match else url
     
-    async def parse_channel(self, channel_url: str) -> List[Dict]:
-        """Парсинг одного канала через t.me/s/"""
-        channel_name = self.extract_channel_name(channel_url)
-        web_url = f"https://t.me/s/{channel_name}"
+    async def fetch_page(self, channel_name: str, before: Optional[int] = None,
+                         conditional: bool = True) -> Optional[str]:
+        """Загрузка страницы канала (before — только посты с id меньше него).
+        
+        None — ошибка или страница не изменилась с прошлой загрузки (304):
+        её посты уже разобраны. conditional=False — всегда полное тело.
+        """
+        web_url = f"{self.web_base}/{channel_name}"
+        params = {"before": before} if before else None
         
         try:
-            session = await self.get_session()
-            async with session.get(web_url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status != 200:
-                    print(f"Channel {channel_name}: status {resp.status}")
-                    return []
-                
-                html = await resp.text()
-                return self.parse_html(html, channel_name)
+            result = await self.fetcher.fetch(
+                web_url, params=params, timeout=self.timeout, conditional=conditional
+            )
+            metrics.inc("fetch_requests_total", status=result.status)
+            metrics.observe("fetch_seconds", result.seconds, channel=channel_name)
+            if result.wire_bytes is not None:
+                metrics.inc("fetch_wire_bytes_total", result.wire_bytes)
+            if result.not_modified:
+                metrics.inc("fetch_not_modified_total")
+                return None
+            if result.status != 200:
+                print(f"Channel {channel_name}: status {result.status}")
+                return None
+            metrics.inc("fetch_bytes_total", len(result.body))
+            if conditional:
+                self.pending_validators[channel_name] = (result.key, result.validators)
+            
+            if self.snapshots:
+                try:
+                    await self.snapshots.save(channel_name, result.body)
+                except Exception as e:
+                    metrics.inc("snapshot_errors_total")
+                    print(f"Snapshot error {channel_name}: {e}")
+            return result.text
         except asyncio.TimeoutError:
+            metrics.inc("fetch_errors_total", error="timeout")
             print(f"Timeout parsing {channel_name}")
-            return []
+            return None
         except Exception as e:
+            metrics.inc("fetch_errors_total", error=type(e).__name__)
             print(f"Error parsing {channel_name}: {e}")
+            return None
+    
+    async def parse_channel(self, channel_url: str) -> List[Dict]:
+        """Парсинг одного канала через t.me/s/"""
+        channel_name = self.extract_channel_name(channel_url)
+        html = await self.fetch_page(channel_name)
+        if html is None:
             return []
+        
+        try:
+            with metrics.stage("parse"):
+                return self.parse_html(html, channel_name)
+        except Exception:
+            # Страница не разобрана — не помечать её как уже обработанную
+            self.pending_validators.pop(channel_name, None)
+            raise
+    
+    def page_bounds(self, html: str) -> Tuple[Optional[int], Optional[int], Optional[datetime]]:
+        """Самый старый и самый новый id поста и самая ранняя дата на странице"""
+        ids = [int(post_id) for post_id in re.findall(r'data-post="[^"/]+/(\d+)"', html)]
+        if not ids:
+            return None, None, None
+        dates = re.findall(r'<time datetime="([^"]+)"', html)
+        oldest_date = min(datetime.fromisoformat(d) for d in dates) if dates else None
+        return min(ids), max(ids), oldest_date
     
     def parse_html(self, html: str, channel_name: str) -> List[Dict]:
-        """Парсинг HTML страницы канала"""
-        messages = []
-        
-        # Ищем блоки сообщений
-        message_pattern = r'<div class="tgme_widget_message_wrap[^"]*"[^>]*data-post="([^"]+)"[^>]*>(.*?)</div>\s*</div>\s*</div>'
-        
-        # Упрощённый паттерн для текста
-        text_pattern = r'<div class="tgme_widget_message_text[^"]*"[^>]*>(.*?)</div>'
+        """Парсинг HTML страницы канала.
         
-        # Ищем все посты
-        post_pattern = r'data-post="([^"]+)"'
-        posts = re.findall(post_pattern, html)
-        
-        # Ищем тексты сообщений
-        texts = re.findall(text_pattern, html, re.DOTALL)
+        Текст ищется внутри блока своего поста (от data-post до следующего),
+        поэтому посты без текста (только фото) не сдвигают тексты соседей.
+        """
+        messages = []
+        posts = list(POST_PATTERN.finditer(html))[-self.max_posts:]
         
-        for i, post_id in enumerate(posts[-20:]):  # Последние 20 сообщений
-            if i < len(texts):
-                text = self.clean_html(texts[i])
-                if text and len(text) > 50:  # Минимальная длина
-                    message_id = int(post_id.split('/')[-1]) if '/' in post_id else 0
-                    messages.append({
-                        "message_id": message_id,
-                        "channel": channel_name,
-                        "text": text,
-                        "url": f"https://t.me/{post_id}"
-                    })
+        for n, post in enumerate(posts):
+            end = posts[n + 1].start() if n + 1 < len(posts) else len(html)
+            match = TEXT_PATTERN.search(html, post.end(), end)
+            if not match:
+                continue
+            text = self.clean_html(match.group(1))
+            if text and len(text) > 50:  # Минимальная длина
+                post_id = post.group(1)
+                message_id = int(post_id.split('/')[-1]) if '/' in post_id else 0
+                # Дата поста — в подвале того же блока (для свежести в src/scoring.py)
+                date = TIME_PATTERN.search(html, match.end(), end)
+                messages.append({
+                    "message_id": message_id,
+                    "channel": channel_name,
+                    "text": text,
+                    "url": f"https://t.me/{post_id}",
+                    "posted_at": date.group(1) if date else None,
+                })
         
         return messages
     
     def clean_html(self, html: str) -> str:
         """Очистка HTML от тегов"""
         # Заменяем <br> на переносы
-        text = re.sub(r'<br\s*/?>', '\n', html)
+        text = BR_PATTERN.sub('\n', html)
         # Убираем все теги
-        text = re.sub(r'<[^>]+>', '', text)
-        # Декодируем HTML entities
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&amp;', '&')
-        text = text.replace('&lt;', '<')
-        text = text.replace('&gt;', '>')
-        text = text.replace('&quot;', '"')
+        text = TAG_PATTERN.sub('', text)
+        # Декодируем все HTML entities (&amp;, &#8594;, &nbsp; ...)
+        text = unescape(text)
         # Убираем лишние пробелы
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = SPACES_PATTERN.sub(' ', text).strip()
         return text
     
     def is_job_posting(self, text: str) -> Tuple[bool, List[str]]:
-        """Проверка, является ли текст вакансией"""
-        text_lower = text.lower()
-        
-        # Проверяем стоп-слова
-        for stop_word in STOP_WORDS:
-            if stop_word.lower() in text_lower:
-                return False, []
-        
-        # Ищем ключевые слова
-        found_keywords = []
-        for category, words in KEYWORDS.items():
-            for word in words:
-                if word.lower() in text_lower:
-                    found_keywords.append(category)
-                    break
-        
-        # Должно быть хотя бы одно ключевое слово
-        if not found_keywords:
-            return False, []
-        
-        # Дополнительные признаки вакансии
-        job_indicators = [
-            "ищем", "ищу", "требуется", "нужен", "вакансия", "работа",
-            "оплата", "бюджет", "зп", "зарплата", "оклад", "ставка",
-            "удалённо", "удаленно", "remote", "фриланс", "freelance",
-            "проект", "заказ", "задача", "тз", "разработка", "разработать",
-            "сделать", "создать", "написать", "нужно сделать"
-        ]
-        
-        has_indicator = any(ind in text_lower for ind in job_indicators)
+        """Проверка, является ли текст вакансией (первый профиль парсера)"""
+        return filter_registry.get(self.profiles[0]).check(text)
+    
+    def select_jobs(self, messages: List[Dict]) -> List[Dict]:
+        """Сообщения, прошедшие хотя бы один профиль, с keywords, profiles,
+        text_hash и полями из src/extract.py.
         
-        return has_indicator, list(set(found_keywords))
+        Все профили парсера проверяются за один проход по сообщениям,
+        текст приводится к нижнему регистру один раз.
+        """
+        compiled = [filter_registry.get(name) for name in self.profiles]
+        jobs = []
+        for msg in messages:
+            profiles, keywords = check_profiles(compiled, msg["text"])
+            if profiles:
+                msg["profiles"] = profiles
+                msg["keywords"] = keywords
+                msg["text_hash"] = self.calculate_hash(msg["text"])
+                msg.update(extract_fields(msg["text"]))
+                jobs.append(msg)
+        return jobs
     
     def calculate_hash(self, text: str) -> str:
         """Вычисление хеша текста для дедупликации"""
@@ -154,28 +221,30 @@ class TelegramParser:
                 return True
         return False
     
-    async def parse_all_channels(self) -> List[Dict]:
+    async def parse_all_channels(self, channels: Optional[List[str]] = None) -> List[Dict]:
         """Парсинг всех каналов"""
+        channels = CHANNELS if channels is None else channels
         all_jobs = []
+        self.messages_parsed = 0
+        self.pending_validators = {}
         
-        # Парсим каналы пачками по 5
-        batch_size = 5
-        for i in range(0, len(CHANNELS), batch_size):
-            batch = CHANNELS[i:i + batch_size]
+        # Парсим каналы пачками по batch_size
+        batch_size = self.batch_size
+        for i in range(0, len(channels), batch_size):
+            batch = channels[i:i + batch_size]
             tasks = [self.parse_channel(url) for url in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            with metrics.stage("fetch"):
+                results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            for result in results:
-                if isinstance(result, list):
-                    for msg in result:
-                        is_job, keywords = self.is_job_posting(msg["text"])
-                        if is_job:
-                            msg["keywords"] = keywords
-                            msg["text_hash"] = self.calculate_hash(msg["text"])
-                            all_jobs.append(msg)
+            with metrics.stage("filter"):
+                for result in results:
+                    if isinstance(result, list):
+                        metrics.inc("messages_parsed_total", len(result))
+                        self.messages_parsed += len(result)
+                        all_jobs.extend(self.select_jobs(result))
             
             # Пауза между пачками
-            await asyncio.sleep(1)
+            await asyncio.sleep(self.batch_pause)
         
-        await self.close()
+        # Движок не закрывается: соединения переиспользуются следующим проходом
         return all_jobs
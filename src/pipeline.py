@@ -0,0 +1,149 @@
+"""
+Конвейер парсинга: каналы → фильтр → дедупликация → БД,
+и планировщик для его периодического запуска в фоне.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from src.config import JOBS_RETENTION_MONTHS, SIMILARITY_WINDOW
+from src.database import Database
+from src.filters import filter_registry
+from src.metrics import metrics
+from src.parser import TelegramParser
+from src.retention import apply_retention
+from src.scoring import score_new_jobs
+from src.subscriptions import SendFunc, notify_subscribers
+
+
+def dedup_jobs(parser: TelegramParser, jobs: List[Dict], existing_hashes: Set[str],
+               existing_texts: List[str]) -> List[Dict]:
+    """Отбрасывание дублей по хешу и по схожести текста.
+
+    existing_texts — от старых к новым; по схожести текст сравнивается только
+    с последними SIMILARITY_WINDOW. existing_hashes/existing_texts дополняются
+    принятыми вакансиями, чтобы дубли внутри одного прохода тоже отсекались.
+    """
+    candidates: List[Dict] = []
+    for job in jobs:
+        if job["text_hash"] in existing_hashes:
+            continue
+        if parser.is_similar_to_existing(job["text"], existing_texts[-SIMILARITY_WINDOW:]):
+            continue
+        candidates.append(job)
+        existing_hashes.add(job["text_hash"])
+        existing_texts.append(job["text"])
+    return candidates
+
+
+async def run_crawl(parser: TelegramParser, db: Database, channels: Optional[List[str]] = None,
+                    send: Optional[SendFunc] = None) -> Dict:
+    """Один проход парсинга со сохранением новых вакансий.
+
+    Общий для src/main.py и api/cron.py: фильтр → дедупликация → оценка →
+    вставка → рассылка подписчикам (если передан send) → обслуживание
+    архива и секций. Отчёт администратору — на стороне вызывающего.
+    """
+    # Правила могли измениться через /filter — сверяем версию одним запросом
+    await filter_registry.refresh(db)
+    jobs = await parser.parse_all_channels(channels)
+    metrics.inc("jobs_passed_filter_total", len(jobs))
+
+    with metrics.stage("dedup"):
+        # Существующие вакансии за последние 48 часов
+        existing_jobs = await db.get_similar_jobs(hours=48)
+        candidates = dedup_jobs(
+            parser,
+            jobs,
+            {j["text_hash"] for j in existing_jobs},
+            [j["text"] for j in existing_jobs],
+        )
+
+    candidates = await score_new_jobs(db, candidates)
+    with metrics.stage("insert"):
+        new_jobs = await db.add_jobs(candidates)
+    metrics.inc("jobs_new_total", len(new_jobs))
+    # Вакансии сохранены — страницы прохода можно запрашивать условно
+    parser.commit_validators()
+    print(f"[CRAWL] Passed filter: {len(jobs)}, new: {len(new_jobs)}")
+
+    subscribers = 0
+    if send and new_jobs:
+        try:
+            subscribers = (await notify_subscribers(db, send, new_jobs))["subscribers"]
+        except Exception as e:
+            print(f"[CRAWL] Subscribers delivery error: {e}")
+
+    if parser.snapshots:
+        try:
+            await parser.snapshots.prune()
+        except Exception as e:
+            print(f"[CRAWL] Snapshot prune error: {e}")
+
+    if JOBS_RETENTION_MONTHS:
+        try:
+            await apply_retention(db)
+        except Exception as e:
+            print(f"[CRAWL] Retention error: {e}")
+
+    return {
+        "messages": parser.messages_parsed,
+        "parsed": len(jobs),
+        "jobs": jobs,
+        "new": new_jobs,
+        "subscribers": subscribers,
+    }
+
+
+class CrawlScheduler:
+    """Периодический запуск конвейера в фоне на том же event loop.
+
+    Проходы стартуют с фиксированным интервалом; если предыдущий проход
+    ещё не завершён, очередной пропускается (без наложения).
+    """
+
+    def __init__(self, crawl: Callable[[], Awaitable[Dict]], interval_minutes: int):
+        self.crawl = crawl
+        self.interval = interval_minutes * 60
+        self._task: Optional[asyncio.Task] = None
+        self._current: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def trigger(self) -> bool:
+        """Запуск прохода вне расписания; False, если проход уже идёт"""
+        if self.running:
+            return False
+        self._current = asyncio.create_task(self._run_once())
+        return True
+
+    async def _run_once(self):
+        try:
+            await self.crawl()
+        except Exception as e:
+            print(f"[CRAWL] Error: {type(e).__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+    async def _loop(self):
+        while True:
+            if not self.trigger():
+                print("[CRAWL] Previous crawl is still running, skipping")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        """Остановка расписания и отмена текущего прохода"""
+        for task in (self._task, self._current):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._current = None
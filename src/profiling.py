@@ -0,0 +1,142 @@
+"""
+Профилирование проходов парсинга: cProfile (CPU) и tracemalloc (память).
+
+Включается переменной окружения PROFILE_CRAWL=1 (каждый проход) или
+командой администратора /profile (только следующий проход). Когда
+профилирование выключено, profile_run() возвращает nullcontext и
+накладных расходов нет.
+
+Результат сохраняется в PROFILE_DIR: <name>-<время>.prof (pstats, можно
+открыть в snakeviz) и <name>-<время>.txt (сводка и места аллокаций).
+"""
+import cProfile
+import html
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Optional
+
+from src.config import PROFILE_CRAWL, PROFILE_DIR
+
+
+# Сколько строк попадает в краткую сводку для бота
+SUMMARY_FUNCTIONS = 8
+SUMMARY_ALLOCATIONS = 5
+
+_requested = False
+
+
+def request_profile():
+    """Профилировать следующий проход парсинга"""
+    global _requested
+    _requested = True
+
+
+def is_profiling_requested() -> bool:
+    return PROFILE_CRAWL or _requested
+
+
+class RunProfiler:
+    def __init__(self, name: str):
+        self.name = name
+        self.profiler = cProfile.Profile()
+        self.summary: Optional[str] = None
+        self.path: Optional[str] = None
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def __enter__(self) -> "RunProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        elapsed = time.perf_counter() - self._start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        try:
+            self._save(elapsed, peak, snapshot)
+        except Exception as e:
+            print(f"[PROFILE] Error saving profile: {e}")
+        return False
+
+    def summary_html(self) -> str:
+        """Сводка для отправки в Telegram (parse_mode=HTML)"""
+        text = self.summary or "Профиль не сохранён"
+        return f"🔬 <b>Профиль прохода</b>\n<pre>{html.escape(text)}</pre>"
+
+    def _save(self, elapsed: float, peak: int, snapshot: tracemalloc.Snapshot):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        allocations = snapshot.statistics("lineno")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.TIME)
+
+        lines = [
+            f"{self.name}: {elapsed:.2f} с, пик памяти {peak / 1024 / 1024:.1f} МБ",
+            "",
+            "CPU (собственное время):",
+        ]
+        for func, (_, ncalls, tottime, cumtime, _) in _top_functions(stats, SUMMARY_FUNCTIONS):
+            lines.append(f"  {tottime:6.3f} с  {ncalls:>7}×  {_format_func(func)}")
+        lines.append("")
+        lines.append("Аллокации (живые на конец прохода):")
+        for stat in allocations[:SUMMARY_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:8.1f} КБ  {_short_path(frame.filename)}:{frame.lineno}")
+        self.summary = "\n".join(lines)
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        stats.dump_stats(base + ".prof")
+        stats.print_stats(40)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.summary + "\n\n")
+            f.write("Top 25 allocation sites:\n")
+            for stat in allocations[:25]:
+                f.write(f"{stat}\n")
+            f.write("\n")
+            f.write(stream.getvalue())
+        self.path = base + ".prof"
+        print(f"[PROFILE] Saved {self.path}")
+
+
+def _top_functions(stats: pstats.Stats, limit: int):
+    items = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    return items[:limit]
+
+
+def _format_func(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({_short_path(filename)}:{lineno})"
+
+
+def _short_path(path: str) -> str:
+    parts = path.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+
+def profile_run(name: str):
+    """Контекст профилирования прохода; nullcontext, если профилирование выключено"""
+    global _requested
+    if not is_profiling_requested():
+        return nullcontext()
+    _requested = False
+    return RunProfiler(name)
@@ -0,0 +1,25 @@
+"""
+Ограничение темпа запросов: backfill страниц t.me/s и рассылка подписчикам.
+"""
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Не больше concurrency запросов одновременно и rate запросов в секунду"""
+
+    def __init__(self, rate: float, concurrency: int):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._next = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
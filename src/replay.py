@@ -0,0 +1,146 @@
+"""
+Офлайн-повтор конвейера по архиву страниц (src/snapshots.py).
+
+Страницы из архива проходят parse_html → фильтр → дедупликацию тем же
+кодом, что и живой парсинг, но без сети и без пауз между пачками.
+Повторы одного поста в соседних загрузках отсекаются, как UNIQUE
+(channel, message_id) в БД; дедупликация по схожести сравнивает с
+принятыми за последние --window-hours (как run_crawl — с БД за 48 часов).
+
+Примеры:
+    python -m src.replay                                  # весь архив SNAPSHOT_STORE
+    python -m src.replay --since 2026-01-01 --until 2026-02-01
+    python -m src.replay --store db --channel devjobs --out accepted.jsonl
+    python -m src.replay --profile jobs --profile orders  # оба профиля за один проход
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from src.config import DATABASE_URL, FILTER_PROFILES, SNAPSHOT_DIR, SNAPSHOT_STORE
+from src.database import Database
+from src.filters import filter_registry
+from src.parser import TelegramParser
+from src.pipeline import dedup_jobs
+from src.snapshots import DbSnapshotStore, DiskSnapshotStore
+
+
+async def replay(store, parser: TelegramParser, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, channels=None, window_hours: int = 48,
+                 out=None) -> Dict:
+    """Прогон архива через конвейер; возвращает счётчики и время этапов"""
+    seconds = {"load": 0.0, "parse": 0.0, "filter": 0.0, "dedup": 0.0}
+    counts = {"pages": 0, "bytes": 0, "messages": 0, "unique_messages": 0, "passed_filter": 0, "accepted": 0}
+    seen = set()
+    window = deque()  # (fetched_at, text_hash, text) принятых вакансий
+    window_span = timedelta(hours=window_hours)
+
+    start = time.perf_counter()
+    mark = start
+    async for snapshot in store.iter(since, until, channels):
+        now = time.perf_counter()
+        seconds["load"] += now - mark
+        counts["pages"] += 1
+        counts["bytes"] += len(snapshot.body)
+
+        messages = parser.parse_html(snapshot.html, snapshot.channel)
+        mark = time.perf_counter()
+        seconds["parse"] += mark - now
+        counts["messages"] += len(messages)
+
+        unseen = []
+        for msg in messages:
+            key = (msg["channel"], msg["message_id"])
+            if key not in seen:
+                seen.add(key)
+                unseen.append(msg)
+        counts["unique_messages"] += len(unseen)
+        jobs = parser.select_jobs(unseen)
+        now = time.perf_counter()
+        seconds["filter"] += now - mark
+        counts["passed_filter"] += len(jobs)
+
+        while window and window[0][0] < snapshot.fetched_at - window_span:
+            window.popleft()
+        accepted = dedup_jobs(
+            parser, jobs, {item[1] for item in window}, [item[2] for item in window]
+        )
+        for job in accepted:
+            window.append((snapshot.fetched_at, job["text_hash"], job["text"]))
+            if out:
+                out.write(json.dumps({
+                    "fetched_at": snapshot.fetched_at.isoformat(),
+                    "channel": job["channel"],
+                    "message_id": job["message_id"],
+                    "profiles": job["profiles"],
+                    "keywords": job["keywords"],
+                    "text": job["text"],
+                }, ensure_ascii=False) + "\n")
+        mark = time.perf_counter()
+        seconds["dedup"] += mark - now
+        counts["accepted"] += len(accepted)
+
+    elapsed = time.perf_counter() - start
+    return {
+        **counts,
+        "wall_s": round(elapsed, 3),
+        "pages_per_s": round(counts["pages"] / elapsed, 1) if elapsed else 0.0,
+        "stages_s": {stage: round(value, 3) for stage, value in seconds.items()},
+    }
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+async def main_async(args) -> Dict:
+    db = None
+    if args.store == "db":
+        if not DATABASE_URL:
+            raise SystemExit("SNAPSHOT_STORE=db requires DATABASE_URL")
+        db = Database(DATABASE_URL)
+        store = DbSnapshotStore(db)
+        # Правила из filter_config; без БД — значения по умолчанию из кода
+        await filter_registry.refresh(db)
+    else:
+        store = DiskSnapshotStore(args.dir)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        return await replay(
+            store, TelegramParser(profiles=args.profile or FILTER_PROFILES), args.since, args.until, args.channel, args.window_hours, out
+        )
+    finally:
+        if out:
+            out.close()
+        if db:
+            await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", choices=["disk", "db"], default=SNAPSHOT_STORE or "disk")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="каталог архива для --store disk")
+    parser.add_argument("--since", type=parse_date, help="начало интервала (ISO, UTC)")
+    parser.add_argument("--until", type=parse_date, help="конец интервала (ISO, UTC), не включая")
+    parser.add_argument("--channel", action="append", help="только эти каналы")
+    parser.add_argument("--profile", action="append", help="профили фильтрации (по умолчанию FILTER_PROFILES)")
+    parser.add_argument("--window-hours", type=int, default=48, help="окно дедупликации по схожести")
+    parser.add_argument("--out", help="записать принятые вакансии в JSON Lines")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:<18}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Срок хранения вакансий: старые месячные секции jobs удаляются целиком.
+
+Таблица jobs секционирована по месяцам created_at (миграция 8), секции
+на текущий и следующий месяц создаёт Database.ensure_partitions. Секции
+старше JOBS_RETENTION_MONTHS полных месяцев отключаются от jobs
+(JOBS_RETENTION_MODE=detach — остаются отдельной таблицей) или удаляются
+(drop), при заданном JOBS_ARCHIVE_DIR — после выгрузки в
+<секция>.jsonl.gz. Это DDL без построчного DELETE: индексы горячих секций
+не растут с историей. Вместе с секциями удаляются ключи дедупликации
+job_keys и записи sent_digests старше той же границы.
+
+Запускается после каждого прохода парсинга (src/pipeline.py, api/cron.py),
+если JOBS_RETENTION_MONTHS > 0, или вручную.
+
+Примеры:
+    python -m src.retention --months 12 --dry-run
+    python -m src.retention --months 6 --archive-dir archive --mode detach
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from src.config import DATABASE_URL, JOBS_ARCHIVE_DIR, JOBS_RETENTION_MODE, JOBS_RETENTION_MONTHS
+from src.database import Database, add_months, month_start, partition_month
+from src.metrics import metrics
+
+RETENTION_MODES = ("drop", "detach")
+
+
+def retention_cutoff(months: int, now: Optional[datetime] = None) -> datetime:
+    """Граница хранения: начало месяца, months полных месяцев назад"""
+    return add_months(month_start(now or datetime.utcnow()), -months)
+
+
+def expired_partitions(names: List[str], cutoff: datetime) -> List[str]:
+    """Месячные секции, целиком лежащие до cutoff"""
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+async def export_partition(db: Database, name: str, archive_dir: str) -> int:
+    """Выгрузка секции в <archive_dir>/<name>.jsonl.gz; возвращает число строк"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+    tmp = f"{path}.tmp"
+    rows = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        async for row in db.iter_partition(name):
+            f.write(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n")
+            rows += 1
+    # Файл появляется целиком или не появляется: секция удаляется только после этого
+    os.replace(tmp, path)
+    return rows
+
+
+async def apply_retention(db: Database, months: int = JOBS_RETENTION_MONTHS,
+                          mode: str = JOBS_RETENTION_MODE,
+                          archive_dir: str = JOBS_ARCHIVE_DIR,
+                          dry_run: bool = False) -> Dict:
+    """Отключение или удаление секций jobs старше months полных месяцев"""
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"JOBS_RETENTION_MODE должен быть {' или '.join(RETENTION_MODES)}")
+    result = {"cutoff": None, "partitions": [], "archived_rows": 0, "job_keys": 0, "sent_digests": 0}
+    if months <= 0:
+        return result
+
+    cutoff = retention_cutoff(months)
+    result["cutoff"] = cutoff.date().isoformat()
+    expired = expired_partitions(await db.list_job_partitions(), cutoff)
+    result["partitions"] = expired
+    if dry_run:
+        return result
+
+    for name in expired:
+        if archive_dir:
+            rows = await export_partition(db, name, archive_dir)
+            result["archived_rows"] += rows
+            print(f"[RETENTION] Exported {name}: {rows} rows")
+        await db.detach_partition(name, drop=mode == "drop")
+        metrics.inc("partitions_removed_total", mode=mode)
+        print(f"[RETENTION] {'Dropped' if mode == 'drop' else 'Detached'} {name}")
+
+    result.update(await db.prune_job_history(cutoff))
+    return result
+
+
+async def main_async(args) -> Dict:
+    if not DATABASE_URL:
+        raise SystemExit("Переменная окружения DATABASE_URL не задана")
+    db = Database(DATABASE_URL)
+    try:
+        await db.init_tables()
+        return await apply_retention(
+            db, months=args.months, mode=args.mode, archive_dir=args.archive_dir,
+            dry_run=args.dry_run,
+        )
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=JOBS_RETENTION_MONTHS,
+                        help="сколько полных месяцев хранить (0 — хранить всё)")
+    parser.add_argument("--mode", choices=RETENTION_MODES, default=JOBS_RETENTION_MODE)
+    parser.add_argument("--archive-dir", default=JOBS_ARCHIVE_DIR,
+                        help="каталог для выгрузки секций в .jsonl.gz перед удалением")
+    parser.add_argument("--dry-run", action="store_true", help="только показать секции к удалению")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print(f"[RETENTION] {json.dumps(result, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
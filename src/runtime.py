@@ -0,0 +1,63 @@
+"""
+Долгоживущий event loop для serverless-обработчиков (api/webhook.py, api/cron.py).
+
+asyncio.run() на каждый вызов закрывает loop, а вместе с ним пул asyncpg
+и HTTP-сессии с их keep-alive соединениями. Один loop в фоновом потоке на
+процесс позволяет переиспользовать их между «тёплыми» вызовами инстанса.
+Ресурсы, зарегистрированные через on_shutdown, закрываются в этом loop при
+завершении процесса (atexit), а не бросаются открытыми.
+"""
+import asyncio
+import atexit
+import threading
+from typing import Awaitable, Callable, List, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_shutdown_callbacks: List[Callable[[], Awaitable]] = []
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Общий loop процесса (запускается при первом обращении)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="runtime-loop", daemon=True)
+            thread.start()
+    return _loop
+
+
+def run_sync(coro):
+    """Выполнение корутины в общем loop из синхронного обработчика"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def on_shutdown(callback: Callable[[], Awaitable]):
+    """Регистрация закрытия ресурса (повторная регистрация игнорируется)"""
+    if callback not in _shutdown_callbacks:
+        _shutdown_callbacks.append(callback)
+
+
+def shutdown(timeout: float = 5.0):
+    """Закрытие зарегистрированных ресурсов в общем loop (в обратном порядке) и его остановка"""
+    loop = _loop
+    if loop is None or loop.is_closed() or not loop.is_running():
+        return
+
+    async def close_all():
+        while _shutdown_callbacks:
+            callback = _shutdown_callbacks.pop()
+            try:
+                await callback()
+            except Exception as e:
+                print(f"[RUNTIME] Shutdown error: {e}")
+
+    try:
+        asyncio.run_coroutine_threadsafe(close_all(), loop).result(timeout)
+    except Exception as e:
+        print(f"[RUNTIME] Shutdown timeout or error: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(shutdown)
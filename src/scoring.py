@@ -0,0 +1,127 @@
+"""
+Оценка релевантности вакансии, вычисляемая один раз при сохранении.
+
+Релевантность складывается из найденных категорий и технологий, наличия
+бюджета и «урожайности» канала — сколько вакансий он дал за последние
+YIELD_DAYS дней относительно самого урожайного канала. Свежесть
+затухает экспоненциально с периодом полураспада SCORE_HALF_LIFE_HOURS:
+
+    decayed(now) = relevance · 2^(−(now − t) / H)
+
+Порядок по decayed не зависит от now, поэтому в колонку jobs.score
+пишется log2(relevance) + (t − SCORE_EPOCH) / H: вакансия на H часов
+новее весит вдвое больше. Дайджест берёт top-N по частичному индексу
+(score DESC) WHERE sent = FALSE без пересчёта в Python.
+"""
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.config import SCORE_HALF_LIFE_HOURS
+from src.metrics import metrics
+
+# Веса слагаемых релевантности (к базовой 1)
+WEIGHT_CATEGORY = 1.0
+WEIGHT_TECH = 0.5
+WEIGHT_BUDGET = 1.5
+WEIGHT_CHANNEL = 1.0
+# Сколько технологий учитывать: длинный список стека — не признак качества
+MAX_TECH = 4
+# Окно истории каналов для урожайности
+YIELD_DAYS = 30
+# Начало отсчёта времени в score: числа остаются небольшими
+SCORE_EPOCH = datetime(2024, 1, 1)
+# Вакансий на страницу при оценке уже сохранённых (rescore_unsent_jobs)
+RESCORE_BATCH = 1000
+
+
+def channel_yields(counts: Dict[str, int]) -> Dict[str, float]:
+    """Урожайность каналов в [0, 1]: log-шкала относительно лучшего канала"""
+    if not counts:
+        return {}
+    best = math.log1p(max(counts.values()))
+    if best <= 0:
+        return {channel: 0.0 for channel in counts}
+    return {channel: math.log1p(count) / best for channel, count in counts.items()}
+
+
+def posted_at(job: Dict) -> Optional[datetime]:
+    """Время публикации поста (naive UTC) из поля posted_at, если парсер его нашёл"""
+    value = job.get("posted_at")
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value) if isinstance(value, str) else value
+    except ValueError:
+        return None
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def relevance(job: Dict, yields: Dict[str, float]) -> float:
+    """Релевантность без учёта времени (не меньше 1)"""
+    value = 1.0
+    value += WEIGHT_CATEGORY * len(job.get("keywords") or [])
+    value += WEIGHT_TECH * min(len(job.get("tech") or []), MAX_TECH)
+    if job.get("budget_amount"):
+        value += WEIGHT_BUDGET
+    value += WEIGHT_CHANNEL * yields.get(job.get("channel"), 0.0)
+    return value
+
+
+def score_job(job: Dict, yields: Dict[str, float], now: Optional[datetime] = None,
+              half_life_hours: float = SCORE_HALF_LIFE_HOURS) -> float:
+    """log2(релевантность) + время публикации в периодах полураспада"""
+    now = now or datetime.utcnow()
+    moment = min(posted_at(job) or now, now)
+    hours = (moment - SCORE_EPOCH).total_seconds() / 3600
+    return math.log2(relevance(job, yields)) + hours / half_life_hours
+
+
+def score_jobs(jobs: List[Dict], yields: Dict[str, float],
+               now: Optional[datetime] = None) -> List[Dict]:
+    """Проставляет job["score"] всем вакансиям"""
+    now = now or datetime.utcnow()
+    for job in jobs:
+        job["score"] = score_job(job, yields, now)
+    return jobs
+
+
+async def score_new_jobs(db, jobs: List[Dict]) -> List[Dict]:
+    """Этап конвейера перед вставкой: урожайность каналов одним запросом и оценка.
+
+    При ошибке БД урожайность не учитывается, вакансии всё равно оцениваются.
+    """
+    if not jobs:
+        return jobs
+    try:
+        counts = await db.get_channel_counts(days=YIELD_DAYS)
+    except Exception as e:
+        print(f"[SCORE] Channel history unavailable: {e}")
+        counts = {}
+    with metrics.stage("score"):
+        return score_jobs(jobs, channel_yields(counts))
+
+
+async def rescore_unsent_jobs(db, batch: int = RESCORE_BATCH) -> int:
+    """Оценка всех неотправленных вакансий с score = 0 (сохранённых до колонки score).
+
+    Страницы по id, каждая записывается сразу: повторный вызов продолжает с
+    оставшихся. Время публикации — created_at; возвращает число оценённых.
+    """
+    jobs = await db.get_unscored_jobs(limit=batch)
+    if not jobs:
+        return 0
+    yields = channel_yields(await db.get_channel_counts(days=YIELD_DAYS))
+    now = datetime.utcnow()
+    total = 0
+    while jobs:
+        await db.update_job_scores({
+            job["id"]: score_job({**job, "posted_at": job["created_at"]}, yields, now)
+            for job in jobs
+        })
+        total += len(jobs)
+        jobs = await db.get_unscored_jobs(after_id=jobs[-1]["id"], limit=batch)
+    print(f"[SCORE] Rescored {total} unsent jobs")
+    return total
@@ -0,0 +1,153 @@
+"""
+Webhook-сервер на aiohttp для self-hosted деплоя.
+
+В отличие от api/webhook.py (одна синхронная функция Vercel на запрос),
+здесь все обновления обрабатываются в одном event loop: Telegram получает
+ответ сразу, а update передаётся общему Dispatcher фоновой задачей.
+Число одновременно обрабатываемых обновлений ограничено
+WEBHOOK_MAX_IN_FLIGHT; при переполнении сервер придерживает ответ,
+и Telegram сам снижает темп отправки.
+
+Запуск: python -m src.server
+"""
+import asyncio
+import hmac
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from src.config import (
+    BOT_TOKEN, DATABASE_URL, METRICS_TOKEN, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_SECRET, WEBHOOK_MAX_IN_FLIGHT,
+)
+from src.database import Database
+from src.bot import create_bot, set_database
+from src.metrics import metrics
+
+
+# Сколько ждать завершения обработки обновлений при остановке, секунд
+SHUTDOWN_TIMEOUT = 30
+
+
+class UpdateFeeder:
+    """Передача обновлений в Dispatcher с ограничением одновременных задач"""
+
+    def __init__(self, bot: Bot, dp: Dispatcher, max_in_flight: int):
+        self.bot = bot
+        self.dp = dp
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, update: Update):
+        """Запуск обработки; ждёт только если достигнут лимит in-flight"""
+        await self.semaphore.acquire()
+        metrics.inc("updates_total")
+        task = asyncio.create_task(self._process(update))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _process(self, update: Update):
+        try:
+            with metrics.timer("update_seconds"):
+                await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            metrics.inc("update_errors_total")
+            print(f"[SERVER] Error processing update {update.update_id}: {type(e).__name__}: {e}")
+        finally:
+            self.semaphore.release()
+
+    async def drain(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Ожидание обработки уже принятых обновлений"""
+        if self.tasks:
+            await asyncio.wait(set(self.tasks), timeout=timeout)
+
+
+FEEDER_KEY = web.AppKey("feeder", UpdateFeeder)
+DB_KEY = web.AppKey("db", Optional[Database])
+
+
+async def handle_update(request: web.Request) -> web.Response:
+    if WEBHOOK_SECRET:
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+            return web.Response(status=401)
+
+    feeder: UpdateFeeder = request.app[FEEDER_KEY]
+    try:
+        update = Update.model_validate(await request.json(), context={"bot": feeder.bot})
+    except Exception as e:
+        # Повторная отправка того же тела не поможет — подтверждаем и забываем
+        print(f"[SERVER] Bad update: {type(e).__name__}: {e}")
+        return web.json_response({"ok": True})
+
+    await feeder.submit(update)
+    return web.json_response({"ok": True})
+
+
+async def handle_status(request: web.Request) -> web.Response:
+    feeder: UpdateFeeder = request.app[FEEDER_KEY]
+    return web.json_response({"status": "active", "in_flight": len(feeder.tasks)})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return web.Response(status=401)
+
+    feeder: UpdateFeeder = request.app[FEEDER_KEY]
+    metrics.set("updates_in_flight", len(feeder.tasks))
+    return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def on_startup(app: web.Application):
+    db: Optional[Database] = None
+    if DATABASE_URL:
+        db = Database(DATABASE_URL)
+        await db.init_tables()
+        set_database(db)
+        print("[SERVER] Database initialized")
+    else:
+        print("[SERVER] WARNING: DATABASE_URL не задан, часть команд (stats/digest/export) работать не будет")
+
+    bot, dp = create_bot()
+    app[DB_KEY] = db
+    app[FEEDER_KEY] = UpdateFeeder(bot, dp, WEBHOOK_MAX_IN_FLIGHT)
+
+
+async def on_cleanup(app: web.Application):
+    feeder: UpdateFeeder = app[FEEDER_KEY]
+    await feeder.drain()
+    await feeder.bot.session.close()
+
+    db: Optional[Database] = app[DB_KEY]
+    if db and db.pool:
+        await db.close()
+        print("[SERVER] Database connection closed")
+
+
+def create_app() -> web.Application:
+    """Создание aiohttp-приложения с webhook-маршрутом"""
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle_update)
+    app.router.add_get(WEBHOOK_PATH, handle_status)
+    if METRICS_TOKEN:
+        app.router.add_get("/metrics", handle_metrics)
+    else:
+        print("[SERVER] METRICS_TOKEN и WEBHOOK_SECRET не заданы, GET /metrics отключён")
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    if not BOT_TOKEN:
+        raise RuntimeError("Переменная окружения BOT_TOKEN не задана")
+
+    print(f"[SERVER] Listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    web.run_app(create_app(), host=WEBHOOK_HOST, port=WEBHOOK_PORT, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Архив загруженных страниц t.me/s для офлайн-повтора конвейера.
+
+Тела страниц хранятся сжатыми (gzip) и адресуются по sha256 исходных
+байтов: одинаковая страница, загруженная несколько раз, хранится один
+раз, а каждая загрузка — запись (канал, время, ключ). Два бэкенда:
+каталог на диске и таблицы page_blobs/page_snapshots в Postgres.
+Ограничения хранения — по возрасту и по общему объёму.
+
+Повтор архива: python -m src.replay (см. src/replay.py).
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.config import SNAPSHOT_DIR, SNAPSHOT_MAX_AGE_DAYS, SNAPSHOT_MAX_MB, SNAPSHOT_STORE
+from src.database import Database
+from src.metrics import metrics
+
+
+@dataclass
+class Snapshot:
+    channel: str
+    fetched_at: datetime
+    key: str
+    body: bytes
+
+    @property
+    def html(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+def content_key(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class DiskSnapshotStore:
+    """Каталог: objects/<ab>/<sha256>.gz и журнал загрузок index.jsonl.
+
+    Файловые операции выполняются в потоке (asyncio.to_thread), чтобы не
+    останавливать event loop парсинга.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR, max_age_days: int = SNAPSHOT_MAX_AGE_DAYS,
+                 max_mb: int = SNAPSHOT_MAX_MB):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.max_age_days = max_age_days
+        self.max_bytes = max_mb * 1024 * 1024
+        # Дозапись журнала из разных потоков и его перезапись при prune
+        self._index_lock = threading.Lock()
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], f"{key}.gz")
+
+    async def save(self, channel: str, body: bytes, fetched_at: Optional[datetime] = None) -> str:
+        key = content_key(body)
+        fetched_at = fetched_at or datetime.utcnow()
+        stored = await asyncio.to_thread(self._save, channel, body, key, fetched_at)
+        metrics.inc("snapshots_saved_total")
+        metrics.inc("snapshot_bytes_stored_total", stored)
+        return key
+
+    def _save(self, channel: str, body: bytes, key: str, fetched_at: datetime) -> int:
+        path = self._blob_path(key)
+        stored = 0
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = gzip.compress(body)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            stored = len(data)
+        line = json.dumps({
+            "channel": channel,
+            "fetched_at": fetched_at.isoformat(),
+            "key": key,
+            "size": len(body),
+        }) + "\n"
+        with self._index_lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        return stored
+
+    def _read_index(self) -> List[Dict]:
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _read_blob(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                return gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+    async def iter(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   channels: Optional[List[str]] = None) -> AsyncIterator[Snapshot]:
+        entries = await asyncio.to_thread(self._read_index)
+        entries.sort(key=lambda e: e["fetched_at"])
+        for entry in entries:
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+            if since and fetched_at < since or until and fetched_at >= until:
+                continue
+            if channels and entry["channel"] not in channels:
+                continue
+            body = await asyncio.to_thread(self._read_blob, entry["key"])
+            if body is None:
+                continue
+            yield Snapshot(entry["channel"], fetched_at, entry["key"], body)
+
+    async def prune(self) -> int:
+        """Удаление загрузок по возрасту и объёму; возвращает число удалённых"""
+        removed = await asyncio.to_thread(self._prune)
+        if removed:
+            print(f"[SNAPSHOTS] Pruned {removed} snapshots")
+        return removed
+
+    def _prune(self) -> int:
+        with self._index_lock:
+            entries = self._read_index()
+            cutoff = (datetime.utcnow() - timedelta(days=self.max_age_days)).isoformat()
+            kept = [e for e in entries if e["fetched_at"] >= cutoff]
+
+            # Сверх объёма удаляем самые старые; тело считается один раз
+            kept.sort(key=lambda e: e["fetched_at"], reverse=True)
+            sizes: Dict[str, int] = {}
+            total = 0
+            limited = []
+            for entry in kept:
+                key = entry["key"]
+                if key not in sizes:
+                    try:
+                        sizes[key] = os.path.getsize(self._blob_path(key))
+                    except OSError:
+                        continue
+                    total += sizes[key]
+                if total > self.max_bytes:
+                    break
+                limited.append(entry)
+            limited.reverse()
+
+            removed = len(entries) - len(limited)
+            if not removed:
+                return 0
+
+            tmp = f"{self.index_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in limited:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp, self.index_path)
+
+        referenced = {e["key"] for e in limited}
+        for entry in entries:
+            if entry["key"] not in referenced:
+                try:
+                    os.remove(self._blob_path(entry["key"]))
+                except FileNotFoundError:
+                    pass
+                referenced.add(entry["key"])
+        return removed
+
+
+class DbSnapshotStore:
+    """Таблицы page_blobs (тела) и page_snapshots (загрузки), см. миграцию 2"""
+
+    def __init__(self, db: Database, max_age_days: int = SNAPSHOT_MAX_AGE_DAYS,
+                 max_mb: int = SNAPSHOT_MAX_MB):
+        self.db = db
+        self.max_age_days = max_age_days
+        self.max_bytes = max_mb * 1024 * 1024
+
+    async def save(self, channel: str, body: bytes, fetched_at: Optional[datetime] = None) -> str:
+        key = content_key(body)
+        data = gzip.compress(body)
+        await self.db.save_snapshot(channel, key, data, len(body), fetched_at or datetime.utcnow())
+        metrics.inc("snapshots_saved_total")
+        return key
+
+    async def iter(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   channels: Optional[List[str]] = None) -> AsyncIterator[Snapshot]:
+        async for row in self.db.iter_snapshots(since, until, channels):
+            yield Snapshot(row["channel"], row["fetched_at"], row["blob_key"], gzip.decompress(row["body"]))
+
+    async def prune(self) -> int:
+        removed = await self.db.prune_snapshots(self.max_age_days, self.max_bytes)
+        if removed:
+            print(f"[SNAPSHOTS] Pruned {removed} snapshots")
+        return removed
+
+
+def create_store(kind: str = SNAPSHOT_STORE, db: Optional[Database] = None):
+    """Хранилище по SNAPSHOT_STORE; None, если архив выключен"""
+    if kind == "disk":
+        return DiskSnapshotStore()
+    if kind == "db":
+        if db is None:
+            print("[SNAPSHOTS] SNAPSHOT_STORE=db requires DATABASE_URL, snapshots disabled")
+            return None
+        return DbSnapshotStore(db)
+    if kind:
+        print(f"[SNAPSHOTS] Unknown SNAPSHOT_STORE={kind!r}, snapshots disabled")
+    return None
@@ -0,0 +1,246 @@
+"""
+Подписки пользователей: маршрутизация новых вакансий и пакетная доставка.
+
+У каждого подписчика свои категории, ключевые слова и стоп-слова (таблица
+subscriptions). Из всех подписок строится обратный индекс «слово →
+подписчики» и один автомат Ахо — Корасик (src/matcher.py) по всем словам:
+вакансия проходит по тексту один раз, и стоимость маршрутизации зависит
+от найденных в ней слов, а не от числа подписчиков. Каждому подписчику
+за проход уходит одно сообщение (или несколько, если не влезает) со всеми
+его вакансиями, а не по сообщению на вакансию.
+"""
+import asyncio
+import html
+import shlex
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from src.config import SUBSCRIBER_SEND_CONCURRENCY, SUBSCRIBER_SEND_RATE, SUBSCRIBER_SEND_RETRIES
+from src.matcher import AhoCorasick
+from src.metrics import metrics
+from src.ratelimit import RateLimiter
+
+# Ограничения на подписку: короткие слова совпадают почти с любым текстом
+MAX_TERMS = 50
+MIN_TERM_LENGTH = 2
+# Вакансий в сообщении подписчику за один проход и длина текста каждой
+DIGEST_LIMIT = 20
+DIGEST_TEXT_LENGTH = 300
+# Лимит Telegram — 4096 символов, оставляем запас на разметку
+MESSAGE_LIMIT = 4000
+# Дольше retry_after не ждём: сообщение считается ошибкой
+MAX_RETRY_AFTER = 60
+
+SUBSCRIBE_HELP = (
+    "/subscribe cat:bots python парсер -wordpress\n"
+    "cat:&lt;категория&gt; — категория, слово — ключевое слово (фраза — в кавычках), "
+    "-слово — стоп-слово, /subscribe * — все вакансии."
+)
+
+
+def parse_subscription(args: str, categories: Iterable[str] = ()) -> Dict:
+    """Разбор аргументов /subscribe в поля подписки.
+
+    ValueError с текстом для пользователя, если аргументы некорректны.
+    """
+    try:
+        tokens = shlex.split(args)
+    except ValueError:
+        tokens = args.split()
+    known = set(categories)
+    sub = {"categories": [], "keywords": [], "stop_words": []}
+    for token in tokens:
+        token = token.strip().lower()
+        if token.startswith("cat:"):
+            category = token[len("cat:"):]
+            if known and category not in known:
+                raise ValueError(f"Неизвестная категория: {category}. Доступны: {', '.join(sorted(known))}")
+            field, term = "categories", category
+        elif token.startswith("-"):
+            field, term = "stop_words", token[1:]
+        else:
+            field, term = "keywords", token
+        if len(term) < MIN_TERM_LENGTH:
+            continue
+        if term not in sub[field]:
+            sub[field].append(term)
+    if sum(len(terms) for terms in sub.values()) > MAX_TERMS:
+        raise ValueError(f"Слишком много условий (больше {MAX_TERMS})")
+    return sub
+
+
+def describe_subscription(sub: Dict) -> str:
+    """Подписка человекочитаемо (HTML)"""
+    lines = []
+    if sub.get("categories"):
+        lines.append(f"📂 Категории: {html.escape(', '.join(sub['categories']))}")
+    if sub.get("keywords"):
+        lines.append(f"🔑 Слова: {html.escape(', '.join(sub['keywords']))}")
+    if sub.get("stop_words"):
+        lines.append(f"🚫 Стоп-слова: {html.escape(', '.join(sub['stop_words']))}")
+    return "\n".join(lines) or "📬 Все вакансии"
+
+
+class SubscriptionIndex:
+    """Обратный индекс подписок: категория/слово → множество chat_id"""
+
+    def __init__(self, subscriptions: List[Dict]):
+        self.size = len(subscriptions)
+        self.everyone: Set[int] = set()
+        self.by_category: Dict[str, Set[int]] = {}
+        self.by_keyword: Dict[str, Set[int]] = {}
+        self.by_stop_word: Dict[str, Set[int]] = {}
+
+        for sub in subscriptions:
+            chat_id = sub["chat_id"]
+            if not sub.get("categories") and not sub.get("keywords"):
+                self.everyone.add(chat_id)
+            for category in sub.get("categories") or []:
+                self.by_category.setdefault(category, set()).add(chat_id)
+            for word in sub.get("keywords") or []:
+                self.by_keyword.setdefault(word.lower(), set()).add(chat_id)
+            for word in sub.get("stop_words") or []:
+                self.by_stop_word.setdefault(word.lower(), set()).add(chat_id)
+
+        self.matcher = AhoCorasick(list(self.by_keyword) + list(self.by_stop_word))
+
+    def match(self, job: Dict) -> Set[int]:
+        """Подписчики, которым подходит вакансия"""
+        found = self.matcher.find(job["text"]) if self.matcher.words else set()
+        chats = set(self.everyone)
+        for category in job.get("keywords") or []:
+            chats |= self.by_category.get(category, set())
+        for word in found:
+            chats |= self.by_keyword.get(word, set())
+        if chats:
+            for word in found:
+                chats -= self.by_stop_word.get(word, set())
+        return chats
+
+    def route(self, jobs: List[Dict]) -> Dict[int, List[Dict]]:
+        """Вакансии, сгруппированные по подписчикам"""
+        routes: Dict[int, List[Dict]] = {}
+        for job in jobs:
+            for chat_id in self.match(job):
+                routes.setdefault(chat_id, []).append(job)
+        return routes
+
+
+def format_subscriber_digest(jobs: List[Dict]) -> List[str]:
+    """Сообщения подписчику: все его вакансии, разбитые по лимиту длины"""
+    header = f"📋 <b>Новые вакансии по подписке</b>: {len(jobs)}\n\n"
+    items = []
+    for job in jobs[:DIGEST_LIMIT]:
+        text = job["text"]
+        if len(text) > DIGEST_TEXT_LENGTH:
+            text = text[:DIGEST_TEXT_LENGTH] + "..."
+        items.append(
+            f"📌 {html.escape(text)}\n"
+            f"📢 <a href=\"{job['url']}\">Источник</a>\n\n"
+        )
+    if len(jobs) > DIGEST_LIMIT:
+        items.append(f"... и ещё {len(jobs) - DIGEST_LIMIT}")
+
+    messages = []
+    current = header
+    for item in items:
+        if len(current) + len(item) > MESSAGE_LIMIT:
+            messages.append(current.rstrip())
+            current = ""
+        current += item
+    if current.strip():
+        messages.append(current.rstrip())
+    return messages
+
+
+def is_blocked(error: Exception) -> bool:
+    """Пользователь заблокировал бота или чат недоступен (403)"""
+    return getattr(error, "error_code", None) == 403 or type(error).__name__ == "TelegramForbiddenError"
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Пауза из ответа 429 (TelegramRetryAfter aiogram или TelegramAPIError), иначе None"""
+    seconds = getattr(error, "retry_after", None)
+    if seconds is None and getattr(error, "error_code", None) == 429:
+        seconds = 1
+    return float(seconds) if seconds is not None else None
+
+
+SendFunc = Callable[[int, str], Awaitable]
+
+
+async def deliver(send: SendFunc, routes: Dict[int, List[Dict]],
+                  concurrency: int = SUBSCRIBER_SEND_CONCURRENCY,
+                  rate: float = SUBSCRIBER_SEND_RATE,
+                  retries: int = SUBSCRIBER_SEND_RETRIES) -> Dict:
+    """Отправка каждому подписчику его пакета.
+
+    Не больше concurrency чатов одновременно и rate сообщений в секунду на
+    все чаты; после 429 сообщение повторяется через retry_after, не больше
+    retries раз.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate, concurrency)
+    stats = {"subscribers": len(routes), "messages": 0, "errors": 0, "retries": 0, "blocked": []}
+
+    async def send_one(chat_id: int, text: str):
+        attempt = 0
+        while True:
+            try:
+                async with limiter:
+                    await send(chat_id, text)
+                return
+            except Exception as e:
+                pause = retry_after(e)
+                if pause is None or attempt >= retries or pause > MAX_RETRY_AFTER:
+                    raise
+                attempt += 1
+                stats["retries"] += 1
+                metrics.inc("send_retries_total")
+                await asyncio.sleep(pause)
+
+    async def deliver_one(chat_id: int, jobs: List[Dict]):
+        async with semaphore:
+            for text in format_subscriber_digest(jobs):
+                try:
+                    await send_one(chat_id, text)
+                    stats["messages"] += 1
+                    metrics.inc("subscriber_messages_total")
+                except Exception as e:
+                    metrics.inc("send_errors_total")
+                    if is_blocked(e):
+                        stats["blocked"].append(chat_id)
+                        return
+                    stats["errors"] += 1
+                    print(f"[SUBS] Send error {chat_id}: {e}")
+
+    await asyncio.gather(*[deliver_one(chat_id, jobs) for chat_id, jobs in routes.items()])
+    return stats
+
+
+async def notify_subscribers(db, send: SendFunc, jobs: List[Dict],
+                             index: Optional[SubscriptionIndex] = None) -> Dict:
+    """Маршрутизация новых вакансий по подпискам из БД и доставка.
+
+    Подписки заблокировавших бота пользователей отключаются.
+    """
+    if not jobs:
+        return {"subscribers": 0, "messages": 0, "errors": 0, "retries": 0, "blocked": []}
+    if index is None:
+        index = SubscriptionIndex(await db.get_subscriptions())
+    if not index.size:
+        return {"subscribers": 0, "messages": 0, "errors": 0, "retries": 0, "blocked": []}
+
+    # Лучшие по score (src/scoring.py) — первыми, в лимит DIGEST_LIMIT
+    jobs = sorted(jobs, key=lambda job: job.get("score", 0), reverse=True)
+    with metrics.stage("route"):
+        routes = index.route(jobs)
+    metrics.inc("subscriber_routes_total", sum(len(items) for items in routes.values()))
+
+    with metrics.stage("send"):
+        stats = await deliver(send, routes)
+    if stats["blocked"]:
+        await db.deactivate_subscriptions(stats["blocked"])
+    print(f"[SUBS] Jobs: {len(jobs)}, subscribers: {stats['subscribers']}, "
+          f"messages: {stats['messages']}, retries: {stats['retries']}, "
+          f"errors: {stats['errors']}, blocked: {len(stats['blocked'])}")
+    return stats
@@ -0,0 +1,61 @@
+"""
+Лёгкий клиент Telegram Bot API поверх уже открытой aiohttp-сессии.
+
+Используется там, где aiogram избыточен (cron): импорт aiogram занимает
+секунды из-за pydantic-моделей, а для рассылки нужен только sendMessage.
+"""
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from src.config import TELEGRAM_API_BASE
+
+
+class TelegramAPIError(Exception):
+    """Ошибка, возвращённая Bot API (ok=false)"""
+
+    def __init__(self, method: str, error_code: int, description: str,
+                 retry_after: Optional[int] = None):
+        super().__init__(f"{method}: {error_code} {description}")
+        self.method = method
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+
+
+class BotAPI:
+    def __init__(self, session: aiohttp.ClientSession, token: str,
+                 api_base: str = TELEGRAM_API_BASE):
+        self.session = session
+        self.base_url = f"{api_base.rstrip('/')}/bot{token}"
+
+    async def call(self, method: str, **params: Any) -> Any:
+        """Вызов метода Bot API, возвращает поле result"""
+        payload = {key: value for key, value in params.items() if value is not None}
+        async with self.session.post(
+            f"{self.base_url}/{method}",
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=15),
+        ) as resp:
+            data: Dict[str, Any] = await resp.json(content_type=None)
+
+        if not data.get("ok"):
+            parameters = data.get("parameters") or {}
+            raise TelegramAPIError(
+                method,
+                data.get("error_code", resp.status),
+                data.get("description", ""),
+                retry_after=parameters.get("retry_after"),
+            )
+        return data.get("result")
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: Optional[str] = None,
+                           disable_web_page_preview: Optional[bool] = None) -> Dict:
+        """Отправка текстового сообщения"""
+        return await self.call(
+            "sendMessage",
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            disable_web_page_preview=disable_web_page_preview,
+        )
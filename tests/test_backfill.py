@@ -0,0 +1,103 @@
+"""
+Backfill против локальной замены t.me (benchmarks/fake_tme.py) и БД в памяти.
+"""
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+
+from fake_tme import BEHAVIOUR_KEY, Behaviour, start_server
+
+from src.backfill import backfill_channel
+from src.parser import TelegramParser
+from src.ratelimit import RateLimiter
+
+
+class CheckpointDB:
+    """add_jobs и crawl_checkpoints с семантикой SQL из src/database.py"""
+
+    def __init__(self):
+        self.jobs: List[Dict] = []
+        self.ids = itertools.count(1)
+        self.checkpoints: Dict[str, Dict] = {}
+
+    async def add_jobs(self, jobs):
+        keys = {(j["channel"], j["message_id"]) for j in self.jobs}
+        new = [j for j in jobs if (j["channel"], j["message_id"]) not in keys]
+        for job in new:
+            job["id"] = next(self.ids)
+        self.jobs.extend(new)
+        return new
+
+    async def mark_jobs_sent(self, ids):
+        pass
+
+    async def get_checkpoint(self, channel):
+        checkpoint = self.checkpoints.get(channel)
+        return dict(checkpoint) if checkpoint else None
+
+    async def save_checkpoint(self, channel, oldest_id, newest_id, complete=False, since_bound=None):
+        def pick(fn, a, b):
+            values = [v for v in (a, b) if v is not None]
+            return fn(values) if values else None
+
+        old = self.checkpoints.setdefault(channel, {
+            "oldest_id": None, "newest_id": None, "complete": False, "since_bound": None,
+            "gap_top": None, "gap_before": None,
+        })
+        old.update(
+            oldest_id=pick(min, old["oldest_id"], oldest_id),
+            newest_id=pick(max, old["newest_id"], newest_id),
+            complete=old["complete"] or complete,
+            since_bound=pick(min, old["since_bound"], since_bound),
+        )
+
+    async def save_gap(self, channel, top, before):
+        self.checkpoints[channel].update(gap_top=top, gap_before=before)
+
+
+class RecordingParser(TelegramParser):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests: List[Optional[int]] = []
+
+    async def fetch_page(self, channel_name, before=None, conditional=True):
+        self.requests.append(before)
+        return await super().fetch_page(channel_name, before, conditional)
+
+
+def test_gap_longer_than_max_pages_closes_across_runs():
+    async def scenario():
+        runner, app, base_url = await start_server(Behaviour(last_id=300, posts=20))
+        parser = RecordingParser(web_base=base_url)
+        db = CheckpointDB()
+        limiter = RateLimiter(0, 1)
+
+        async def run(**kwargs):
+            parser.requests.clear()
+            return await backfill_channel(parser, db, "chan", limiter, set(), [], **kwargs)
+
+        try:
+            await run(min_id=260)
+            assert db.checkpoints["chan"]["newest_id"] == 300
+
+            # 100 новых постов — 5 страниц при лимите 2 страницы за запуск
+            app[BEHAVIOUR_KEY].last_id = 400
+            first = await run(min_id=260, max_pages=2)
+            assert first["status"] == "max_pages"
+            assert db.checkpoints["chan"]["newest_id"] == 300
+            assert db.checkpoints["chan"]["gap_top"] == 400
+
+            # Второй запуск продолжает с сохранённой позиции, а не с головы канала
+            await run(min_id=260, max_pages=2)
+            assert None not in parser.requests
+            assert parser.requests[0] == 361
+
+            await run(min_id=260, max_pages=2)
+            checkpoint = db.checkpoints["chan"]
+            assert checkpoint["newest_id"] == 400
+            assert checkpoint["gap_top"] is None and checkpoint["gap_before"] is None
+        finally:
+            await parser.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+"""
+Извлечение стека из текста вакансии (src/extract.py).
+"""
+import pytest
+
+from src.extract import extract_tech
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Нужен фронтендер: React/TS, опыт от года", ["react", "typescript"]),
+    ("Ищем JS/TS разработчика", ["javascript", "typescript"]),
+    ("Бэкенд на Node.js + TS", ["node.js", "typescript"]),
+    ("Стек: TypeScript, JavaScript", ["javascript", "typescript"]),
+])
+def test_short_aliases_next_to_tech(text, expected):
+    assert extract_tech(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Пишите в личку, TS. Бюджет 10к", []),
+    ("Export the ts column to reports, contact JS Smith", []),
+    ("Нужен бот на python, время ts указываем в UTC", ["python"]),
+    ("Готовый скрипт js-заглушки не подойдёт", []),
+])
+def test_short_aliases_without_tech_context(text, expected):
+    assert extract_tech(text) == expected
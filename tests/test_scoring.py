@@ -0,0 +1,62 @@
+"""
+Оценка уже сохранённых вакансий (rescore_unsent_jobs).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.scoring import rescore_unsent_jobs
+
+
+class UnscoredDB:
+    """jobs в памяти: get_unscored_jobs/update_job_scores как в src/database.py"""
+
+    def __init__(self, count: int, fail_after_updates: int = -1):
+        now = datetime.utcnow()
+        self.jobs = {
+            n: {"id": n, "channel": "chan", "keywords": [], "tech": [], "budget_amount": None,
+                "created_at": now - timedelta(hours=n), "sent": n % 10 == 0, "score": 0.0}
+            for n in range(1, count + 1)
+        }
+        self.updates = 0
+        self.fail_after_updates = fail_after_updates
+
+    async def get_unscored_jobs(self, after_id=0, limit=1000):
+        rows = [job for job in sorted(self.jobs.values(), key=lambda job: job["id"])
+                if not job["sent"] and job["score"] == 0 and job["id"] > after_id]
+        return [dict(job) for job in rows[:limit]]
+
+    async def get_channel_counts(self, days=30):
+        return {"chan": len(self.jobs)}
+
+    async def update_job_scores(self, scores):
+        if self.updates == self.fail_after_updates:
+            raise RuntimeError("connection lost")
+        self.updates += 1
+        for job_id, score in scores.items():
+            self.jobs[job_id]["score"] = score
+
+
+def unscored(db: UnscoredDB) -> int:
+    return sum(1 for job in db.jobs.values() if not job["sent"] and job["score"] == 0)
+
+
+def test_rescore_covers_every_unsent_row():
+    db = UnscoredDB(2500)
+    assert asyncio.run(rescore_unsent_jobs(db, batch=400)) == 2250
+    assert unscored(db) == 0
+    assert all(job["score"] == 0 for job in db.jobs.values() if job["sent"])
+    # Повторный вызов ничего не делает
+    assert asyncio.run(rescore_unsent_jobs(db, batch=400)) == 0
+
+
+def test_interrupted_rescore_resumes():
+    db = UnscoredDB(2500, fail_after_updates=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(rescore_unsent_jobs(db, batch=400))
+    assert unscored(db) == 2250 - 800
+
+    db.fail_after_updates = -1
+    assert asyncio.run(rescore_unsent_jobs(db, batch=400)) == 2250 - 800
+    assert unscored(db) == 0